@@ -1,21 +1,65 @@
+import json
 from pydantic_settings import BaseSettings
-from pydantic import Field
+from pydantic import Field, field_validator
 
 
 class Settings(BaseSettings):
     openai_api_key: str = Field(default="", alias="OPENAI_API_KEY")
     database_url: str = Field(default="sqlite:///./storage/options_flow.db", alias="DATABASE_URL")
+    db_pool_size: int = Field(default=5, alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(default=10, alias="DB_MAX_OVERFLOW")
+    db_pool_timeout_s: float = Field(default=30.0, alias="DB_POOL_TIMEOUT_S")
+    db_pool_recycle_s: int = Field(default=1800, alias="DB_POOL_RECYCLE_S")
+    db_pool_pre_ping: bool = Field(default=True, alias="DB_POOL_PRE_PING")
+    write_behind: bool = Field(default=False, alias="WRITE_BEHIND")
+    write_behind_batch: int = Field(default=500, alias="WRITE_BEHIND_BATCH")
+    write_behind_flush_ms: int = Field(default=50, alias="WRITE_BEHIND_FLUSH_MS")
+    write_behind_max_depth: int = Field(default=10_000, alias="WRITE_BEHIND_MAX_DEPTH")
+    write_behind_drain_timeout_s: float = Field(default=30.0, alias="WRITE_BEHIND_DRAIN_TIMEOUT_S")
+    write_behind_spill_path: str = Field(default="./storage/write_behind_spill.jsonl", alias="WRITE_BEHIND_SPILL_PATH")
     storage_driver: str = Field(default="local", alias="STORAGE_DRIVER")
     local_storage_path: str = Field(default="./storage", alias="LOCAL_STORAGE_PATH")
     options_flow_api_key: str = Field(default="", alias="OPTIONS_FLOW_API_KEY")
     allow_unsafe_dev_no_api_key: bool = Field(default=False, alias="ALLOW_UNSAFE_DEV_NO_API_KEY")
     cors_allow_origins: str = Field(default="", alias="CORS_ALLOW_ORIGINS")
     max_upload_mb: int = Field(default=12, alias="MAX_UPLOAD_MB")
+    upload_chunk_kb: int = Field(default=1024, alias="UPLOAD_CHUNK_KB")
+    small_csv_max_rows: int = Field(default=1_000, alias="SMALL_CSV_MAX_ROWS")
+    small_csv_max_kb: int = Field(default=256, alias="SMALL_CSV_MAX_KB")
+    parse_batch_rows: int = Field(default=50_000, alias="PARSE_BATCH_ROWS")
+    flow_row_batch: int = Field(default=10_000, alias="FLOW_ROW_BATCH")
+    parallel_parse_threshold_mb: int = Field(default=0, alias="PARALLEL_PARSE_THRESHOLD_MB")
+    parse_workers: int = Field(default=0, alias="PARSE_WORKERS")
+    market_timezone: str = Field(default="America/New_York", alias="MARKET_TIMEZONE")
+    mapping_cache_size: int = Field(default=256, alias="MAPPING_CACHE_SIZE")
+    provider_mapping_overrides: str = Field(default="", alias="PROVIDER_MAPPING_OVERRIDES")
     rate_limit_per_minute: int = Field(default=60, alias="RATE_LIMIT_PER_MINUTE")
     s3_bucket: str = Field(default="", alias="S3_BUCKET")
     s3_region: str = Field(default="", alias="S3_REGION")
     s3_access_key: str = Field(default="", alias="S3_ACCESS_KEY")
     s3_secret_key: str = Field(default="", alias="S3_SECRET_KEY")
+    s3_endpoint_url: str = Field(default="", alias="S3_ENDPOINT_URL")
+    s3_part_mb: int = Field(default=8, alias="S3_PART_MB")
+    s3_upload_concurrency: int = Field(default=4, alias="S3_UPLOAD_CONCURRENCY")
+    s3_max_connections: int = Field(default=16, alias="S3_MAX_CONNECTIONS")
+    retention_interval_minutes: int = Field(default=60, alias="RETENTION_INTERVAL_MINUTES")
+    retention_compact_after_days: int = Field(default=7, alias="RETENTION_COMPACT_AFTER_DAYS")
+    retention_orphan_grace_minutes: int = Field(default=60, alias="RETENTION_ORPHAN_GRACE_MINUTES")
+    retention_evict_grace_minutes: int = Field(default=60, alias="RETENTION_EVICT_GRACE_MINUTES")
+    storage_budget_mb: int = Field(default=0, alias="STORAGE_BUDGET_MB")
+
+    @field_validator("provider_mapping_overrides")
+    @classmethod
+    def _mapping_overrides(cls, v: str) -> str:
+        if not v.strip():
+            return ""
+        try:
+            overrides = json.loads(v)
+        except ValueError as e:
+            raise ValueError(f"PROVIDER_MAPPING_OVERRIDES is not valid JSON: {e}") from None
+        if not isinstance(overrides, dict) or not all(isinstance(m, dict) for m in overrides.values()):
+            raise ValueError('PROVIDER_MAPPING_OVERRIDES must look like {"provider": {"field": "column", ...}, ...}')
+        return v
 
     class Config:
         env_file = ".env"
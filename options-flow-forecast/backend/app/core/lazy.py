@@ -0,0 +1,21 @@
+import importlib
+from types import ModuleType
+from typing import Optional
+
+
+class LazyModule:
+    """Stand-in for a heavy module that is only imported on first attribute access."""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module: Optional[ModuleType] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def __getattr__(self, attr: str):
+        if self._module is None:
+            # the import system serializes concurrent first imports of the same module
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
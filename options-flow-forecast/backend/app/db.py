@@ -1,17 +1,199 @@
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+from sqlalchemy import exc, inspect, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from sqlmodel import SQLModel, create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from .core.config import settings
 
+_engine: Optional[Engine] = None
+_async_engine: Optional[AsyncEngine] = None
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+_engine_lock = threading.Lock()
 
-def get_engine():
-    return create_engine(settings.database_url, echo=False)
+
+class PoolMetrics:
+    """Counters for the process-wide connection pool, read by `GET /db/pool`."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.waits = 0  # checkouts that found every connection (overflow included) in use
+            self.wait_seconds = 0.0
+            self.max_wait_seconds = 0.0
+            self.exhausted = 0  # checkouts that gave up after POOL_TIMEOUT
+
+    def record(self, waited: Optional[float], exhausted: bool = False) -> None:
+        with self._lock:
+            if exhausted:
+                self.exhausted += 1
+            else:
+                self.checkouts += 1
+            if waited is not None:
+                self.waits += 1
+                self.wait_seconds += waited
+                self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "wait_seconds": self.wait_seconds,
+                "max_wait_seconds": self.max_wait_seconds,
+                "exhausted": self.exhausted,
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+class _Metered:
+    def _do_get(self):
+        full = self._max_overflow > -1 and self.checkedout() >= self.size() + self._max_overflow
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.record(time.perf_counter() - start, exhausted=True)
+            raise
+        pool_metrics.record(time.perf_counter() - start if full else None)
+        return conn
+
+
+class MeteredQueuePool(_Metered, QueuePool):
+    pass
+
+
+class MeteredAsyncQueuePool(_Metered, AsyncAdaptedQueuePool):
+    pass
+
+
+def _pool_kwargs(url: str, poolclass) -> Dict[str, Any]:
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}  # in-memory SQLite keeps one connection per thread; there is no pool to size
+    kwargs = {
+        "poolclass": poolclass,
+        "pool_size": int(settings.db_pool_size),
+        "max_overflow": int(settings.db_max_overflow),
+        "pool_timeout": float(settings.db_pool_timeout_s),
+        "pool_recycle": int(settings.db_pool_recycle_s),
+        "pool_pre_ping": bool(settings.db_pool_pre_ping),
+    }
+    if parsed.get_backend_name() == "sqlite" and poolclass is MeteredAsyncQueuePool:
+        # SQLite has a single writer: extra connections only spin on its lock (busy
+        # timeout backoff), so async requests queue on one connection without blocking the loop
+        kwargs.update(pool_size=1, max_overflow=0)
+    return kwargs
+
+
+def get_engine() -> Engine:
+    """The process-wide engine, created on first use so its pool is shared by every request."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                url = settings.database_url
+                _engine = create_engine(url, echo=False, **_pool_kwargs(url, MeteredQueuePool))
+    return _engine
+
+
+def async_database_url(url: str) -> str:
+    """`DATABASE_URL` with the async driver for its backend (aiosqlite / asyncpg)."""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None or parsed.drivername.endswith(f"+{driver}"):
+        return url
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+def get_async_engine() -> AsyncEngine:
+    """The process-wide async engine, used by the API endpoints."""
+    global _async_engine
+    if _async_engine is None:
+        with _engine_lock:
+            if _async_engine is None:
+                url = async_database_url(settings.database_url)
+                _async_engine = create_async_engine(url, echo=False, **_pool_kwargs(url, MeteredAsyncQueuePool))
+    return _async_engine
+
+
+def create_writer_engine() -> AsyncEngine:
+    """A one-connection async engine for a background writer, kept apart from the request pool."""
+    url = async_database_url(settings.database_url)
+    kwargs = _pool_kwargs(url, AsyncAdaptedQueuePool)
+    if kwargs:
+        kwargs.update(pool_size=1, max_overflow=0)
+    return create_async_engine(url, echo=False, **kwargs)
+
+
+def dispose_engine() -> None:
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
+
+
+async def dispose_async_engine() -> None:
+    global _async_engine
+    engine, _async_engine = _async_engine, None
+    if engine is not None:
+        await engine.dispose()
+
+
+def _queue_status(pool) -> Dict[str, Any]:
+    status: Dict[str, Any] = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(size=pool.size(), checked_out=pool.checkedout(), idle=pool.checkedin(), overflow=pool.overflow())
+    return status
+
+
+def pool_status() -> Dict[str, Any]:
+    status = {"sync": _queue_status(get_engine().pool)}
+    if _async_engine is not None:
+        status["async"] = _queue_status(_async_engine.pool)
+    return {**status, **pool_metrics.snapshot()}
+
+
+def _add_missing_columns(engine) -> None:
+    # create_all only creates tables, so columns added to an existing model are added here
+    existing_tables = set(inspect(engine).get_table_names())
+    with engine.begin() as conn:
+        for table in SQLModel.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            present = {c["name"] for c in inspect(conn).get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in present and column.nullable:
+                    ddl = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {ddl}'))
 
 
 def init_db() -> None:
     engine = get_engine()
+    _add_missing_columns(engine)
     SQLModel.metadata.create_all(engine)
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
 
 
 def get_session():
     engine = get_engine()
     with Session(engine) as session:
         yield session
+
+
+async def get_async_session() -> AsyncIterator[AsyncSession]:
+    # expire_on_commit=False: reading a committed row must not trigger lazy IO outside an await
+    async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+        yield session
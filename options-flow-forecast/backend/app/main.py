@@ -1,7 +1,12 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Header, Request
+from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Header, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+import anyio
+import datetime as dt
 import uuid
 import json
 import os
@@ -9,18 +14,63 @@ import time
 
 from .core.config import settings
 from .core.logging import configure_logging
-from .db import init_db, get_session
-from .models import Upload as UploadModel, Analysis as AnalysisModel, Feedback as FeedbackModel
-from .schemas import AnalyzeRequest, AnalyzeResponse, FeedbackRequest, FlowTable
-from .services.storage import get_storage
-from .services.parser import parse_csv_bytes
+from .db import dispose_async_engine, dispose_engine, get_async_session, init_db, pool_status
+from .models import (
+    Upload as UploadModel,
+    Analysis as AnalysisModel,
+    Feedback as FeedbackModel,
+    ParsedUpload as ParsedUploadModel,
+)
+from .schemas import AnalysisPage, AnalyzeRequest, AnalyzeResponse, FeedbackRequest, UploadPage
+from .services.storage import StoredBlob, UploadTooLarge, get_storage
+from .services.sidecar import dump_sidecar, load_partitioned, load_sidecar, sidecar_key, summary_json
+from .services.retention import retention_loop
+from .services.write_behind import persist, start_write_behind, stop_write_behind, write_behind_status
+from .services.flow_rows import insert_flow_rows_async
+from .services.results import UnknownDictionary, compress_result, load_result
+from .services.listing import InvalidCursor, list_analyses, list_uploads
+from .services.dedup import (
+    cached_parse,
+    cached_row_count,
+    parse_key,
+    raw_evicted,
+    register_blob,
+    restore_blob,
+    storage_stats,
+    store_parse,
+)
+from .services.parser import (
+    ARROW_CONTENT_TYPES,
+    PARQUET_CONTENT_TYPES,
+    XLSX_CONTENT_TYPES,
+    UnreadableFile,
+    parse_flow_file_async,
+)
+from .services.columnar import ColumnarFlowTable
+from .services.compression import COMPRESSED_CONTENT_TYPES, DecompressedTooLarge, UnreadableArchive
 from .services.ocr import extract_flow_from_image
 from .services.analyze import analyze_flow
 
 configure_logging()
 init_db()
 
-app = FastAPI(title="options-flow-forecast")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with anyio.create_task_group() as tg:
+        if int(settings.retention_interval_minutes) > 0:
+            tg.start_soon(retention_loop, int(settings.retention_interval_minutes))
+        write_behind = start_write_behind()
+        if write_behind is not None:
+            tg.start_soon(write_behind.run)
+        yield
+        await stop_write_behind()
+        tg.cancel_scope.cancel()
+    await dispose_async_engine()
+    dispose_engine()
+
+
+app = FastAPI(title="options-flow-forecast", lifespan=lifespan)
 RATE_BUCKETS: dict[str, tuple[int, float]] = {}
 FLOW_CONTENT_TYPES = {
     "text/csv",
@@ -30,8 +80,11 @@ FLOW_CONTENT_TYPES = {
     "image/png",
     "image/jpeg",
     "image/webp",
-}
+} | PARQUET_CONTENT_TYPES | ARROW_CONTENT_TYPES | XLSX_CONTENT_TYPES | COMPRESSED_CONTENT_TYPES
 CHART_CONTENT_TYPES = {"image/png", "image/jpeg", "image/webp"}
+MAX_PAGE_SIZE = 500
+# room for the multipart boundaries and part headers around the file itself
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
 
 
 def parse_cors_origins(raw: str) -> list[str]:
@@ -40,12 +93,53 @@ def parse_cors_origins(raw: str) -> list[str]:
     return [o.strip() for o in raw.split(",") if o.strip()]
 
 
+def upload_limit_bytes() -> int:
+    return int(settings.max_upload_mb) * 1024 * 1024
+
+
+class RequestBodyLimit:
+    """Rejects request bodies over the upload limit while they are still arriving.
+
+    Starlette spools the whole multipart body before the endpoint runs, so this is the
+    only place an oversized upload can be stopped before it is read in full.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        max_bytes = upload_limit_bytes()
+        if scope["type"] != "http" or max_bytes <= 0:
+            await self.app(scope, receive, send)
+            return
+        limit = max_bytes + MULTIPART_OVERHEAD_BYTES
+        declared = dict(scope["headers"]).get(b"content-length", b"")
+        if declared.isdigit() and int(declared) > limit:
+            await JSONResponse({"detail": "File too large"}, status_code=413)(scope, receive, send)
+            return
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # raised inside the form parser; FastAPI passes HTTPExceptions through
+                    raise HTTPException(status_code=413, detail="File too large")
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+app.add_middleware(RequestBodyLimit)
+
 cors_origins = parse_cors_origins(settings.cors_allow_origins)
 if cors_origins:
     app.add_middleware(
         CORSMiddleware,
         allow_origins=cors_origins,
-        allow_methods=["POST"],
+        allow_methods=["GET", "POST"],
         allow_headers=["*"],
     )
 
@@ -75,10 +169,38 @@ def enforce_rate_limit(req: Request, x_api_key: str = Header(default="")):
         raise HTTPException(status_code=429, detail="Rate limit exceeded")
 
 
-def enforce_upload_size(data: bytes):
-    max_bytes = int(settings.max_upload_mb) * 1024 * 1024
-    if max_bytes > 0 and len(data) > max_bytes:
+async def upload_chunks(file: UploadFile) -> AsyncIterator[bytes]:
+    chunk_size = max(1, int(settings.upload_chunk_kb)) * 1024
+    while chunk := await file.read(chunk_size):
+        yield chunk
+
+
+async def save_upload(file: UploadFile) -> StoredBlob:
+    storage = get_storage()
+    try:
+        stored = await storage.save_stream(file.filename, upload_chunks(file), upload_limit_bytes())
+    except UploadTooLarge:
         raise HTTPException(status_code=413, detail="File too large")
+    if not stored.size:
+        await anyio.to_thread.run_sync(storage.delete, stored.path)
+        raise HTTPException(status_code=400, detail="Empty file")
+    return stored
+
+
+async def register_upload(session: AsyncSession, file: UploadFile, stored: StoredBlob) -> StoredBlob:
+    blob = await session.run_sync(register_blob, stored)
+    if blob.evicted_at is not None:
+        # the retention job evicted these bytes after save_upload found them stored: write them again
+        await file.seek(0)
+        stored = await save_upload(file)
+        await session.run_sync(restore_blob, stored)
+    return stored
+
+
+async def discard_upload(stored: StoredBlob) -> None:
+    # a duplicate's blob belongs to the upload that stored it first
+    if not stored.duplicate:
+        await anyio.to_thread.run_sync(get_storage().delete, stored.path)
 
 
 def enforce_content_type(file: UploadFile, allowed: set[str]):
@@ -93,45 +215,78 @@ def load_prompt() -> str:
         return f.read()
 
 
+def ocr_flow_file(path: str) -> ColumnarFlowTable:
+    prompt = load_prompt()
+    with get_storage().map(path) as data:
+        return ColumnarFlowTable.from_flow_table(extract_flow_from_image(data, prompt))
+
+
+def write_sidecar(key: str, parsed: ColumnarFlowTable) -> str:
+    return get_storage().put(sidecar_key(key), dump_sidecar(parsed))
+
+
 @app.post("/ingest/flow")
 async def ingest_flow(
     file: UploadFile = File(...),
     provider: str | None = None,
     symbol: str | None = None,
+    date: dt.date | None = None,
     _: None = Depends(require_api_key),
     __: None = Depends(enforce_rate_limit),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     enforce_content_type(file, FLOW_CONTENT_TYPES)
-    data = await file.read()
-    if not data:
-        raise HTTPException(status_code=400, detail="Empty file")
-    enforce_upload_size(data)
-
-    storage = get_storage()
-    upload_id, path = storage.save(file.filename, data)
-
-    parsed_table: FlowTable | None = None
-    if file.content_type and file.content_type.startswith("image/"):
-        prompt = load_prompt()
-        parsed_table = extract_flow_from_image(data, prompt)
-    else:
-        parsed_table = parse_csv_bytes(data, provider)
+    session_date = date.isoformat() if date else None
+    stored = await save_upload(file)
+
+    is_image = bool(file.content_type and file.content_type.startswith("image/"))
+    # screenshots go through OCR, which ignores provider and date
+    key = parse_key(stored.digest, file.content_type, *((None, None) if is_image else (provider, session_date)))
+    upload_id = str(uuid.uuid4())
+    row_count = await session.run_sync(cached_row_count, key)
+    if row_count is None:
+        # parsing, OCR and the sidecar write block, so they run on worker threads
+        if is_image:
+            parsed = await anyio.to_thread.run_sync(ocr_flow_file, stored.path)
+        else:
+            try:
+                parsed = await parse_flow_file_async(stored.path, file.content_type, provider, session_date=session_date)
+            except DecompressedTooLarge:
+                await discard_upload(stored)
+                raise HTTPException(status_code=413, detail="Decompressed file too large")
+            except (UnreadableArchive, UnreadableFile) as e:
+                await discard_upload(stored)
+                raise HTTPException(status_code=400, detail=str(e))
+        sidecar_path = await anyio.to_thread.run_sync(write_sidecar, key, parsed)
+        row_count = len(parsed)
+        parsed_upload = ParsedUploadModel(
+            key=key,
+            digest=stored.digest,
+            metadata_json=summary_json(parsed, sidecar_path),
+            row_count=row_count,
+            sidecar_path=sidecar_path,
+        )
+        # rows are stored once per parse, under the upload that introduced it; a concurrent
+        # upload of the same bytes may have got there first
+        if await session.run_sync(store_parse, parsed_upload):
+            await insert_flow_rows_async(session, upload_id, parsed)
 
+    stored = await register_upload(session, file, stored)
     upload = UploadModel(
         id=upload_id,
         upload_type="flow",
         filename=file.filename,
-        storage_path=path,
+        storage_path=stored.path,
         content_type=file.content_type or "application/octet-stream",
         provider=provider,
         symbol=symbol,
-        metadata_json=json.dumps(parsed_table.model_dump()) if parsed_table else None,
+        digest=stored.digest,
+        parse_key=key,
     )
     session.add(upload)
-    session.commit()
+    await session.commit()
 
-    return {"upload_id": upload_id, "rows": len(parsed_table.rows) if parsed_table else 0}
+    return {"upload_id": upload_id, "rows": row_count}
 
 
 @app.post("/ingest/chart")
@@ -140,39 +295,74 @@ async def ingest_chart(
     symbol: str | None = None,
     _: None = Depends(require_api_key),
     __: None = Depends(enforce_rate_limit),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     enforce_content_type(file, CHART_CONTENT_TYPES)
-    data = await file.read()
-    if not data:
-        raise HTTPException(status_code=400, detail="Empty file")
-    enforce_upload_size(data)
-
-    storage = get_storage()
-    upload_id, path = storage.save(file.filename, data)
+    stored = await save_upload(file)
 
+    upload_id = str(uuid.uuid4())
+    stored = await register_upload(session, file, stored)
     upload = UploadModel(
         id=upload_id,
         upload_type="chart",
         filename=file.filename,
-        storage_path=path,
+        storage_path=stored.path,
         content_type=file.content_type or "application/octet-stream",
         symbol=symbol,
+        digest=stored.digest,
     )
     session.add(upload)
-    session.commit()
+    await session.commit()
 
     return {"upload_id": upload_id}
 
 
+def load_parsed_table(flow_upload: UploadModel, parsed_upload: ParsedUploadModel | None) -> ColumnarFlowTable | None:
+    if parsed_upload is not None and parsed_upload.sidecar_path:
+        try:
+            return load_sidecar(parsed_upload.sidecar_path)
+        except Exception:
+            return None
+    # uploads from before sidecars carry the whole table as JSON
+    metadata_json = flow_upload.metadata_json or (parsed_upload.metadata_json if parsed_upload else None)
+    if not metadata_json:
+        return None
+    try:
+        payload = json.loads(metadata_json)
+        if "partitions" in payload:  # merged into daily partitions by the retention job
+            return load_partitioned(parsed_upload.key, payload["partitions"], payload.get("provider"))
+        return ColumnarFlowTable.from_records(payload["rows"], payload.get("provider"))
+    except Exception:
+        return None
+
+
+async def flow_table_for(session: AsyncSession, flow_upload: UploadModel, session_date: str):
+    parsed_upload = await session.run_sync(cached_parse, flow_upload.parse_key)
+    parsed = await anyio.to_thread.run_sync(load_parsed_table, flow_upload, parsed_upload)
+    if parsed is None:
+        if await session.run_sync(raw_evicted, flow_upload.digest):
+            return None  # the retention job removed the original; there is nothing left to parse
+        # attempt to parse from file path
+        try:
+            if flow_upload.content_type and flow_upload.content_type.startswith("image/"):
+                parsed = await anyio.to_thread.run_sync(ocr_flow_file, flow_upload.storage_path)
+            else:
+                parsed = await parse_flow_file_async(
+                    flow_upload.storage_path, flow_upload.content_type, flow_upload.provider, session_date=session_date
+                )
+        except FileNotFoundError:
+            return None
+    return parsed
+
+
 @app.post("/analyze", response_model=AnalyzeResponse)
 async def analyze(
     req: AnalyzeRequest,
     _: None = Depends(require_api_key),
     __: None = Depends(enforce_rate_limit),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    flow_upload = session.exec(select(UploadModel).where(UploadModel.id == req.flow_upload_id)).first()
+    flow_upload = (await session.exec(select(UploadModel).where(UploadModel.id == req.flow_upload_id))).first()
     if not flow_upload:
         return AnalyzeResponse(
             status="needs_more_data",
@@ -180,42 +370,29 @@ async def analyze(
             disclaimer=DISCLAIMER,
         )
 
-    parsed: FlowTable | None = None
-    if flow_upload.metadata_json:
-        try:
-            parsed = FlowTable.model_validate(json.loads(flow_upload.metadata_json))
-        except Exception:
-            parsed = None
+    parsed = await flow_table_for(session, flow_upload, req.date)
 
-    if parsed is None:
-        # attempt to parse from file path
-        with open(flow_upload.storage_path, "rb") as f:
-            data = f.read()
-        if flow_upload.content_type and flow_upload.content_type.startswith("image/"):
-            prompt = load_prompt()
-            parsed = extract_flow_from_image(data, prompt)
-        else:
-            parsed = parse_csv_bytes(data, flow_upload.provider)
-
-    if parsed is None or not parsed.rows:
+    if parsed is None or not len(parsed):
         return AnalyzeResponse(
             status="needs_more_data",
             missing=["flow_rows"],
             disclaimer=DISCLAIMER,
         )
 
-    features, forecast, key_levels, rationale = analyze_flow(parsed)
+    # the analysis, the per-row response table and the zstd pass are CPU-bound
+    features, forecast, key_levels, rationale = await anyio.to_thread.run_sync(analyze_flow, parsed)
+    flow_table = await anyio.to_thread.run_sync(parsed.to_flow_table)
 
     response = AnalyzeResponse(
         status="ok",
-        parsed_flow_table=parsed,
+        parsed_flow_table=flow_table,
         engineered_features=features,
         forecast=forecast,
         key_levels=key_levels,
         rationale=rationale,
         confidence=0.55,
         disclaimer=DISCLAIMER,
-        observed={"rows": len(parsed.rows)},
+        observed={"rows": len(parsed)},
         inferences={"key_levels": [k.model_dump() for k in key_levels]},
     )
 
@@ -226,10 +403,9 @@ async def analyze(
         date=req.date,
         flow_upload_id=req.flow_upload_id,
         chart_upload_id=req.chart_upload_id,
-        result_json=response.model_dump_json(),
+        result_zstd=await anyio.to_thread.run_sync(compress_result, response),
     )
-    session.add(analysis)
-    session.commit()
+    await persist(session, analysis)
 
     return response
 
@@ -239,7 +415,7 @@ async def feedback(
     req: FeedbackRequest,
     _: None = Depends(require_api_key),
     __: None = Depends(enforce_rate_limit),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     fb = FeedbackModel(
         id=str(uuid.uuid4()),
@@ -247,11 +423,88 @@ async def feedback(
         correct=req.correct,
         notes=req.notes,
     )
-    session.add(fb)
-    session.commit()
+    await persist(session, fb)
     return {"status": "ok"}
 
 
+@app.get("/analyses", response_model=AnalysisPage)
+async def get_analyses(
+    symbol: str | None = None,
+    date_from: dt.date | None = None,
+    date_to: dt.date | None = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    _: None = Depends(require_api_key),
+    session: AsyncSession = Depends(get_async_session),
+):
+    try:
+        items, next_cursor = await session.run_sync(list_analyses, symbol, date_from, date_to, limit, cursor)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return AnalysisPage(items=items, next_cursor=next_cursor)
+
+
+@app.get("/analyses/{analysis_id}", response_model=AnalyzeResponse)
+async def get_analysis(
+    analysis_id: str,
+    _: None = Depends(require_api_key),
+    session: AsyncSession = Depends(get_async_session),
+):
+    analysis = (await session.exec(select(AnalysisModel).where(AnalysisModel.id == analysis_id))).first()
+    if not analysis:
+        raise HTTPException(status_code=404, detail="analysis not found")
+    try:
+        payload = await anyio.to_thread.run_sync(load_result, analysis.result_zstd, analysis.result_json)
+    except UnknownDictionary as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    response = AnalyzeResponse.model_validate(payload)
+    if response.status == "ok" and response.parsed_flow_table is None:
+        # only from a parse that is still stored: a GET never re-parses or re-runs OCR
+        flow_upload = (await session.exec(select(UploadModel).where(UploadModel.id == analysis.flow_upload_id))).first()
+        if flow_upload is not None:
+            parsed_upload = await session.run_sync(cached_parse, flow_upload.parse_key)
+            parsed = await anyio.to_thread.run_sync(load_parsed_table, flow_upload, parsed_upload)
+            if parsed is not None:
+                response.parsed_flow_table = await anyio.to_thread.run_sync(parsed.to_flow_table)
+    return response
+
+
+@app.get("/uploads", response_model=UploadPage)
+async def get_uploads(
+    upload_type: str | None = None,
+    symbol: str | None = None,
+    date_from: dt.date | None = None,
+    date_to: dt.date | None = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    _: None = Depends(require_api_key),
+    session: AsyncSession = Depends(get_async_session),
+):
+    try:
+        items, next_cursor = await session.run_sync(list_uploads, upload_type, symbol, date_from, date_to, limit, cursor)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return UploadPage(items=items, next_cursor=next_cursor)
+
+
+@app.get("/storage/stats")
+async def get_storage_stats(
+    _: None = Depends(require_api_key),
+    session: AsyncSession = Depends(get_async_session),
+):
+    return await session.run_sync(storage_stats)
+
+
+@app.get("/db/pool")
+async def get_pool_status(_: None = Depends(require_api_key)):
+    return pool_status()
+
+
+@app.get("/db/write-behind")
+async def get_write_behind_status(_: None = Depends(require_api_key)):
+    return write_behind_status()
+
+
 DISCLAIMER = (
     "Educational use only. This report is not financial advice,"
     " not a recommendation, and not an invitation to trade."
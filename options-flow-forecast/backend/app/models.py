@@ -1,9 +1,17 @@
 from datetime import datetime
 from typing import Optional
+from sqlalchemy import BigInteger, Column, Index, LargeBinary
 from sqlmodel import SQLModel, Field
 
 
 class Upload(SQLModel, table=True):
+    # GET /uploads pages newest first, optionally filtered by type or symbol
+    __table_args__ = (
+        Index("ix_upload_created", "created_at", "id"),
+        Index("ix_upload_type_created", "upload_type", "created_at", "id"),
+        Index("ix_upload_symbol_created", "symbol", "created_at", "id"),
+    )
+
     id: str = Field(primary_key=True)
     upload_type: str = Field(index=True)  # flow | chart
     filename: str
@@ -12,22 +20,72 @@ class Upload(SQLModel, table=True):
     provider: Optional[str] = None
     symbol: Optional[str] = None
     metadata_json: Optional[str] = None
+    digest: Optional[str] = Field(default=None, index=True)  # sha256 of the stored blob
+    parse_key: Optional[str] = None  # ParsedUpload holding this upload's parse
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class Blob(SQLModel, table=True):
+    digest: str = Field(primary_key=True)
+    storage_path: str
+    size: int
+    ref_count: int = 0  # uploads pointing at this blob
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    last_used_at: Optional[datetime] = None  # last upload of these bytes, for LRU eviction
+    evicted_at: Optional[datetime] = None  # raw file removed by the retention job; parsed data is kept
+
+
+class ParsedUpload(SQLModel, table=True):
+    key: str = Field(primary_key=True)  # digest + everything else the parse depends on
+    digest: str = Field(index=True)
+    metadata_json: str  # summary stats, or the whole FlowTable for rows written before sidecars
+    row_count: int
+    sidecar_path: Optional[str] = None  # Arrow IPC file holding the parsed rows
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 
+class FlowRowRecord(SQLModel, table=True):
+    """One parsed print, filled in bulk when an upload's parse is first stored."""
+
+    __table_args__ = (Index("ix_flowrowrecord_contract", "symbol", "expiry", "strike", "option_type"),)
+
+    upload_id: str = Field(primary_key=True)  # the upload that introduced this parse
+    row_index: int = Field(primary_key=True)
+    symbol: Optional[str] = None
+    underlying: Optional[str] = None
+    expiry: Optional[str] = None  # YYYY-MM-DD
+    strike: Optional[float] = None
+    option_type: Optional[str] = None
+    side: Optional[str] = None
+    price: Optional[float] = None
+    size: Optional[float] = None
+    premium: Optional[float] = None
+    open_interest: Optional[float] = None
+    iv: Optional[float] = None
+    delta: Optional[float] = None
+    timestamp_ns: Optional[int] = Field(default=None, sa_column=Column(BigInteger, index=True))  # UTC epoch ns
+
+
 class Analysis(SQLModel, table=True):
+    # GET /analyses pages by session date, optionally for one symbol
+    __table_args__ = (
+        Index("ix_analysis_date", "date", "id"),
+        Index("ix_analysis_symbol_date", "symbol", "date", "id"),
+    )
+
     id: str = Field(primary_key=True)
     symbol: str
     date: str
     flow_upload_id: str
     chart_upload_id: Optional[str] = None
-    result_json: str
+    result_json: str = ""  # plain-text payload of analyses stored before result_zstd
+    result_zstd: Optional[bytes] = Field(default=None, sa_column=Column(LargeBinary))  # see services/results.py
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 
 class Feedback(SQLModel, table=True):
     id: str = Field(primary_key=True)
-    analysis_id: str
+    analysis_id: str = Field(index=True)
     correct: Optional[bool] = None
     notes: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -1,5 +1,6 @@
+from datetime import date, datetime
 from typing import List, Optional, Literal, Dict, Any
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
 
 class FlowRow(BaseModel):
@@ -16,6 +17,7 @@ class FlowRow(BaseModel):
     iv: Optional[float] = None
     delta: Optional[float] = None
     timestamp: Optional[str] = None
+    timestamp_ns: Optional[int] = None  # UTC epoch nanoseconds, derived from timestamp
 
 
 class FlowTable(BaseModel):
@@ -56,6 +58,12 @@ class AnalyzeRequest(BaseModel):
     flow_upload_id: str
     chart_upload_id: Optional[str] = None
 
+    @field_validator("date")
+    @classmethod
+    def _iso_date(cls, v: str) -> str:
+        # re-parses use it as the session date, so it must be a calendar day; stored as YYYY-MM-DD
+        return date.fromisoformat(v.strip()).isoformat()
+
 
 class AnalyzeResponse(BaseModel):
     status: Literal["ok", "needs_more_data"]
@@ -76,3 +84,33 @@ class FeedbackRequest(BaseModel):
     analysis_id: str
     correct: Optional[bool] = None
     notes: Optional[str] = None
+
+
+class AnalysisSummary(BaseModel):
+    id: str
+    symbol: str
+    date: str
+    flow_upload_id: str
+    chart_upload_id: Optional[str] = None
+    created_at: datetime
+
+
+class AnalysisPage(BaseModel):
+    items: List[AnalysisSummary]
+    next_cursor: Optional[str] = None  # pass back as `cursor` for the next page
+
+
+class UploadSummary(BaseModel):
+    id: str
+    upload_type: str
+    filename: str
+    content_type: str
+    provider: Optional[str] = None
+    symbol: Optional[str] = None
+    digest: Optional[str] = None
+    created_at: datetime
+
+
+class UploadPage(BaseModel):
+    items: List[UploadSummary]
+    next_cursor: Optional[str] = None
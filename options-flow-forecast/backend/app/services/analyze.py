@@ -1,16 +1,14 @@
-from typing import Dict, List
+from typing import List, Union
 from ..schemas import FlowTable, EngineeredFeatures, KeyLevel, Forecast
-from .features import compute_features
+from .columnar import ColumnarFlowTable, as_columnar
+from .features import compute_features, premium_by_strike
 from .model import predict_proba
 
 
-def build_key_levels(flow: FlowTable) -> List[KeyLevel]:
-    levels: Dict[float, float] = {}
-    for r in flow.rows:
-        prem = r.premium or 0.0
-        levels[r.strike] = levels.get(r.strike, 0.0) + prem
+def build_key_levels(flow: Union[FlowTable, ColumnarFlowTable]) -> List[KeyLevel]:
+    levels = premium_by_strike(as_columnar(flow))
 
-    top = sorted(levels.items(), key=lambda kv: kv[1], reverse=True)[:6]
+    top = sorted(levels, key=lambda kv: kv[1], reverse=True)[:6]
     out: List[KeyLevel] = []
     for strike, prem in top:
         out.append(KeyLevel(strike=strike, reason=f"High premium concentration (~{prem:,.0f})"))
@@ -38,7 +36,8 @@ def build_forecast(features: EngineeredFeatures) -> Forecast:
     return Forecast(scenarios=scenarios)
 
 
-def analyze_flow(flow: FlowTable):
+def analyze_flow(flow: Union[FlowTable, ColumnarFlowTable]):
+    flow = as_columnar(flow)
     features = compute_features(flow)
     forecast = build_forecast(features)
     key_levels = build_key_levels(flow)
@@ -0,0 +1,237 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+import numpy as np
+from pydantic import TypeAdapter
+from ..schemas import FlowRow, FlowTable
+
+
+FLOW_FIELDS = [
+    "symbol",
+    "underlying",
+    "expiry",
+    "strike",
+    "option_type",
+    "side",
+    "price",
+    "size",
+    "premium",
+    "open_interest",
+    "iv",
+    "delta",
+    "timestamp",
+    "timestamp_ns",
+]
+NUMERIC_FIELDS = ["strike", "price", "size", "premium", "open_interest", "iv", "delta"]
+CATEGORICAL_FIELDS = ["symbol", "underlying", "expiry", "option_type", "side", "timestamp"]
+FLOW_ROWS = TypeAdapter(List[FlowRow])
+NAT = np.iinfo(np.int64).min  # missing timestamp_ns
+NO_DAY = np.iinfo(np.int32).min  # expiry that is not a YYYY-MM-DD date
+EPOCH_DAY = date(1970, 1, 1).toordinal()
+
+
+@dataclass
+class DictColumn:
+    """Dictionary-encoded string column; code -1 stands for None."""
+
+    codes: np.ndarray
+    values: List[str] = field(default_factory=list)
+
+    @classmethod
+    def encode(cls, items: Iterable[Optional[str]]) -> "DictColumn":
+        lookup: Dict[str, int] = {}
+        codes = [-1 if v is None else lookup.setdefault(v, len(lookup)) for v in items]
+        return cls(np.array(codes, dtype=np.int32), list(lookup))
+
+    @classmethod
+    def concat(cls, columns: Sequence["DictColumn"]) -> "DictColumn":
+        lookup: Dict[str, int] = {}
+        parts = []
+        for col in columns:
+            remap = np.array([lookup.setdefault(v, len(lookup)) for v in col.values] + [-1], dtype=np.int32)
+            parts.append(remap[col.codes])
+        codes = np.concatenate(parts) if parts else np.empty(0, dtype=np.int32)
+        return cls(codes, list(lookup))
+
+    def compact(self) -> "DictColumn":
+        """Drop dictionary values no row uses (e.g. after `take`)."""
+        used = np.unique(self.codes[self.codes >= 0])
+        remap = np.full(len(self.values) + 1, -1, dtype=np.int32)  # the extra slot keeps -1 as -1
+        remap[used] = np.arange(len(used), dtype=np.int32)
+        return DictColumn(remap[self.codes], [self.values[i] for i in used.tolist()])
+
+    def code_of(self, value: str) -> int:
+        try:
+            return self.values.index(value)
+        except ValueError:
+            return -2
+
+    def eq(self, value: str) -> np.ndarray:
+        return self.codes == self.code_of(value)
+
+    def decode(self) -> np.ndarray:
+        lookup = np.array(self.values + [None], dtype=object)
+        return lookup[self.codes]
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+
+@dataclass
+class ColumnarFlowTable:
+    """Column-oriented `FlowTable`: float64 arrays (NaN for None) plus dictionary-encoded strings.
+
+    `timestamp_ns` is int64 UTC epoch nanoseconds with `NAT` for unknown times.
+    """
+
+    symbol: DictColumn
+    underlying: DictColumn
+    expiry: DictColumn
+    option_type: DictColumn
+    side: DictColumn
+    timestamp: DictColumn
+    strike: np.ndarray
+    price: np.ndarray
+    size: np.ndarray
+    premium: np.ndarray
+    open_interest: np.ndarray
+    iv: np.ndarray
+    delta: np.ndarray
+    timestamp_ns: np.ndarray
+    provider: Optional[str] = None
+    expiry_day: Optional[np.ndarray] = None  # int32 per row, when the parser already worked it out
+
+    def __len__(self) -> int:
+        return len(self.strike)
+
+    @classmethod
+    def empty(cls, provider: Optional[str] = None) -> "ColumnarFlowTable":
+        return cls.from_records([], provider)
+
+    @classmethod
+    def from_records(cls, records: Sequence[Dict[str, Any]], provider: Optional[str] = None) -> "ColumnarFlowTable":
+        cols: Dict[str, Any] = {}
+        for f in CATEGORICAL_FIELDS:
+            cols[f] = DictColumn.encode(r.get(f) for r in records)
+        for f in NUMERIC_FIELDS:
+            cols[f] = np.array([r.get(f) for r in records], dtype=np.float64)
+        cols["timestamp_ns"] = _ns_array(r.get("timestamp_ns") for r in records)
+        return cls(provider=provider, **cols)
+
+    @classmethod
+    def from_flow_table(cls, table: FlowTable) -> "ColumnarFlowTable":
+        cols: Dict[str, Any] = {}
+        for f in CATEGORICAL_FIELDS:
+            cols[f] = DictColumn.encode(getattr(r, f) for r in table.rows)
+        for f in NUMERIC_FIELDS:
+            cols[f] = np.array([getattr(r, f) for r in table.rows], dtype=np.float64)
+        cols["timestamp_ns"] = _ns_array(r.timestamp_ns for r in table.rows)
+        return cls(provider=table.provider, **cols)
+
+    @classmethod
+    def from_frame(cls, frame, provider: Optional[str] = None) -> "ColumnarFlowTable":
+        """Build from a normalized parser frame (columns named after `FLOW_FIELDS`)."""
+        cols: Dict[str, Any] = {}
+        for f in CATEGORICAL_FIELDS:
+            codes, uniques = frame[f].factorize()
+            cols[f] = DictColumn(codes.astype(np.int32), [str(v) for v in uniques])
+        for f in NUMERIC_FIELDS:
+            cols[f] = frame[f].to_numpy(dtype=np.float64, na_value=np.nan)
+        if "timestamp_ns" in frame:
+            cols["timestamp_ns"] = frame["timestamp_ns"].to_numpy(dtype=np.int64)
+        else:
+            cols["timestamp_ns"] = np.full(len(frame), NAT, dtype=np.int64)
+        if "expiry_day" in frame:
+            cols["expiry_day"] = frame["expiry_day"].to_numpy(dtype=np.int32)
+        return cls(provider=provider, **cols)
+
+    @classmethod
+    def concat(cls, tables: Sequence["ColumnarFlowTable"], provider: Optional[str] = None) -> "ColumnarFlowTable":
+        if not tables:
+            return cls.empty(provider)
+        cols: Dict[str, Any] = {}
+        for f in CATEGORICAL_FIELDS:
+            cols[f] = DictColumn.concat([getattr(t, f) for t in tables])
+        for f in NUMERIC_FIELDS + ["timestamp_ns"]:
+            cols[f] = np.concatenate([getattr(t, f) for t in tables])
+        if all(t.expiry_day is not None for t in tables):
+            cols["expiry_day"] = np.concatenate([t.expiry_day for t in tables])
+        return cls(provider=provider if provider is not None else tables[0].provider, **cols)
+
+    def take(self, indices: np.ndarray) -> "ColumnarFlowTable":
+        cols: Dict[str, Any] = {}
+        for f in CATEGORICAL_FIELDS:
+            col = getattr(self, f)
+            cols[f] = DictColumn(col.codes[indices], col.values)
+        for f in NUMERIC_FIELDS + ["timestamp_ns"]:
+            cols[f] = getattr(self, f)[indices]
+        if self.expiry_day is not None:
+            cols["expiry_day"] = self.expiry_day[indices]
+        return ColumnarFlowTable(provider=self.provider, **cols)
+
+    def compact(self) -> "ColumnarFlowTable":
+        cols: Dict[str, Any] = {f: getattr(self, f).compact() for f in CATEGORICAL_FIELDS}
+        for f in NUMERIC_FIELDS + ["timestamp_ns"]:
+            cols[f] = getattr(self, f)
+        return ColumnarFlowTable(provider=self.provider, expiry_day=self.expiry_day, **cols)
+
+    def sort_by_time(self) -> "ColumnarFlowTable":
+        """Stable sort by `timestamp_ns`; rows without a time keep their order at the end."""
+        ts = np.where(self.timestamp_ns == NAT, np.iinfo(np.int64).max, self.timestamp_ns)
+        return self.take(np.argsort(ts, kind="stable"))
+
+    def time_slice(self, start_ns: Optional[int] = None, end_ns: Optional[int] = None) -> "ColumnarFlowTable":
+        """Rows with `start_ns <= timestamp_ns < end_ns`."""
+        mask = self.timestamp_ns != NAT
+        if start_ns is not None:
+            mask &= self.timestamp_ns >= start_ns
+        if end_ns is not None:
+            mask &= self.timestamp_ns < end_ns
+        return self.take(np.flatnonzero(mask))
+
+    def expiry_days(self) -> np.ndarray:
+        """Expiries as int32 days since 1970-01-01 (`NO_DAY` when missing or unparsed).
+
+        Tables fresh from the parser carry them already; otherwise parsed expiries are
+        normalized to YYYY-MM-DD, so only the dictionary is read.
+        """
+        if self.expiry_day is not None:
+            return self.expiry_day
+        lookup = np.array([day_number(v) for v in self.expiry.values] + [NO_DAY], dtype=np.int32)
+        return lookup[self.expiry.codes]
+
+    def is_call(self) -> np.ndarray:
+        return self.option_type.eq("C")
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        cols = []
+        for f in FLOW_FIELDS:
+            col = getattr(self, f)
+            if isinstance(col, DictColumn):
+                cols.append(col.decode().tolist())
+            elif f == "timestamp_ns":
+                cols.append([None if v == NAT else v for v in col.tolist()])
+            else:
+                cols.append([None if v != v else v for v in col.tolist()])
+        return [dict(zip(FLOW_FIELDS, values)) for values in zip(*cols)]
+
+    def to_flow_table(self) -> FlowTable:
+        return FlowTable(rows=FLOW_ROWS.validate_python(self.to_records()), provider=self.provider)
+
+
+def day_number(value: str) -> int:
+    try:
+        return date.fromisoformat(value).toordinal() - EPOCH_DAY
+    except ValueError:
+        return NO_DAY
+
+
+def _ns_array(values: Iterable[Optional[int]]) -> np.ndarray:
+    return np.array([NAT if v is None else v for v in values], dtype=np.int64)
+
+
+def as_columnar(flow) -> ColumnarFlowTable:
+    if isinstance(flow, ColumnarFlowTable):
+        return flow
+    return ColumnarFlowTable.from_flow_table(flow)
@@ -0,0 +1,104 @@
+from __future__ import annotations
+import gzip
+import io
+import zipfile
+import zlib
+from typing import BinaryIO, Optional, Tuple
+
+
+GZIP_CONTENT_TYPES = {"application/gzip", "application/x-gzip"}
+ZSTD_CONTENT_TYPES = {"application/zstd", "application/x-zstd"}
+ZIP_CONTENT_TYPES = {"application/zip", "application/x-zip-compressed"}
+COMPRESSED_CONTENT_TYPES = GZIP_CONTENT_TYPES | ZSTD_CONTENT_TYPES | ZIP_CONTENT_TYPES
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+ZIP_MAGIC = b"PK\x03\x04"
+
+
+class DecompressedTooLarge(Exception):
+    pass
+
+
+class UnreadableArchive(ValueError):
+    """A compressed upload that is corrupt, truncated or not the archive it claims to be."""
+
+
+# what the decoders raise for bad input; zstandard.ZstdError is added when zstd is used
+ARCHIVE_ERRORS = (OSError, EOFError, zlib.error, zipfile.BadZipFile)
+
+
+def detect_compression(content_type: Optional[str], head: bytes = b"") -> Optional[str]:
+    ct = (content_type or "").lower()
+    if ct in GZIP_CONTENT_TYPES or head.startswith(GZIP_MAGIC):
+        return "gzip"
+    if ct in ZSTD_CONTENT_TYPES or head.startswith(ZSTD_MAGIC):
+        return "zstd"
+    # no magic sniffing for zip: .xlsx workbooks are zip archives too
+    if ct in ZIP_CONTENT_TYPES:
+        return "zip"
+    return None
+
+
+class LimitedReader(io.RawIOBase):
+    """Read-through wrapper that raises once more than `max_bytes` have been produced."""
+
+    def __init__(self, raw: BinaryIO, max_bytes: int, errors: Tuple[type, ...] = ARCHIVE_ERRORS):
+        self.raw = raw
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+        self.errors = errors
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        try:
+            data = self.raw.read(len(b))
+        except self.errors as e:
+            raise UnreadableArchive(f"corrupt or truncated archive: {e}") from e
+        n = len(data)
+        self.bytes_read += n
+        if self.max_bytes > 0 and self.bytes_read > self.max_bytes:
+            raise DecompressedTooLarge(f"decompressed size exceeds {self.max_bytes} bytes")
+        b[:n] = data
+        return n
+
+    def close(self) -> None:
+        try:
+            self.raw.close()
+        finally:
+            super().close()
+
+
+def open_decompressed(fileobj: BinaryIO, kind: str, max_bytes: int) -> io.BufferedReader:
+    """Wrap a (seekable) compressed file in a streaming, size-capped reader.
+
+    Bad input raises `UnreadableArchive`, here or on a later read.
+    """
+    errors = ARCHIVE_ERRORS
+    if kind == "gzip":
+        raw: BinaryIO = gzip.GzipFile(fileobj=fileobj, mode="rb")
+    elif kind == "zstd":
+        import zstandard
+
+        errors += (zstandard.ZstdError,)
+        raw = zstandard.ZstdDecompressor().stream_reader(fileobj, read_across_frames=True)
+    elif kind == "zip":
+        try:
+            archive = zipfile.ZipFile(fileobj)
+        except zipfile.BadZipFile as e:
+            raise UnreadableArchive(f"not a zip archive: {e}") from e
+        members = [m for m in archive.infolist() if not m.is_dir()]
+        if len(members) != 1:
+            raise UnreadableArchive("zip uploads must contain exactly one file")
+        # reject on the declared size up front; LimitedReader covers archives that lie
+        if max_bytes > 0 and members[0].file_size > max_bytes:
+            raise DecompressedTooLarge(f"decompressed size exceeds {max_bytes} bytes")
+        try:
+            raw = archive.open(members[0])
+        except ARCHIVE_ERRORS + (RuntimeError, NotImplementedError) as e:  # encrypted, unsupported method
+            raise UnreadableArchive(f"cannot open zip member: {e}") from e
+    else:
+        raise ValueError(f"unsupported compression: {kind}")
+    return io.BufferedReader(LimitedReader(raw, max_bytes, errors), buffer_size=1024 * 1024)
@@ -0,0 +1,502 @@
+from __future__ import annotations
+import statistics
+import threading
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo
+import numpy as np
+from ..core.config import settings
+from ..core.lazy import LazyModule
+from .columnar import EPOCH_DAY, NAT, NO_DAY
+
+
+# time-only formats are anchored to the session date
+TIME_FORMATS = ["%H:%M", "%H:%M:%S", "%H:%M:%S.%f", "%I:%M %p", "%I:%M:%S %p", "%I:%M%p"]
+DATETIME_FORMATS = [
+    "ISO8601",
+    "%m/%d/%Y %H:%M:%S",
+    "%m/%d/%Y %H:%M",
+    "%m/%d/%Y %I:%M:%S %p",
+    "%m/%d/%Y %I:%M %p",
+    "%m/%d/%y %H:%M:%S",
+    "%m/%d/%y %H:%M",
+    "%d-%b-%Y %H:%M:%S",
+    "%b %d %Y %H:%M:%S",
+]
+EPOCH_FORMATS = ["epoch_s", "epoch_ms", "epoch_us", "epoch_ns"]
+# "2/4/26", "Feb 04 2026", "2026-02-04", 20260204, ...
+EXPIRY_FORMATS = [
+    "%Y-%m-%d",
+    "%m/%d/%Y",
+    "%m/%d/%y",
+    "%Y%m%d",
+    "%Y/%m/%d",
+    "%m-%d-%Y",
+    "%b %d %Y",
+    "%b %d, %Y",
+    "%B %d %Y",
+    "%B %d, %Y",
+    "%d %b %Y",
+    "%d-%b-%Y",
+    "%d-%b-%y",
+    "%Y-%m-%d %H:%M:%S",
+    "%m/%d/%Y %H:%M:%S",
+]
+SAMPLE_SIZE = 64
+NULL_TOKENS = {"", "nan", "none", "nat"}
+UTC_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+pd = LazyModule("pandas")
+
+
+class FormatCache:
+    """Detected format per provider; callers re-check a cached format on a small sample.
+
+    Also holds expiry formats and sniffed CSV dialects (see `dialects.py`).
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._formats: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, provider: Optional[str]) -> Optional[Any]:
+        with self._lock:
+            return self._formats.get((provider or "").lower())
+
+    def put(self, provider: Optional[str], fmt: Any) -> None:
+        with self._lock:
+            self._formats[(provider or "").lower()] = fmt
+
+    def record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._formats.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._formats)}
+
+
+timestamp_formats = FormatCache()
+expiry_formats = FormatCache()
+
+
+def _sample(col: pd.Series) -> pd.Series:
+    values = col.dropna()
+    if values.dtype == object:
+        values = values.astype(str).str.strip()
+        values = values[~values.str.lower().isin(NULL_TOKENS)]
+    return values.drop_duplicates().head(SAMPLE_SIZE)
+
+
+def _epoch_unit(values: pd.Series) -> Optional[str]:
+    numeric = pd.to_numeric(values, errors="coerce")
+    if numeric.isna().any() or not len(numeric):
+        return None
+    magnitude = float(numeric.abs().median())
+    if magnitude >= 1e17:
+        return "epoch_ns"
+    if magnitude >= 1e14:
+        return "epoch_us"
+    if magnitude >= 1e11:
+        return "epoch_ms"
+    if magnitude >= 1e8:
+        return "epoch_s"
+    return None
+
+
+def _parses(values: pd.Series, fmt: str) -> bool:
+    if fmt in EPOCH_FORMATS:
+        return _epoch_unit(values) == fmt
+    try:
+        parsed = pd.to_datetime(values, format=fmt, errors="coerce", utc=fmt == "ISO8601")
+    except (ValueError, TypeError):
+        return False
+    return bool(parsed.notna().all())
+
+
+def detect_timestamp_format(col: pd.Series) -> Optional[str]:
+    sample = _sample(col)
+    if not len(sample):
+        return None
+    if pd.api.types.is_datetime64_any_dtype(sample):
+        return "datetime64"
+    epoch = _epoch_unit(sample)
+    if epoch:
+        return epoch
+    for fmt in TIME_FORMATS + DATETIME_FORMATS:
+        if _parses(sample, fmt):
+            return fmt
+    return None
+
+
+def session_day(session_date: Optional[str], tz: str) -> date:
+    """The day time-only timestamps fall on: `session_date` (ISO `YYYY-MM-DD`, checked by the API)
+    or today in `tz`. Both parse paths go through here so they accept the same dates."""
+    return date.fromisoformat(session_date) if session_date else datetime.now(ZoneInfo(tz)).date()
+
+
+def _session_midnight(session_date: Optional[str], tz: str) -> pd.Timestamp:
+    return pd.Timestamp(session_day(session_date, tz))
+
+
+def _to_utc_ns(parsed: pd.Series, tz: str) -> np.ndarray:
+    if parsed.dt.tz is None:
+        parsed = parsed.dt.tz_localize(tz, ambiguous="NaT", nonexistent="NaT")
+    utc = parsed.dt.tz_convert("UTC").dt.tz_localize(None)
+    out = utc.to_numpy(dtype="datetime64[ns]").view(np.int64).copy()
+    out[utc.isna().to_numpy()] = NAT
+    return out
+
+
+def to_epoch_ns(col: pd.Series, fmt: str, session_date: Optional[str] = None) -> np.ndarray:
+    """Convert a whole timestamp column to int64 UTC epoch nanoseconds (`NAT` when missing).
+
+    Naive values are taken to be in `settings.market_timezone`; time-only values are
+    placed on `session_date` (today in the market timezone when not given).
+    """
+    # a tz name rather than a ZoneInfo keeps pandas on its vectorized tz path
+    tz = settings.market_timezone
+    if fmt in EPOCH_FORMATS:
+        scale = {"epoch_s": 10**9, "epoch_ms": 10**6, "epoch_us": 10**3, "epoch_ns": 1}[fmt]
+        numeric = pd.to_numeric(col, errors="coerce")
+        if pd.api.types.is_integer_dtype(numeric):
+            return numeric.to_numpy(dtype=np.int64) * scale
+        values = numeric.to_numpy(dtype=np.float64)
+        out = np.full(len(col), NAT, dtype=np.int64)
+        ok = ~np.isnan(values)
+        out[ok] = np.round(values[ok] * scale).astype(np.int64)
+        return out
+    if fmt == "datetime64":
+        return _to_utc_ns(pd.Series(pd.to_datetime(col, errors="coerce"), index=col.index), tz)
+
+    text = col.astype(str).str.strip()
+    if fmt == "ISO8601":
+        # offsets may be present on some rows only; naive rows are market-local
+        out = np.full(len(col), NAT, dtype=np.int64)
+        aware = text.str.contains(r"(?:Z|[+-]\d{2}:?\d{2})$", regex=True).to_numpy()
+        if aware.any():
+            out[aware] = _to_utc_ns(pd.to_datetime(text[aware], format=fmt, errors="coerce", utc=True), tz)
+        if (~aware).any():
+            out[~aware] = _to_utc_ns(pd.to_datetime(text[~aware], format=fmt, errors="coerce"), tz)
+        return out
+
+    parsed = pd.to_datetime(text, format=fmt, errors="coerce")
+    if fmt in TIME_FORMATS:
+        parsed = _session_midnight(session_date, tz) + (parsed - pd.Timestamp("1900-01-01"))
+    return _to_utc_ns(parsed, tz)
+
+
+def _still_matches(col: pd.Series, fmt: str) -> bool:
+    if fmt == "datetime64":
+        return pd.api.types.is_datetime64_any_dtype(col)
+    sample = _sample(col).head(8)
+    return not len(sample) or _parses(sample, fmt)
+
+
+def normalize_timestamps(
+    col: pd.Series,
+    provider: Optional[str] = None,
+    session_date: Optional[str] = None,
+    cache: FormatCache = timestamp_formats,
+) -> np.ndarray:
+    fmt = cache.get(provider)
+    if fmt is not None and _still_matches(col, fmt):
+        cache.record(True)
+    else:
+        cache.record(False)
+        fmt = detect_timestamp_format(col)
+        if fmt is None:
+            return np.full(len(col), NAT, dtype=np.int64)
+        cache.put(provider, fmt)
+    if col.dtype != object:
+        return to_epoch_ns(col, fmt, session_date)
+    # prints share timestamps heavily; convert each distinct string once
+    codes, uniques = pd.factorize(col)
+    converted = np.append(to_epoch_ns(pd.Series(uniques, dtype=object), fmt, session_date), NAT)
+    return converted[codes]
+
+
+def _expiry_text(col: pd.Series) -> pd.Series:
+    if pd.api.types.is_numeric_dtype(col) and not pd.api.types.is_bool_dtype(col):
+        # YYYYMMDD expiries read as numbers (floats once a cell is empty)
+        out = pd.Series(None, index=col.index, dtype=object)
+        ok = col.notna()
+        out[ok] = col[ok].astype(np.int64).astype(str)
+        return out
+    return col
+
+
+def detect_expiry_format(col: pd.Series) -> Optional[str]:
+    """First format that reads the whole sample, else the one that reads most of it."""
+    sample = _sample(col)
+    if not len(sample):
+        return None
+    if pd.api.types.is_datetime64_any_dtype(sample):
+        return "datetime64"
+    best, best_hits = None, 0
+    for fmt in EXPIRY_FORMATS:
+        hits = int(pd.to_datetime(sample, format=fmt, errors="coerce").notna().sum())
+        if hits == len(sample):
+            return fmt
+        if hits > best_hits:
+            best, best_hits = fmt, hits
+    return best
+
+
+def _expiry_still_matches(col: pd.Series, fmt: str) -> bool:
+    # detection settles for the format that reads most of the sample, so a stray "weekly"
+    # or typo must not send every later chunk back through it
+    if fmt == "datetime64":
+        return pd.api.types.is_datetime64_any_dtype(col)
+    sample = _sample(col).head(8)
+    if not len(sample):
+        return True
+    try:
+        hits = int(pd.to_datetime(sample, format=fmt, errors="coerce").notna().sum())
+    except (ValueError, TypeError):
+        return False
+    return 2 * hits > len(sample)
+
+
+def iso_days(text: pd.Series) -> np.ndarray:
+    """YYYY-MM-DD strings as int32 days since 1970-01-01 (`NO_DAY` when unreadable)."""
+    parsed = pd.to_datetime(text, format="%Y-%m-%d", errors="coerce")
+    ok = parsed.notna().to_numpy()
+    days = np.full(len(text), NO_DAY, dtype=np.int32)
+    days[ok] = parsed[ok].to_numpy().astype("datetime64[D]").astype(np.int64)
+    return days
+
+
+def normalize_expiries(
+    col: pd.Series, provider: Optional[str] = None, cache: FormatCache = expiry_formats
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Expiry column as (YYYY-MM-DD text, int32 days since 1970-01-01).
+
+    Values the detected format cannot read keep their stripped text and get
+    `NO_DAY`; missing values are None. Each distinct value is converted once.
+    """
+    col = _expiry_text(col)
+    fmt = cache.get(provider)
+    if fmt is not None and _expiry_still_matches(col, fmt):
+        cache.record(True)
+    else:
+        cache.record(False)
+        fmt = detect_expiry_format(col)
+        if fmt is not None:
+            cache.put(provider, fmt)
+    codes, uniques = pd.factorize(col)
+    if fmt == "datetime64":
+        parsed = pd.Series(pd.to_datetime(uniques))
+        text = pd.Series(parsed.astype(str), dtype=object)
+    else:
+        text = pd.Series(uniques, dtype=object).astype(str).str.strip()
+        parsed = pd.to_datetime(text, format=fmt, errors="coerce") if fmt else pd.Series(pd.NaT, index=text.index)
+    ok = parsed.notna().to_numpy()
+    days = np.full(len(uniques) + 1, NO_DAY, dtype=np.int32)
+    days[:-1][ok] = parsed[ok].to_numpy().astype("datetime64[D]").astype(np.int64)
+    labels = np.append(np.where(ok, parsed.dt.strftime("%Y-%m-%d").to_numpy(dtype=object), text.to_numpy()), None)
+    return labels[codes], days[codes]
+
+
+# Pure-Python counterparts of the functions above for the small-file CSV path, which
+# runs without pandas. Values are what `pd.read_csv` would have produced for the
+# column: int/float for numeric columns, str or None otherwise.
+
+
+def _sample_values(values: Sequence[object]) -> List[object]:
+    seen: Dict[object, None] = {}
+    for v in values:
+        if v is None or v != v:
+            continue
+        if isinstance(v, str):
+            v = v.strip()
+            if v.lower() in NULL_TOKENS:
+                continue
+        seen.setdefault(v, None)
+        if len(seen) >= SAMPLE_SIZE:
+            break
+    return list(seen)
+
+
+def _number(v: object) -> Optional[float]:
+    if isinstance(v, (int, float)) and not isinstance(v, bool):
+        return v
+    try:
+        return int(v)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return None
+
+
+def _epoch_unit_values(values: Sequence[object]) -> Optional[str]:
+    numbers = [_number(v) for v in values]
+    if not numbers or any(n is None or n != n for n in numbers):
+        return None
+    magnitude = float(statistics.median(abs(n) for n in numbers))
+    for unit, floor in (("epoch_ns", 1e17), ("epoch_us", 1e14), ("epoch_ms", 1e11), ("epoch_s", 1e8)):
+        if magnitude >= floor:
+            return unit
+    return None
+
+
+def _parse_text(text: str, fmt: str) -> Optional[datetime]:
+    try:
+        if fmt == "ISO8601":
+            return datetime.fromisoformat(text)
+        return datetime.strptime(text, fmt)
+    except ValueError:
+        return None
+
+
+def _parses_values(values: Sequence[object], fmt: str) -> bool:
+    if fmt in EPOCH_FORMATS:
+        return _epoch_unit_values(values) == fmt
+    return all(_parse_text(str(v), fmt) is not None for v in values)
+
+
+def detect_timestamp_format_values(values: Sequence[object]) -> Optional[str]:
+    sample = _sample_values(values)
+    if not sample:
+        return None
+    epoch = _epoch_unit_values(sample)
+    if epoch:
+        return epoch
+    for fmt in TIME_FORMATS + DATETIME_FORMATS:
+        if _parses_values(sample, fmt):
+            return fmt
+    return None
+
+
+def _aware_ns(dt: datetime) -> int:
+    delta = dt - UTC_EPOCH
+    return (delta.days * 86_400 + delta.seconds) * 10**9 + delta.microseconds * 1_000
+
+
+def _local_ns(dt: datetime, zone: ZoneInfo) -> int:
+    local = dt.replace(tzinfo=zone)
+    # ambiguous (fall back) and nonexistent (spring forward) wall times become NAT,
+    # like tz_localize(ambiguous="NaT", nonexistent="NaT")
+    if local.utcoffset() != dt.replace(tzinfo=zone, fold=1).utcoffset():
+        return NAT
+    return _aware_ns(local)
+
+
+def _value_to_epoch_ns(value: object, fmt: str, day: Optional[date], zone: ZoneInfo) -> int:
+    if value is None or value != value:
+        return NAT
+    if fmt in EPOCH_FORMATS:
+        scale = {"epoch_s": 10**9, "epoch_ms": 10**6, "epoch_us": 10**3, "epoch_ns": 1}[fmt]
+        n = _number(value)
+        if n is None or n != n:
+            return NAT
+        return n * scale if isinstance(n, int) else int(round(n * scale))
+    parsed = _parse_text(str(value).strip(), fmt)
+    if parsed is None:
+        return NAT
+    if fmt in TIME_FORMATS:
+        parsed = datetime.combine(day, parsed.time())
+    if parsed.tzinfo is not None:
+        return _aware_ns(parsed)
+    return _local_ns(parsed, zone)
+
+
+def to_epoch_ns_values(values: Sequence[object], fmt: str, session_date: Optional[str] = None) -> List[int]:
+    """List counterpart of `to_epoch_ns`; each distinct value is converted once."""
+    zone = ZoneInfo(settings.market_timezone)
+    day = None
+    if fmt in TIME_FORMATS:
+        day = session_day(session_date, settings.market_timezone)
+    converted: Dict[object, int] = {}
+    out: List[int] = []
+    for v in values:
+        key = (type(v), v)
+        ns = converted.get(key)
+        if ns is None:
+            ns = converted[key] = _value_to_epoch_ns(v, fmt, day, zone)
+        out.append(ns)
+    return out
+
+
+def normalize_timestamp_values(
+    values: Sequence[object],
+    provider: Optional[str] = None,
+    session_date: Optional[str] = None,
+    cache: FormatCache = timestamp_formats,
+) -> List[int]:
+    fmt = cache.get(provider)
+    sample = _sample_values(values)[:8]
+    if fmt is not None and fmt != "datetime64" and (not sample or _parses_values(sample, fmt)):
+        cache.record(True)
+    else:
+        cache.record(False)
+        fmt = detect_timestamp_format_values(values)
+        if fmt is None:
+            return [NAT] * len(values)
+        cache.put(provider, fmt)
+    return to_epoch_ns_values(values, fmt, session_date)
+
+
+def _expiry_value_text(v: object) -> Optional[str]:
+    if v is None or v != v:
+        return None
+    if isinstance(v, float):
+        return str(int(v))
+    return str(v).strip()
+
+
+def _parse_expiry(text: str, fmt: Optional[str]) -> Optional[datetime]:
+    return _parse_text(text, fmt) if fmt else None
+
+
+def normalize_expiry_values(
+    values: Sequence[object], provider: Optional[str] = None, cache: FormatCache = expiry_formats
+) -> Tuple[List[Optional[str]], List[int]]:
+    """List counterpart of `normalize_expiries`."""
+    texts = [_expiry_value_text(v) for v in values]
+    fmt = cache.get(provider)
+    sample = _sample_values(texts)
+    head = sample[:8]
+    # as in `_expiry_still_matches`: the cached format only has to read most of the sample
+    if fmt is not None and (not head or 2 * sum(_parse_expiry(str(v), fmt) is not None for v in head) > len(head)):
+        cache.record(True)
+    else:
+        cache.record(False)
+        best, best_hits = None, 0
+        for candidate in EXPIRY_FORMATS:
+            hits = sum(_parse_expiry(str(v), candidate) is not None for v in sample)
+            if hits > best_hits:
+                best, best_hits = candidate, hits
+            if sample and hits == len(sample):
+                break
+        fmt = best
+        if fmt is not None:
+            cache.put(provider, fmt)
+    converted: Dict[Optional[str], Tuple[Optional[str], int]] = {None: (None, NO_DAY)}
+    labels: List[Optional[str]] = []
+    days: List[int] = []
+    for text in texts:
+        hit = converted.get(text)
+        if hit is None:
+            parsed = _parse_expiry(text, fmt)
+            if parsed is None:
+                hit = (text, NO_DAY)
+            else:
+                hit = (parsed.strftime("%Y-%m-%d"), parsed.toordinal() - EPOCH_DAY)
+            converted[text] = hit
+        labels.append(hit[0])
+        days.append(hit[1])
+    return labels, days
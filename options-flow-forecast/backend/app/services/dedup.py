@@ -0,0 +1,84 @@
+import hashlib
+from datetime import datetime
+from typing import Any, Dict, Optional
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import Session, func, select
+from ..models import Blob, ParsedUpload, Upload
+from .storage import StoredBlob
+
+
+def parse_key(
+    digest: str, content_type: Optional[str], provider: Optional[str] = None, session_date: Optional[str] = None
+) -> str:
+    """Cache key for a parse: the same bytes can parse differently per content type, provider and date."""
+    raw = "\0".join([digest, (content_type or "").lower(), provider or "", session_date or ""])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def cached_parse(session: Session, key: Optional[str]) -> Optional[ParsedUpload]:
+    return session.get(ParsedUpload, key) if key else None
+
+
+def cached_row_count(session: Session, key: str) -> Optional[int]:
+    # ingest only needs the count, not the (possibly large) parsed table
+    return session.exec(select(ParsedUpload.row_count).where(ParsedUpload.key == key)).first()
+
+
+def raw_evicted(session: Session, digest: Optional[str]) -> bool:
+    blob = session.get(Blob, digest) if digest else None
+    return blob is not None and blob.evicted_at is not None
+
+
+def _insert(session: Session, model):
+    # both supported backends have INSERT ... ON CONFLICT, under dialect-specific constructs
+    dialect = postgresql if session.get_bind().dialect.name == "postgresql" else sqlite
+    return dialect.insert(model)
+
+
+def store_parse(session: Session, parsed: ParsedUpload) -> bool:
+    """Insert `parsed`; False when a concurrent upload of the same content stored it first."""
+    stmt = _insert(session, ParsedUpload).values(**parsed.model_dump())
+    return session.execute(stmt.on_conflict_do_nothing(index_elements=["key"])).rowcount == 1
+
+
+def register_blob(session: Session, stored: StoredBlob) -> Blob:
+    """Count one more upload of `stored`'s bytes; an upsert, so concurrent first uploads both count.
+
+    When the retention job evicted the bytes after `stored` found them in storage, the
+    returned blob still has `evicted_at` set: the caller writes them again and calls `restore_blob`.
+    """
+    now = datetime.utcnow()
+    stmt = _insert(session, Blob).values(
+        digest=stored.digest, storage_path=stored.path, size=stored.size, ref_count=1, created_at=now, last_used_at=now
+    )
+    refreshed: Dict[str, Any] = {"ref_count": Blob.ref_count + 1, "last_used_at": now}
+    if not stored.duplicate:
+        # the bytes were just written, so an evicted raw file is back
+        refreshed.update(storage_path=stmt.excluded.storage_path, evicted_at=None)
+    session.execute(stmt.on_conflict_do_update(index_elements=["digest"], set_=refreshed))
+    return session.exec(
+        select(Blob).where(Blob.digest == stored.digest).execution_options(populate_existing=True)
+    ).one()
+
+
+def restore_blob(session: Session, stored: StoredBlob) -> Blob:
+    blob = session.get(Blob, stored.digest)
+    blob.storage_path, blob.evicted_at = stored.path, None
+    session.add(blob)
+    return blob
+
+
+def storage_stats(session: Session) -> Dict[str, Any]:
+    logical = session.exec(select(func.coalesce(func.sum(Blob.size * Blob.ref_count), 0))).one()
+    blobs, physical = session.exec(
+        select(func.count(), func.coalesce(func.sum(Blob.size), 0)).where(Blob.evicted_at.is_(None))
+    ).one()
+    uploads = session.exec(select(func.count()).select_from(Upload).where(Upload.digest.is_not(None))).one()
+    return {
+        "uploads": uploads,
+        "blobs": blobs,
+        "logical_bytes": logical,
+        "physical_bytes": physical,
+        "dedup_ratio": logical / physical if physical else 1.0,
+        "parsed_tables": session.exec(select(func.count()).select_from(ParsedUpload)).one(),
+    }
@@ -0,0 +1,138 @@
+from __future__ import annotations
+import codecs
+import csv
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from .datetimes import FormatCache
+from .mappings import detect_mapping
+
+
+SNIFF_BYTES = 16 * 1024
+SNIFF_LINES = 50
+HEADER_SCAN_ROWS = 20
+DELIMITERS = [",", "\t", ";", "|"]
+# UTF-32 LE starts with the UTF-16 LE mark, so it is checked first
+BOMS = [
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+# encodings in which b"\n" only ever means a newline, so files can be split on raw bytes
+BYTE_SPLITTABLE = {"utf-8", "utf-8-sig", "cp1252", "latin-1"}
+SINGLE_QUOTED = re.compile(r"(?:^|[,;\t|])'[^'\n]*'(?:[,;\t|]|$)", re.M)
+
+
+@dataclass(frozen=True)
+class CsvDialect:
+    encoding: str = "utf-8"
+    delimiter: str = ","
+    quotechar: str = '"'
+    header_row: int = 0  # lines above the header (export titles, blank lines)
+
+    def read_csv_kwargs(self) -> Dict[str, Any]:
+        return {"encoding": self.encoding, "sep": self.delimiter, "quotechar": self.quotechar, "skiprows": self.header_row}
+
+
+DEFAULT_DIALECT = CsvDialect()
+dialects = FormatCache()
+
+
+def _decode(head: bytes, encoding: str) -> Optional[str]:
+    # an incremental decoder tolerates a multi-byte character cut off at the end of the sample
+    try:
+        return codecs.getincrementaldecoder(encoding)().decode(head, final=False)
+    except UnicodeDecodeError:
+        return None
+
+
+def detect_encoding(head: bytes) -> str:
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding
+    sample = head[:4096]
+    if sample and sample.count(0) > len(sample) // 4:
+        # BOM-less UTF-16: ASCII text has a NUL in every other byte
+        return "utf-16-le" if sample[1::2].count(0) > sample[::2].count(0) else "utf-16-be"
+    if _decode(head, "utf-8") is not None:
+        return "utf-8"
+    if _decode(head, "cp1252") is not None:
+        return "cp1252"
+    return "latin-1"
+
+
+def _lines(head: bytes, encoding: str) -> Optional[List[str]]:
+    text = _decode(head, encoding)
+    if text is None:
+        return None
+    lines = text.lstrip("\ufeff").split("\n")
+    if len(head) >= SNIFF_BYTES and len(lines) > 1:
+        lines = lines[:-1]  # the sample most likely ends mid-line
+    return [line.rstrip("\r") for line in lines[:SNIFF_LINES]]
+
+
+def _fields(line: str, delimiter: str, quotechar: str) -> List[str]:
+    return next(csv.reader([line], delimiter=delimiter, quotechar=quotechar), [])
+
+
+def _sniff_quotechar(lines: List[str]) -> str:
+    text = "\n".join(lines)
+    return "'" if '"' not in text and SINGLE_QUOTED.search(text) else '"'
+
+
+def _sniff_delimiter(lines: List[str], quotechar: str) -> str:
+    # the delimiter that splits the most lines into the same (> 1) number of fields
+    best, best_score = ",", (0, 0)
+    for delimiter in DELIMITERS:
+        counts = [len(_fields(line, delimiter, quotechar)) for line in lines if line.strip()]
+        if not counts:
+            continue
+        width = max(set(counts), key=lambda c: (counts.count(c), c))
+        if width < 2:
+            continue
+        score = (counts.count(width), width)
+        if score > best_score:
+            best, best_score = delimiter, score
+    return best
+
+
+def _sniff_header_row(lines: List[str], delimiter: str, quotechar: str) -> int:
+    for i, line in enumerate(lines[:HEADER_SCAN_ROWS]):
+        if detect_mapping(_fields(line, delimiter, quotechar)):
+            return i
+    return 0
+
+
+def sniff_csv(head: bytes) -> CsvDialect:
+    encoding = detect_encoding(head)
+    lines = _lines(head, encoding) or []
+    quotechar = _sniff_quotechar(lines)
+    delimiter = _sniff_delimiter(lines, quotechar)
+    return CsvDialect(encoding, delimiter, quotechar, _sniff_header_row(lines, delimiter, quotechar))
+
+
+def _still_matches(head: bytes, dialect: CsvDialect) -> bool:
+    if detect_encoding(head) != dialect.encoding:
+        return False
+    lines = _lines(head, dialect.encoding)
+    if not lines or len(lines) <= dialect.header_row or _sniff_quotechar(lines) != dialect.quotechar:
+        return False
+    header = _fields(lines[dialect.header_row], dialect.delimiter, dialect.quotechar)
+    if len(header) < 2:
+        return False
+    # an offset learned from a titled export must still land on a recognizable header
+    return dialect.header_row == 0 or bool(detect_mapping(header))
+
+
+def sniff_dialect(head: bytes, provider: Optional[str] = None, cache: FormatCache = dialects) -> CsvDialect:
+    """Dialect for a CSV from its first `SNIFF_BYTES`, reusing the provider's last one when it still fits."""
+    cached = cache.get(provider)
+    if cached is not None and _still_matches(head, cached):
+        cache.record(True)
+        return cached
+    cache.record(False)
+    dialect = sniff_csv(head)
+    cache.put(provider, dialect)
+    return dialect
@@ -1,69 +1,67 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple, Union
+import numpy as np
 from ..schemas import FlowTable, EngineeredFeatures
+from .columnar import ColumnarFlowTable, as_columnar
 
 
-def _premium_signed(row) -> float:
-    premium = row.premium or 0.0
-    side = (row.side or "UNKNOWN").upper()
-    if side == "ASK":
-        return premium
-    if side == "BID":
-        return -premium
-    return 0.0
+def _premium_signed(table: ColumnarFlowTable) -> np.ndarray:
+    premium = np.nan_to_num(table.premium, nan=0.0)
+    return np.where(table.side.eq("ASK"), premium, np.where(table.side.eq("BID"), -premium, 0.0))
 
 
-def compute_features(flow: FlowTable) -> EngineeredFeatures:
-    rows = flow.rows
-    call_rows = [r for r in rows if r.option_type == "C"]
-    put_rows = [r for r in rows if r.option_type == "P"]
+def premium_by_strike(table: ColumnarFlowTable) -> List[Tuple[float, float]]:
+    """Total premium per strike, ordered by first appearance of the strike."""
+    if not len(table):
+        return []
+    strikes, first_idx, inverse = np.unique(table.strike, return_index=True, return_inverse=True)
+    totals = np.bincount(inverse, weights=np.nan_to_num(table.premium, nan=0.0), minlength=len(strikes))
+    order = np.argsort(first_idx, kind="stable")
+    return list(zip(strikes[order].tolist(), totals[order].tolist()))
 
-    net_call = sum(_premium_signed(r) for r in call_rows)
-    net_put = sum(_premium_signed(r) for r in put_rows)
 
-    total_call_prem = sum((r.premium or 0.0) for r in call_rows)
-    total_put_prem = sum((r.premium or 0.0) for r in put_rows)
+def compute_features(flow: Union[FlowTable, ColumnarFlowTable]) -> EngineeredFeatures:
+    table = as_columnar(flow)
+    premium = np.nan_to_num(table.premium, nan=0.0)
+    is_call = table.is_call()
+    is_put = table.option_type.eq("P")
+    signed = _premium_signed(table)
+
+    net_call = float(signed[is_call].sum())
+    net_put = float(signed[is_put].sum())
+
+    total_call_prem = float(premium[is_call].sum())
+    total_put_prem = float(premium[is_put].sum())
     call_put_ratio = (total_call_prem / total_put_prem) if total_put_prem else 0.0
 
-    ask_prem = sum((r.premium or 0.0) for r in rows if (r.side or "") == "ASK")
-    bid_prem = sum((r.premium or 0.0) for r in rows if (r.side or "") == "BID")
+    ask_prem = float(premium[table.side.eq("ASK")].sum())
+    bid_prem = float(premium[table.side.eq("BID")].sum())
     aggressiveness = (ask_prem - bid_prem) / max(ask_prem + bid_prem, 1e-6)
 
-    by_strike: Dict[float, float] = {}
-    total_premium = 0.0
-    for r in rows:
-        prem = r.premium or 0.0
-        by_strike[r.strike] = by_strike.get(r.strike, 0.0) + prem
-        total_premium += prem
+    by_strike = premium_by_strike(table)
+    total_premium = float(premium.sum())
 
-    top_strikes = sorted(by_strike.items(), key=lambda kv: kv[1], reverse=True)[:8]
+    top_strikes = sorted(by_strike, key=lambda kv: kv[1], reverse=True)[:8]
     top_strikes_by_premium: List[Dict[str, Any]] = [
         {"strike": k, "premium": v} for k, v in top_strikes
     ]
 
     concentration_hhi = 0.0
     if total_premium > 0:
-        for _, v in by_strike.items():
-            share = v / total_premium
-            concentration_hhi += share * share
+        shares = np.array([v for _, v in by_strike]) / total_premium
+        concentration_hhi = float((shares * shares).sum())
 
     # delta notional & skew proxies (optional)
-    delta_notional = 0.0
-    has_delta = False
-    iv_calls = []
-    iv_puts = []
-    for r in rows:
-        if r.delta is not None and r.premium is not None:
-            has_delta = True
-            delta_notional += r.delta * (r.premium or 0.0)
-        if r.iv is not None:
-            if r.option_type == "C":
-                iv_calls.append(r.iv)
-            else:
-                iv_puts.append(r.iv)
+    has_premium_delta = ~np.isnan(table.delta) & ~np.isnan(table.premium)
+    has_delta = bool(has_premium_delta.any())
+    delta_notional = float((table.delta[has_premium_delta] * table.premium[has_premium_delta]).sum())
+
+    has_iv = ~np.isnan(table.iv)
+    iv_calls = table.iv[has_iv & is_call]
+    iv_puts = table.iv[has_iv & ~is_call]
 
     skew_proxy = None
-    if iv_calls and iv_puts:
-        skew_proxy = (sum(iv_puts) / len(iv_puts)) - (sum(iv_calls) / len(iv_calls))
+    if len(iv_calls) and len(iv_puts):
+        skew_proxy = float(iv_puts.mean() - iv_calls.mean())
 
     return EngineeredFeatures(
         net_call_premium=net_call,
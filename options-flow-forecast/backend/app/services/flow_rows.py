@@ -0,0 +1,88 @@
+import csv
+import io
+from typing import Callable, Iterator, List, Optional, Tuple
+import anyio
+import numpy as np
+from sqlalchemy.util import await_only
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from ..core.config import settings
+from ..models import FlowRowRecord
+from .columnar import CATEGORICAL_FIELDS, NAT, NUMERIC_FIELDS, ColumnarFlowTable
+
+ROW_FIELDS = ["symbol", "underlying", "expiry", "strike", "option_type", "side", "price", "size", "premium",
+              "open_interest", "iv", "delta", "timestamp_ns"]
+COLUMNS = ["upload_id", "row_index"] + ROW_FIELDS
+
+
+def iter_row_batches(upload_id: str, table: ColumnarFlowTable, batch_rows: int) -> Iterator[List[Tuple]]:
+    """`FlowRowRecord` tuples in `COLUMNS` order, converted to Python values one batch at a time."""
+    lookups = {f: np.array(getattr(table, f).values + [None], dtype=object) for f in CATEGORICAL_FIELDS}
+    for start in range(0, len(table), batch_rows):
+        stop = min(start + batch_rows, len(table))
+        cols: List[list] = [[upload_id] * (stop - start), list(range(start, stop))]
+        for f in ROW_FIELDS:
+            if f in lookups:
+                cols.append(lookups[f][getattr(table, f).codes[start:stop]].tolist())
+            elif f in NUMERIC_FIELDS:
+                values = getattr(table, f)[start:stop]
+                cols.append(np.where(np.isnan(values), None, values).tolist())
+            else:
+                values = table.timestamp_ns[start:stop]
+                cols.append(np.where(values == NAT, None, values).tolist())
+        yield list(zip(*cols))
+
+
+def _copy_psycopg2(dbapi_conn, table_name: str, batches: Iterator[List[Tuple]]) -> None:
+    sql = f"COPY {table_name} ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+    with dbapi_conn.cursor() as cursor:
+        for batch in batches:
+            buf = io.StringIO()
+            csv.writer(buf).writerows(batch)  # None is written as an empty field, which COPY csv reads as NULL
+            buf.seek(0)
+            cursor.copy_expert(sql, buf)
+
+
+def _batch_writer(conn) -> Callable[[List[Tuple]], None]:
+    table_name = FlowRowRecord.__tablename__
+    driver = conn.dialect.driver
+    dbapi_conn = conn.connection.driver_connection
+    if driver == "psycopg2":
+        return lambda batch: _copy_psycopg2(dbapi_conn, table_name, [batch])
+    if driver == "asyncpg":
+        return lambda batch: await_only(dbapi_conn.copy_records_to_table(table_name, records=batch, columns=COLUMNS))
+    marker = "?" if conn.dialect.paramstyle == "qmark" else "%s"
+    placeholders = ", ".join([marker] * len(COLUMNS))
+    sql = f"INSERT INTO {table_name} ({', '.join(COLUMNS)}) VALUES ({placeholders})"
+    return lambda batch: conn.exec_driver_sql(sql, batch)
+
+
+def insert_flow_rows(session: Session, upload_id: str, table: ColumnarFlowTable, batch_rows: Optional[int] = None) -> int:
+    """Bulk-insert `table` into `FlowRowRecord` within the session's transaction.
+
+    Postgres gets COPY (psycopg2 `copy_expert`, asyncpg `copy_records_to_table`);
+    everything else a multi-row `executemany` per batch.
+    """
+    if not len(table):
+        return 0
+    write = _batch_writer(session.connection())
+    for batch in iter_row_batches(upload_id, table, max(1, int(batch_rows or settings.flow_row_batch))):
+        write(batch)
+    return len(table)
+
+
+def _write_batch(session: Session, batch: List[Tuple]) -> None:
+    _batch_writer(session.connection())(batch)
+
+
+async def insert_flow_rows_async(
+    session: AsyncSession, upload_id: str, table: ColumnarFlowTable, batch_rows: Optional[int] = None
+) -> int:
+    """`insert_flow_rows` for async callers: each batch is converted to Python values on a
+    worker thread, and only the write itself runs on the event loop."""
+    if not len(table):
+        return 0
+    batches = iter_row_batches(upload_id, table, max(1, int(batch_rows or settings.flow_row_batch)))
+    while (batch := await anyio.to_thread.run_sync(next, batches, None)) is not None:
+        await session.run_sync(_write_batch, batch)
+    return len(table)
@@ -0,0 +1,90 @@
+import base64
+import json
+from datetime import date, datetime, time, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import tuple_
+from sqlmodel import Session, select
+from ..models import Analysis, Upload
+
+ANALYSIS_COLUMNS = [Analysis.id, Analysis.symbol, Analysis.date, Analysis.flow_upload_id, Analysis.chart_upload_id,
+                    Analysis.created_at]  # result_json stays out of listings
+UPLOAD_COLUMNS = [Upload.id, Upload.upload_type, Upload.filename, Upload.content_type, Upload.provider, Upload.symbol,
+                  Upload.digest, Upload.created_at]
+Page = Tuple[List[Dict[str, Any]], Optional[str]]
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values: Sequence[str]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(values)).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[str]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError as exc:  # bad base64, bad UTF-8 and bad JSON are all ValueErrors
+        raise InvalidCursor("malformed cursor") from exc
+    if not isinstance(values, list) or len(values) != size or not all(isinstance(v, str) for v in values):
+        raise InvalidCursor("malformed cursor")
+    return values
+
+
+def _page(session: Session, stmt, limit: int, key: Callable[[Dict[str, Any]], Sequence[str]]) -> Page:
+    # one extra row tells whether there is a next page without a COUNT
+    rows = [dict(r._mapping) for r in session.exec(stmt.limit(limit + 1)).all()]
+    next_cursor = encode_cursor(key(rows[limit - 1])) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def list_analyses(
+    session: Session,
+    symbol: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+) -> Page:
+    """Analyses by session date, newest first, paged by (date, id) keyset rather than OFFSET."""
+    stmt = select(*ANALYSIS_COLUMNS)
+    if symbol:
+        stmt = stmt.where(Analysis.symbol == symbol)
+    if date_from:
+        stmt = stmt.where(Analysis.date >= date_from.isoformat())
+    if date_to:
+        stmt = stmt.where(Analysis.date <= date_to.isoformat())
+    if cursor:
+        stmt = stmt.where(tuple_(Analysis.date, Analysis.id) < tuple(decode_cursor(cursor, 2)))
+    stmt = stmt.order_by(Analysis.date.desc(), Analysis.id.desc())
+    return _page(session, stmt, limit, lambda row: (row["date"], row["id"]))
+
+
+def list_uploads(
+    session: Session,
+    upload_type: Optional[str] = None,
+    symbol: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+) -> Page:
+    """Uploads newest first, paged by (created_at, id) keyset; the date range is on created_at (UTC)."""
+    stmt = select(*UPLOAD_COLUMNS)
+    if upload_type:
+        stmt = stmt.where(Upload.upload_type == upload_type)
+    if symbol:
+        stmt = stmt.where(Upload.symbol == symbol)
+    if date_from:
+        stmt = stmt.where(Upload.created_at >= datetime.combine(date_from, time.min))
+    if date_to:
+        stmt = stmt.where(Upload.created_at < datetime.combine(date_to + timedelta(days=1), time.min))
+    if cursor:
+        created_at, upload_id = decode_cursor(cursor, 2)
+        try:
+            after = datetime.fromisoformat(created_at)
+        except ValueError as exc:
+            raise InvalidCursor("malformed cursor") from exc
+        stmt = stmt.where(tuple_(Upload.created_at, Upload.id) < (after, upload_id))
+    stmt = stmt.order_by(Upload.created_at.desc(), Upload.id.desc())
+    return _page(session, stmt, limit, lambda row: (row["created_at"].isoformat(), row["id"]))
@@ -0,0 +1,124 @@
+from __future__ import annotations
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+from ..core.config import settings
+
+
+COLUMN_CANDIDATES = {
+    "symbol": ["symbol", "ticker", "underlying", "root", "stock"],
+    "underlying": ["underlying", "root", "ticker"],
+    "expiry": ["expiry", "expiration", "exp", "expiration_date", "exp_date"],
+    "strike": ["strike", "strike_price", "strikeprice", "k"],
+    "option_type": ["type", "call_put", "cp", "option_type"],
+    "side": ["side", "bidask", "bid_ask", "aggressor", "at", "tick"],
+    "price": ["price", "trade_price", "fill_price", "avg_price"],
+    "size": ["size", "qty", "quantity", "volume", "contracts"],
+    "premium": ["premium", "notional", "value", "amount"],
+    "open_interest": ["oi", "open_interest"],
+    "iv": ["iv", "implied_vol", "implied_volatility"],
+    "delta": ["delta"],
+    "timestamp": ["time", "timestamp", "ts", "date_time"],
+    "occ_symbol": ["occ_symbol", "option_symbol", "osi", "osi_symbol", "occ", "contract"],
+}
+
+
+def detect_mapping(columns: Iterable[object]) -> Dict[str, str]:
+    mapping: Dict[str, str] = {}
+    cols = {str(c).lower().strip(): c for c in columns}
+
+    for key, candidates in COLUMN_CANDIDATES.items():
+        for cand in candidates:
+            if cand in cols:
+                mapping[key] = cols[cand]
+                break
+    return mapping
+
+
+def header_fingerprint(columns: Sequence[object]) -> str:
+    h = hashlib.sha1()
+    for c in columns:
+        h.update(str(c).encode("utf-8"))
+        h.update(b"\x1f")
+    return h.hexdigest()
+
+
+class MappingRegistry:
+    """LRU cache of resolved column mappings keyed by (provider, header fingerprint).
+
+    Per-provider overrides (`{field: column}`) win over detection for the fields
+    they name; the remaining fields are still detected from the header.
+    """
+
+    def __init__(self, max_entries: int = 256, overrides: Optional[Dict[str, Dict[str, str]]] = None):
+        self.max_entries = max(1, int(max_entries))
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, str], Dict[str, str]]" = OrderedDict()
+        self._overrides: Dict[str, Dict[str, str]] = {}
+        self._lock = threading.Lock()
+        for provider, mapping in (overrides or {}).items():
+            self.set_override(provider, mapping)
+
+    def set_override(self, provider: str, mapping: Dict[str, str]) -> None:
+        key = provider.lower()
+        with self._lock:
+            self._overrides[key] = dict(mapping)
+            for entry in [k for k in self._entries if k[0] == key]:
+                del self._entries[entry]
+
+    def recognizes(self, columns: Sequence[object], provider: Optional[str] = None) -> bool:
+        """Whether `resolve` would map any field, without caching or counting the lookup."""
+        if detect_mapping(columns):
+            return True
+        names = {str(c).lower().strip() for c in columns}
+        with self._lock:
+            override = self._overrides.get((provider or "").lower(), {})
+        return any(str(column).lower().strip() in names for column in override.values())
+
+    def resolve(self, columns: Sequence[object], provider: Optional[str] = None) -> Dict[str, str]:
+        columns = list(columns)
+        key = ((provider or "").lower(), header_fingerprint(columns))
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return dict(cached)
+            self.misses += 1
+            override = self._overrides.get(key[0], {})
+
+        mapping = detect_mapping(columns)
+        by_name = {str(c).lower().strip(): c for c in columns}
+        for field, column in override.items():
+            if column in columns:
+                mapping[field] = column
+            elif str(column).lower().strip() in by_name:
+                mapping[field] = by_name[str(column).lower().strip()]
+
+        with self._lock:
+            self._entries[key] = mapping
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return dict(mapping)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "max_entries": self.max_entries}
+
+
+def _load_overrides(raw: str) -> Dict[str, Dict[str, str]]:
+    # the shape is checked when settings load
+    return json.loads(raw) if raw else {}
+
+
+mapping_registry = MappingRegistry(settings.mapping_cache_size, _load_overrides(settings.provider_mapping_overrides))
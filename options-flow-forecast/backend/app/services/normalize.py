@@ -0,0 +1,53 @@
+# cell and header normalization shared by the pandas parser and the stdlib small-CSV path
+from typing import Dict, List, Optional, Sequence
+
+
+def to_float(val: object) -> Optional[float]:
+    if val is None:
+        return None
+    s = str(val).strip()
+    if s == "" or s.lower() in {"nan", "none"}:
+        return None
+    s = s.replace(",", "").replace("$", "").replace("%", "")
+    try:
+        return float(s)
+    except ValueError:
+        return None
+
+
+def normalize_side(val: object) -> str:
+    if val is None:
+        return "UNKNOWN"
+    s = str(val).lower()
+    if "ask" in s or "offer" in s:
+        return "ASK"
+    if "bid" in s:
+        return "BID"
+    if "mid" in s or "between" in s:
+        return "MID"
+    return "UNKNOWN"
+
+
+def normalize_option_type(val: object) -> Optional[str]:
+    if val is None:
+        return None
+    s = str(val).strip().lower()
+    if s in {"c", "call", "calls"}:
+        return "C"
+    if s in {"p", "put", "puts"}:
+        return "P"
+    return None
+
+
+def column_names(names: Sequence[str]) -> List[str]:
+    # the column names pandas would give: "Unnamed: i" for blanks, "a.1" for repeats
+    out: List[str] = []
+    seen: Dict[str, int] = {}
+    for i, name in enumerate(names):
+        name = name or f"Unnamed: {i}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        seen.setdefault(name, 0)
+        out.append(name)
+    return out
@@ -1,12 +1,12 @@
 import base64
 import json
-from typing import Optional
+from typing import Optional, Union
 from openai import OpenAI
 from ..core.config import settings
 from ..schemas import FlowTable
 
 
-def extract_flow_from_image(image_bytes: bytes, prompt_text: str) -> FlowTable:
+def extract_flow_from_image(image_bytes: Union[bytes, memoryview], prompt_text: str) -> FlowTable:
     if not settings.openai_api_key:
         raise RuntimeError("OPENAI_API_KEY not set")
 
@@ -1,81 +1,297 @@
 from __future__ import annotations
-import re
-from typing import Dict, List, Optional, Tuple
-import pandas as pd
+import asyncio
+import io
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from dataclasses import replace
+from datetime import date, datetime
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+import anyio
+import numpy as np
+from ..core.config import settings
+from ..core.lazy import LazyModule
 from ..schemas import FlowRow, FlowTable
+from .columnar import FLOW_FIELDS, NAT, NO_DAY, ColumnarFlowTable
+from .compression import ZIP_MAGIC, detect_compression, open_decompressed
+from .datetimes import iso_days, normalize_expiries, normalize_timestamps
+from .dialects import BYTE_SPLITTABLE, DEFAULT_DIALECT, SNIFF_BYTES, CsvDialect, sniff_dialect
+from .mappings import detect_mapping, mapping_registry
+from .normalize import column_names, normalize_option_type, normalize_side, to_float
+from .smallcsv import is_small_csv, parse_small_csv
+from .storage import is_s3_path, map_file, open_s3
 
 
-COLUMN_CANDIDATES = {
-    "symbol": ["symbol", "ticker", "underlying", "root", "stock"],
-    "underlying": ["underlying", "root", "ticker"],
-    "expiry": ["expiry", "expiration", "exp", "expiration_date", "exp_date"],
-    "strike": ["strike", "strike_price", "strikeprice", "k"],
-    "option_type": ["type", "call_put", "cp", "option_type"],
-    "side": ["side", "bidask", "bid_ask", "aggressor", "at", "tick"],
-    "price": ["price", "trade_price", "fill_price", "avg_price"],
-    "size": ["size", "qty", "quantity", "volume", "contracts"],
-    "premium": ["premium", "notional", "value", "amount"],
-    "open_interest": ["oi", "open_interest"],
-    "iv": ["iv", "implied_vol", "implied_volatility"],
-    "delta": ["delta"],
-    "timestamp": ["time", "timestamp", "ts", "date_time"],
+PARQUET_CONTENT_TYPES = {"application/vnd.apache.parquet", "application/x-parquet", "application/parquet"}
+ARROW_CONTENT_TYPES = {
+    "application/vnd.apache.arrow.file",
+    "application/vnd.apache.arrow.stream",
+    "application/x-arrow",
 }
+PARQUET_MAGIC = b"PAR1"
+ARROW_FILE_MAGIC = b"ARROW1"
+XLSX_CONTENT_TYPES = {"application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"}
+XLS_CONTENT_TYPES = {"application/vnd.ms-excel"}
+XLS_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+HEADER_SCAN_ROWS = 20
+
+
+
+class UnreadableFile(ValueError):
+    """The upload is not a valid file of the format it claims to be."""
+
+
+# most uploads are a screenful of rows, which `smallcsv` handles without pandas
+pd = LazyModule("pandas")
+# raw file contents: bytes, or a memoryview over a memory-mapped stored upload
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+class ViewReader(io.RawIOBase):
+    """Seekable file object over a buffer; reads copy only the requested chunk."""
+
+    def __init__(self, view: Buffer):
+        self.view = memoryview(view)
+        self.pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        chunk = self.view[self.pos : self.pos + len(b)]
+        n = len(chunk)
+        b[:n] = chunk
+        self.pos += n
+        return n
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self.pos, io.SEEK_END: len(self.view)}[whence]
+        self.pos = max(0, base + offset)
+        return self.pos
+
+    def tell(self) -> int:
+        return self.pos
+
+    def close(self) -> None:
+        self.view.release()
+        super().close()
+
+
+def _reader(data: Buffer) -> BinaryIO:
+    # BytesIO shares a bytes object's memory but would copy any other buffer
+    return pd.io.common.BytesIO(data) if isinstance(data, bytes) else io.BufferedReader(ViewReader(data))
 
 
 def _normalize_columns(df: pd.DataFrame) -> Dict[str, str]:
-    mapping: Dict[str, str] = {}
-    cols = {c.lower().strip(): c for c in df.columns}
+    return detect_mapping(df.columns)
 
-    for key, candidates in COLUMN_CANDIDATES.items():
-        for cand in candidates:
-            if cand in cols:
-                mapping[key] = cols[cand]
-                break
-    return mapping
 
+FLOAT_FIELDS = ["strike", "price", "size", "premium", "open_interest", "iv", "delta"]
+NULL_TOKENS = {"", "nan", "none"}
 
-def _to_float(val: object) -> Optional[float]:
-    if val is None:
-        return None
-    s = str(val).strip()
-    if s == "" or s.lower() in {"nan", "none"}:
-        return None
-    s = s.replace(",", "")
-    s = re.sub(r"[$%]", "", s)
+
+def _to_float_column(col: pd.Series) -> pd.Series:
+    if pd.api.types.is_numeric_dtype(col) and not pd.api.types.is_bool_dtype(col):
+        return col.astype("float64")
+    s = col.astype(str).str.strip()
+    nulls = s.str.lower().isin(NULL_TOKENS)
+    s = s.str.replace(",", "", regex=False).str.replace(r"[$%]", "", regex=True)
+    out = pd.to_numeric(s.where(~nulls), errors="coerce")
+    # float() accepts a few spellings to_numeric rejects (e.g. "1_000"); keep the
+    # per-cell semantics for the handful of cells that disagree.
+    retry = out.isna() & ~nulls
+    if retry.any():
+        out[retry] = s[retry].map(lambda v: to_float(v)).astype("float64")
+    return out.astype("float64")
+
+
+def _per_unique(fn):
+    # flow columns are low-cardinality (a handful of symbols, sides, expiries), so
+    # normalize each distinct value once and broadcast back through the codes
+    def wrapper(col: pd.Series) -> pd.Series:
+        codes, uniques = pd.factorize(col, use_na_sentinel=False)
+        mapped = fn(pd.Series(uniques, dtype=object)).to_numpy(dtype=object)
+        return pd.Series(mapped[codes], index=col.index, dtype=object)
+
+    return wrapper
+
+
+@_per_unique
+def _str_column(col: pd.Series) -> pd.Series:
+    return col.astype(str).str.strip()
+
+
+@_per_unique
+def _side_column(col: pd.Series) -> pd.Series:
+    s = col.astype(str).str.lower()
+    side = np.select(
+        [
+            s.str.contains("ask", regex=False) | s.str.contains("offer", regex=False),
+            s.str.contains("bid", regex=False),
+            s.str.contains("mid", regex=False) | s.str.contains("between", regex=False),
+        ],
+        ["ASK", "BID", "MID"],
+        default="UNKNOWN",
+    )
+    return pd.Series(side, index=col.index, dtype=object)
+
+
+@_per_unique
+def _option_type_column(col: pd.Series) -> pd.Series:
+    s = col.astype(str).str.strip().str.lower()
+    opt = np.select([s.isin({"c", "call", "calls"}), s.isin({"p", "put", "puts"})], ["C", "P"], default=None)
+    return pd.Series(opt, index=col.index, dtype=object)
+
+
+OCC_TAIL = 15  # YYMMDD + C/P + strike * 1000 (8 digits); the root (<= 6 chars) precedes it
+OCC_MAX_WIDTH = 32
+_STRIKE_WEIGHTS = 10 ** np.arange(7, -1, -1, dtype=np.int64)
+_DATE_WEIGHTS = 10 ** np.arange(5, -1, -1, dtype=np.int64)
+_ROOT_WEIGHTS = 256 ** np.arange(5, -1, -1, dtype=np.int64)
+
+
+def _ascii_matrix(col: pd.Series, width: int) -> np.ndarray:
+    text = col.astype(str).to_numpy()
     try:
-        return float(s)
-    except ValueError:
-        return None
+        raw = text.astype(f"S{width}")
+    except UnicodeEncodeError:
+        raw = np.array(pd.Series(text).str.encode("ascii", errors="replace").tolist(), dtype=f"S{width}")
+    return raw.view(np.uint8).reshape(len(col), width)
 
 
-def _normalize_side(val: object) -> str:
-    if val is None:
-        return "UNKNOWN"
-    s = str(val).lower()
-    if "ask" in s or "offer" in s:
-        return "ASK"
-    if "bid" in s:
-        return "BID"
-    if "mid" in s or "between" in s:
-        return "MID"
-    return "UNKNOWN"
+def _upper(chars: np.ndarray) -> np.ndarray:
+    return np.where((chars >= ord("a")) & (chars <= ord("z")), chars - 32, chars)
 
 
-def _normalize_option_type(val: object) -> Optional[str]:
-    if val is None:
-        return None
-    s = str(val).strip().lower()
-    if s in {"c", "call", "calls"}:
-        return "C"
-    if s in {"p", "put", "puts"}:
-        return "P"
-    return None
+def _decode_packed(codes: np.ndarray, valid: np.ndarray, render) -> np.ndarray:
+    # only distinct values are turned into Python strings
+    ids, uniques = pd.factorize(codes)
+    ids[~valid] = len(uniques)
+    return np.array([render(int(u)) for u in uniques] + [None], dtype=object)[ids]
 
 
-def parse_csv_bytes(data: bytes, provider: Optional[str] = None) -> FlowTable:
-    df = pd.read_csv(pd.io.common.BytesIO(data))
-    mapping = _normalize_columns(df)
+def decode_occ_symbols(col: pd.Series) -> pd.DataFrame:
+    """Split OCC/OSI option symbols (e.g. "SPXW  260204C06900000") into their parts.
+
+    Distinct symbols are laid out as a fixed-width byte matrix, so every field is a
+    column slice and no per-row regex runs. Accepts "O:" / "." vendor prefixes; rows
+    that are not OCC symbols come back as None/NaN.
+    """
+    codes, uniques = pd.factorize(col, use_na_sentinel=False)
+    decoded = _decode_occ_matrix(pd.Series(uniques, dtype=object))
+    out = decoded.iloc[codes]
+    out.index = col.index
+    return out
+
+
+def _decode_occ_matrix(col: pd.Series) -> pd.DataFrame:
+    n = len(col)
+    width = OCC_MAX_WIDTH + 1
+    m = _ascii_matrix(col, width)
+    idx = np.arange(n)
+
+    nonspace = m > ord(" ")
+    first = nonspace.argmax(axis=1)
+    last = OCC_MAX_WIDTH - nonspace[:, ::-1].argmax(axis=1)
+    lead = _upper(m[idx, first])
+    has_o = (lead == ord("O")) & (m[idx, np.minimum(first + 1, OCC_MAX_WIDTH)] == ord(":"))
+    start = first + 2 * has_o + (lead == ord("."))
+    tail_start = last - OCC_TAIL + 1
+    root_len = tail_start - start
+
+    tail = _upper(m[idx[:, None], np.clip(tail_start[:, None] + np.arange(OCC_TAIL), 0, OCC_MAX_WIDTH)])
+    date_digits = tail[:, :6].astype(np.int64) - ord("0")
+    strike_digits = tail[:, 7:].astype(np.int64) - ord("0")
+    cp = tail[:, 6]
+    valid = (
+        nonspace.any(axis=1)
+        & (last < OCC_MAX_WIDTH)
+        & (root_len >= 1)
+        & (root_len <= 6)
+        & ((date_digits >= 0) & (date_digits <= 9)).all(axis=1)
+        & ((strike_digits >= 0) & (strike_digits <= 9)).all(axis=1)
+        & ((cp == ord("C")) | (cp == ord("P")))
+    )
+
+    root_idx = start[:, None] + np.arange(6)
+    root_chars = _upper(m[idx[:, None], np.clip(root_idx, 0, OCC_MAX_WIDTH)]).astype(np.int64)
+    root_chars[(root_idx >= tail_start[:, None]) | (root_chars == ord(" "))] = 0
+    root_ok = (root_chars == 0) | (root_chars == ord(".")) | ((root_chars >= ord("0")) & (root_chars <= ord("9")))
+    root_ok |= (root_chars >= ord("A")) & (root_chars <= ord("Z"))
+    valid &= root_ok.all(axis=1)
+    root_code = np.where(valid, root_chars @ _ROOT_WEIGHTS, 0)
+    date_code = np.where(valid, date_digits @ _DATE_WEIGHTS, 0)
+
+    out = pd.DataFrame(index=col.index)
+    out["root"] = _decode_packed(root_code, valid, lambda c: c.to_bytes(6, "big").strip(b"\0").decode("ascii"))
+    out["expiry"] = _decode_packed(date_code, valid, lambda c: f"20{c // 10000:02d}-{c // 100 % 100:02d}-{c % 100:02d}")
+    out["option_type"] = np.where(valid, np.where(cp == ord("C"), "C", "P"), None)
+    out["strike"] = np.where(valid, strike_digits @ _STRIKE_WEIGHTS / 1000.0, np.nan)
+    return out
+
 
+def _normalize_frame(
+    df: pd.DataFrame,
+    mapping: Dict[str, str],
+    provider: Optional[str] = None,
+    session_date: Optional[str] = None,
+) -> pd.DataFrame:
+    """Column-at-a-time equivalent of the per-row loop in `_parse_frame_rowwise`."""
+    out = pd.DataFrame(index=df.index)
+    none = pd.Series(None, index=df.index, dtype=object)
+
+    symbol = _str_column(df[mapping["symbol"]]) if mapping.get("symbol") else none
+    underlying = _str_column(df[mapping["underlying"]]) if mapping.get("underlying") else none
+    # `symbol or underlying or ""` / `underlying or symbol` with empty strings as falsy
+    symbol_ok = symbol.notna() & (symbol != "")
+    underlying_ok = underlying.notna() & (underlying != "")
+    out["symbol"] = symbol.where(symbol_ok, underlying.where(underlying_ok, ""))
+    out["underlying"] = underlying.where(underlying_ok, symbol)
+
+    if mapping.get("expiry"):
+        out["expiry"], out["expiry_day"] = normalize_expiries(df[mapping["expiry"]], provider)
+    else:
+        out["expiry"], out["expiry_day"] = none, NO_DAY
+    out["option_type"] = _option_type_column(df[mapping["option_type"]]) if mapping.get("option_type") else none
+    out["side"] = _side_column(df[mapping["side"]]) if mapping.get("side") else "UNKNOWN"
+    for field in FLOAT_FIELDS:
+        out[field] = _to_float_column(df[mapping[field]]) if mapping.get(field) else np.nan
+    out["timestamp"] = _str_column(df[mapping["timestamp"]]) if mapping.get("timestamp") else none
+    if mapping.get("timestamp"):
+        out["timestamp_ns"] = normalize_timestamps(df[mapping["timestamp"]], provider, session_date)
+    else:
+        out["timestamp_ns"] = NAT
+
+    # broker exports often carry only an OCC symbol; fill whatever it can supply
+    occ_col = mapping.get("occ_symbol")
+    if not occ_col and mapping.get("symbol") and not (mapping.get("strike") and mapping.get("option_type")):
+        occ_col = mapping["symbol"]
+    if occ_col:
+        occ = decode_occ_symbols(df[occ_col])
+        decoded = occ["root"].notna()
+        if decoded.any():
+            if occ_col in (mapping.get("symbol"), mapping.get("underlying")) or not symbol_ok.any():
+                out.loc[decoded, "symbol"] = occ.loc[decoded, "root"]
+                out.loc[decoded, "underlying"] = occ.loc[decoded, "root"]
+            for field in ("expiry", "option_type", "strike"):
+                fill = decoded & out[field].isna()
+                out.loc[fill, field] = occ.loc[fill, field]
+                if field == "expiry":
+                    out.loc[fill, "expiry_day"] = iso_days(occ.loc[fill, "expiry"])
+
+    derive = out["premium"].isna() & out["price"].notna() & out["size"].notna()
+    out.loc[derive, "premium"] = out.loc[derive, "price"] * out.loc[derive, "size"] * 100
+
+    # skip malformed rows
+    keep = out["strike"].notna() & out["option_type"].notna()
+    return out.loc[keep, FLOW_FIELDS + ["expiry_day"]]
+
+
+def _parse_frame_rowwise(df: pd.DataFrame, mapping: Dict[str, str]) -> List[FlowRow]:
     rows: List[FlowRow] = []
     for _, r in df.iterrows():
         symbol = None
@@ -86,15 +302,15 @@ def parse_csv_bytes(data: bytes, provider: Optional[str] = None) -> FlowTable:
             underlying = str(r[mapping["underlying"]]).strip()
 
         expiry = str(r[mapping["expiry"]]).strip() if mapping.get("expiry") else None
-        strike = _to_float(r[mapping["strike"]]) if mapping.get("strike") else None
-        opt_type = _normalize_option_type(r[mapping["option_type"]]) if mapping.get("option_type") else None
-        side = _normalize_side(r[mapping["side"]]) if mapping.get("side") else "UNKNOWN"
-        price = _to_float(r[mapping["price"]]) if mapping.get("price") else None
-        size = _to_float(r[mapping["size"]]) if mapping.get("size") else None
-        premium = _to_float(r[mapping["premium"]]) if mapping.get("premium") else None
-        open_interest = _to_float(r[mapping["open_interest"]]) if mapping.get("open_interest") else None
-        iv = _to_float(r[mapping["iv"]]) if mapping.get("iv") else None
-        delta = _to_float(r[mapping["delta"]]) if mapping.get("delta") else None
+        strike = to_float(r[mapping["strike"]]) if mapping.get("strike") else None
+        opt_type = normalize_option_type(r[mapping["option_type"]]) if mapping.get("option_type") else None
+        side = normalize_side(r[mapping["side"]]) if mapping.get("side") else "UNKNOWN"
+        price = to_float(r[mapping["price"]]) if mapping.get("price") else None
+        size = to_float(r[mapping["size"]]) if mapping.get("size") else None
+        premium = to_float(r[mapping["premium"]]) if mapping.get("premium") else None
+        open_interest = to_float(r[mapping["open_interest"]]) if mapping.get("open_interest") else None
+        iv = to_float(r[mapping["iv"]]) if mapping.get("iv") else None
+        delta = to_float(r[mapping["delta"]]) if mapping.get("delta") else None
         timestamp = str(r[mapping["timestamp"]]).strip() if mapping.get("timestamp") else None
 
         if premium is None and price is not None and size is not None:
@@ -121,4 +337,495 @@ def parse_csv_bytes(data: bytes, provider: Optional[str] = None) -> FlowTable:
         )
         rows.append(row)
 
-    return FlowTable(rows=rows, provider=provider)
+    return rows
+
+
+def _read_frame(data: Buffer, dialect: CsvDialect = DEFAULT_DIALECT) -> pd.DataFrame:
+    with _reader(data) as buf:
+        return pd.read_csv(buf, **dialect.read_csv_kwargs())
+
+
+def parse_csv_columnar(
+    data: Buffer, provider: Optional[str] = None, session_date: Optional[str] = None
+) -> ColumnarFlowTable:
+    dialect = sniff_dialect(bytes(data[:SNIFF_BYTES]), provider)
+    if is_small_csv(data):
+        table = parse_small_csv(data, provider, session_date, dialect)
+        if table is not None:
+            return table
+    df = _read_frame(data, dialect)
+    mapping = mapping_registry.resolve(df.columns, provider)
+    return ColumnarFlowTable.from_frame(_normalize_frame(df, mapping, provider, session_date), provider)
+
+
+def parse_csv_bytes(data: Buffer, provider: Optional[str] = None, session_date: Optional[str] = None) -> FlowTable:
+    return parse_csv_columnar(data, provider, session_date).to_flow_table()
+
+
+def parse_csv_path(path: str, provider: Optional[str] = None, session_date: Optional[str] = None) -> FlowTable:
+    """`parse_csv_bytes` over a memory-mapped file instead of a copy read into memory."""
+    with map_file(path) as view:
+        return parse_csv_bytes(view, provider, session_date)
+
+
+def parse_csv_bytes_rowwise(data: bytes, provider: Optional[str] = None) -> FlowTable:
+    """Reference per-row parser, kept for equivalence tests and benchmarks."""
+    df = _read_frame(data, sniff_dialect(data[:SNIFF_BYTES], provider))
+    mapping = _normalize_columns(df)
+    return FlowTable(rows=_parse_frame_rowwise(df, mapping), provider=provider)
+
+
+def iter_csv_batches(
+    source: Union[Buffer, BinaryIO],
+    provider: Optional[str] = None,
+    batch_rows: Optional[int] = None,
+    session_date: Optional[str] = None,
+) -> Iterator[ColumnarFlowTable]:
+    """Yield parsed rows one `read_csv` chunk at a time.
+
+    The dialect is sniffed from the first few KB and the header mapping resolved
+    from the first chunk, both reused after that, so memory is bounded by
+    `batch_rows` rather than by the size of the upload.
+    """
+    dialect = sniff_dialect(_head(source, SNIFF_BYTES), provider)
+    owned = isinstance(source, (bytes, bytearray, memoryview))
+    chunksize = max(1, int(batch_rows or settings.parse_batch_rows))
+    mapping: Optional[Dict[str, str]] = None
+    with _reader(source) if owned else nullcontext(source) as buf:
+        with pd.read_csv(buf, chunksize=chunksize, **dialect.read_csv_kwargs()) as reader:
+            for chunk in reader:
+                if mapping is None:
+                    mapping = mapping_registry.resolve(chunk.columns, provider)
+                batch = ColumnarFlowTable.from_frame(_normalize_frame(chunk, mapping, provider, session_date), provider)
+                if len(batch):
+                    yield batch
+
+
+def parse_csv_stream(
+    source: Union[bytes, BinaryIO],
+    provider: Optional[str] = None,
+    batch_rows: Optional[int] = None,
+    session_date: Optional[str] = None,
+) -> ColumnarFlowTable:
+    batches = iter_csv_batches(source, provider, batch_rows, session_date)
+    return ColumnarFlowTable.concat(list(batches), provider)
+
+
+def _open_arrow_batches(source: Union[Buffer, BinaryIO], batch_rows: int):
+    """Return (schema names, batch iterator factory) for Parquet or Arrow IPC input."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    buf = pa.BufferReader(source) if isinstance(source, (bytes, bytearray, memoryview)) else pa.PythonFile(source, mode="r")
+    head = buf.read(6)
+    buf.seek(0)
+    if head[:4] == PARQUET_MAGIC:
+        pf = pq.ParquetFile(buf)
+        return pf.schema_arrow.names, lambda cols: pf.iter_batches(batch_size=batch_rows, columns=cols)
+    if head == ARROW_FILE_MAGIC:
+        reader = pa.ipc.open_file(buf)
+        return reader.schema.names, lambda cols: (
+            reader.get_batch(i).select(cols) for i in range(reader.num_record_batches)
+        )
+    reader = pa.ipc.open_stream(buf)
+    return reader.schema.names, lambda cols: (batch.select(cols) for batch in reader)
+
+
+def iter_arrow_batches(
+    source: Union[Buffer, BinaryIO],
+    provider: Optional[str] = None,
+    batch_rows: Optional[int] = None,
+    session_date: Optional[str] = None,
+) -> Iterator[ColumnarFlowTable]:
+    """Parquet / Arrow IPC counterpart of `iter_csv_batches`.
+
+    The mapping is resolved from the schema names, and only mapped columns are
+    read; numeric Arrow columns reach `_normalize_frame` without a text round-trip.
+    """
+    import pyarrow as pa
+
+    try:
+        names, batches = _open_arrow_batches(source, max(1, int(batch_rows or settings.parse_batch_rows)))
+        mapping = mapping_registry.resolve(names, provider)
+        columns = sorted(set(mapping.values()), key=names.index)
+        if not columns:
+            return
+        for record_batch in batches(columns):
+            df = record_batch.to_pandas()
+            batch = ColumnarFlowTable.from_frame(_normalize_frame(df, mapping, provider, session_date), provider)
+            if len(batch):
+                yield batch
+    except pa.ArrowException as e:
+        raise UnreadableFile(f"not a readable Parquet or Arrow file: {e}") from e
+
+
+def is_arrow_content_type(content_type: Optional[str]) -> bool:
+    return (content_type or "").lower() in PARQUET_CONTENT_TYPES | ARROW_CONTENT_TYPES
+
+
+def spreadsheet_kind(content_type: Optional[str], head: bytes) -> Optional[str]:
+    """"xlsx" or "xls" for workbook uploads, decided by the bytes.
+
+    Browsers also send `application/vnd.ms-excel` for plain .csv files, so a
+    spreadsheet content type without workbook magic is parsed as CSV.
+    """
+    if (content_type or "").lower() not in XLSX_CONTENT_TYPES | XLS_CONTENT_TYPES:
+        return None
+    if head.startswith(ZIP_MAGIC):
+        return "xlsx"
+    if head.startswith(XLS_MAGIC):
+        return "xls"
+    return None
+
+
+def _xls_value(cell, datemode: int):
+    import xlrd
+
+    if cell.ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK):
+        return None
+    if cell.ctype == xlrd.XL_CELL_DATE:
+        value = xlrd.xldate_as_datetime(cell.value, datemode)
+        # a serial below 1 is a bare time of day
+        return value.time() if cell.value < 1 else value
+    return cell.value
+
+
+def _iter_sheets(source: Union[str, bytes, BinaryIO], kind: str) -> Iterator[Iterator[tuple]]:
+    """Yield each worksheet as an iterator of row tuples.
+
+    .xlsx sheets are streamed from the archive in read-only mode; .xls (at most
+    65536 rows per sheet) is read by xlrd one sheet at a time.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    if kind == "xlsx":
+        import openpyxl
+        from openpyxl.utils.exceptions import InvalidFileException
+
+        try:
+            wb = openpyxl.load_workbook(source, read_only=True, data_only=True)
+        except (InvalidFileException, zipfile.BadZipFile, KeyError) as e:  # KeyError: a zip without workbook parts
+            raise UnreadableFile(f"not a readable .xlsx workbook: {e}") from e
+        try:
+            for ws in wb.worksheets:
+                # exporters often write a wrong or missing <dimension>; without a reset
+                # openpyxl scans the whole sheet once just to size it
+                ws.reset_dimensions()
+                yield ws.iter_rows(values_only=True)
+        finally:
+            wb.close()
+        return
+
+    import xlrd
+    from xlrd.compdoc import CompDocError
+
+    try:
+        if isinstance(source, str):
+            book = xlrd.open_workbook(source, on_demand=True)
+        else:
+            book = xlrd.open_workbook(file_contents=source.read(), on_demand=True)
+    except (xlrd.XLRDError, CompDocError) as e:
+        raise UnreadableFile(f"not a readable .xls workbook: {e}") from e
+    try:
+        for i in range(book.nsheets):
+            sheet = book.sheet_by_index(i)
+            yield (tuple(_xls_value(c, book.datemode) for c in row) for row in sheet.get_rows())
+            book.unload_sheet(i)
+    finally:
+        book.release_resources()
+
+
+def _sheet_header(rows: Iterator[tuple], provider: Optional[str]) -> Tuple[List[str], Dict[str, str]]:
+    # desks put title lines above the header; take the first row that maps to flow fields
+    for _, row in zip(range(HEADER_SCAN_ROWS), rows):
+        header = column_names(["" if v is None else str(v).strip() for v in row])
+        if mapping_registry.recognizes(header, provider):  # title rows must not fill the mapping cache
+            return header, mapping_registry.resolve(header, provider)
+    return [], {}
+
+
+def iter_excel_batches(
+    source: Union[str, bytes, BinaryIO],
+    kind: str,
+    provider: Optional[str] = None,
+    batch_rows: Optional[int] = None,
+    session_date: Optional[str] = None,
+) -> Iterator[ColumnarFlowTable]:
+    """Workbook counterpart of `iter_csv_batches`.
+
+    Uses the first sheet with a recognizable header and feeds it to
+    `_normalize_frame` in blocks of `batch_rows`, so a large workbook is never
+    held in memory as a whole.
+    """
+    chunksize = max(1, int(batch_rows or settings.parse_batch_rows))
+    sheets = _iter_sheets(source, kind)
+    try:
+        for rows in sheets:
+            header, mapping = _sheet_header(rows, provider)
+            if not mapping:
+                continue
+            width = len(header)
+            expiry_at = header.index(mapping["expiry"]) if mapping.get("expiry") else None
+            block: List[tuple] = []
+            for row in rows:
+                row = tuple(row[:width]) + (None,) * (width - len(row))
+                if expiry_at is not None and isinstance(row[expiry_at], (date, datetime)):
+                    # date cells would otherwise print as "2026-02-04 00:00:00"
+                    row = row[:expiry_at] + (row[expiry_at].strftime("%Y-%m-%d"),) + row[expiry_at + 1:]
+                block.append(row)
+                if len(block) >= chunksize:
+                    yield from _excel_block(block, header, mapping, provider, session_date)
+                    block = []
+            if block:
+                yield from _excel_block(block, header, mapping, provider, session_date)
+            return
+    finally:
+        sheets.close()
+
+
+def _excel_block(
+    block: List[tuple],
+    header: List[str],
+    mapping: Dict[str, str],
+    provider: Optional[str],
+    session_date: Optional[str],
+) -> Iterator[ColumnarFlowTable]:
+    df = pd.DataFrame.from_records(block, columns=header)
+    batch = ColumnarFlowTable.from_frame(_normalize_frame(df, mapping, provider, session_date), provider)
+    if len(batch):
+        yield batch
+
+
+def _head(source: Union[Buffer, BinaryIO], n: int) -> bytes:
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source[:n])
+    if not source.seekable():
+        # decompression streams: only what is already buffered
+        return source.peek(n)[:n]
+    pos = source.tell()
+    head = source.read(n)
+    source.seek(pos)
+    return head
+
+
+def iter_flow_batches(
+    source: Union[Buffer, BinaryIO],
+    content_type: Optional[str] = None,
+    provider: Optional[str] = None,
+    batch_rows: Optional[int] = None,
+    session_date: Optional[str] = None,
+) -> Iterator[ColumnarFlowTable]:
+    if is_arrow_content_type(content_type):
+        return iter_arrow_batches(source, provider, batch_rows, session_date)
+    head = _head(source, len(XLS_MAGIC))
+    compression = detect_compression(content_type, head)
+    if compression:
+        f = _reader(source) if isinstance(source, (bytes, bytearray, memoryview)) else source
+        return _iter_decompressed_batches(f, compression, provider, session_date)
+    kind = spreadsheet_kind(content_type, head)
+    if kind:
+        return iter_excel_batches(source, kind, provider, batch_rows, session_date)
+    return iter_csv_batches(source, provider, batch_rows, session_date)
+
+
+def parse_flow_stream(
+    source: Union[bytes, BinaryIO],
+    content_type: Optional[str] = None,
+    provider: Optional[str] = None,
+    batch_rows: Optional[int] = None,
+    session_date: Optional[str] = None,
+) -> ColumnarFlowTable:
+    batches = iter_flow_batches(source, content_type, provider, batch_rows, session_date)
+    return ColumnarFlowTable.concat(list(batches), provider)
+
+
+_PROCESS_POOL: Optional[ProcessPoolExecutor] = None
+
+
+def _parse_workers() -> int:
+    return max(1, int(settings.parse_workers or os.cpu_count() or 1))
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _PROCESS_POOL
+    if _PROCESS_POOL is None:
+        _PROCESS_POOL = ProcessPoolExecutor(max_workers=_parse_workers())
+    return _PROCESS_POOL
+
+
+def _split_ranges(path: str, parts: int, skip_lines: int = 0) -> Tuple[bytes, List[Tuple[int, int]]]:
+    """Split a CSV file into `parts` newline-aligned byte ranges after the header line."""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        for _ in range(skip_lines):
+            f.readline()
+        header = f.readline()
+        start = f.tell()
+        step = max(1, (size - start) // parts)
+        ranges: List[Tuple[int, int]] = []
+        while start < size:
+            f.seek(min(start + step, size))
+            f.readline()
+            end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return header, ranges
+
+
+def _parse_csv_range(
+    path: str,
+    start: int,
+    end: int,
+    header: bytes,
+    mapping: Dict[str, str],
+    dialect: CsvDialect,
+    provider: Optional[str],
+    session_date: Optional[str],
+) -> ColumnarFlowTable:
+    with open(path, "rb") as f:
+        f.seek(start)
+        body = f.read(end - start)
+    df = pd.read_csv(pd.io.common.BytesIO(header + body), **dialect.read_csv_kwargs())
+    return ColumnarFlowTable.from_frame(_normalize_frame(df, mapping, provider, session_date), provider)
+
+
+def _parallel_plan(path: str, provider: Optional[str], workers: Optional[int]) -> Optional[List[tuple]]:
+    """`_parse_csv_range` arguments (minus provider and session date) per range, or None
+    when the file has to be parsed serially."""
+    with open(path, "rb") as f:
+        dialect = sniff_dialect(f.read(SNIFF_BYTES), provider)
+    header, ranges = _split_ranges(path, workers or _parse_workers(), dialect.header_row)
+    if len(ranges) <= 1 or dialect.encoding not in BYTE_SPLITTABLE:
+        return None
+    # the header travels with every range, so the workers skip no lines
+    dialect = replace(dialect, header_row=0)
+    columns = pd.read_csv(pd.io.common.BytesIO(header), nrows=0, **dialect.read_csv_kwargs()).columns
+    mapping = mapping_registry.resolve(columns, provider)
+    return [(path, start, end, header, mapping, dialect) for start, end in ranges]
+
+
+def _parse_csv_serial(path: str, provider: Optional[str], session_date: Optional[str]) -> ColumnarFlowTable:
+    with open(path, "rb") as f:
+        return parse_csv_stream(f, provider, session_date=session_date)
+
+
+def parse_csv_parallel(
+    path: str,
+    provider: Optional[str] = None,
+    workers: Optional[int] = None,
+    session_date: Optional[str] = None,
+) -> ColumnarFlowTable:
+    """Parse one large CSV across a process pool.
+
+    The file is cut into newline-aligned byte ranges, the header mapping is resolved
+    once here, and the per-range tables are concatenated in file order. Ranges are
+    split on raw newlines, so quoted fields containing line breaks are not supported,
+    and UTF-16/32 files are parsed serially.
+    """
+    jobs = _parallel_plan(path, provider, workers)
+    if jobs is None:
+        return _parse_csv_serial(path, provider, session_date)
+    pool = _get_process_pool()
+    futures = [pool.submit(_parse_csv_range, *job, provider, session_date) for job in jobs]
+    return ColumnarFlowTable.concat([f.result() for f in futures], provider)
+
+
+async def parse_csv_parallel_async(
+    path: str,
+    provider: Optional[str] = None,
+    workers: Optional[int] = None,
+    session_date: Optional[str] = None,
+) -> ColumnarFlowTable:
+    """`parse_csv_parallel` for async callers: the ranges are awaited instead of blocked on."""
+    jobs = await anyio.to_thread.run_sync(_parallel_plan, path, provider, workers)
+    if jobs is None:
+        return await anyio.to_thread.run_sync(_parse_csv_serial, path, provider, session_date)
+    loop = asyncio.get_running_loop()
+    pool = _get_process_pool()
+    tables = await asyncio.gather(*(loop.run_in_executor(pool, _parse_csv_range, *job, provider, session_date) for job in jobs))
+    return ColumnarFlowTable.concat(list(tables), provider)
+
+
+def use_parallel_parse(path: str, content_type: Optional[str] = None) -> bool:
+    """Whether `parse_flow_file` hands this stored upload to `parse_csv_parallel`.
+
+    Opt-in: with a single worker the pool only adds pickling and process hops.
+    """
+    threshold = int(settings.parallel_parse_threshold_mb) * 1024 * 1024
+    if threshold <= 0 or _parse_workers() < 2 or is_s3_path(path) or is_arrow_content_type(content_type) or os.path.getsize(path) < threshold:
+        return False
+    with open(path, "rb") as f:
+        head = f.read(len(XLS_MAGIC))
+    return not detect_compression(content_type, head) and not spreadsheet_kind(content_type, head)
+
+
+def iter_flow_file_batches(
+    path: str,
+    content_type: Optional[str] = None,
+    provider: Optional[str] = None,
+    session_date: Optional[str] = None,
+) -> Iterator[ColumnarFlowTable]:
+    if is_s3_path(path):
+        # stored in S3: parsers pull the object through ranged GETs
+        with open_s3(path) as f:
+            yield from iter_flow_batches(f, content_type, provider, session_date=session_date)
+        return
+    with open(path, "rb") as f:
+        head = f.read(len(XLS_MAGIC))
+        kind = detect_compression(content_type, head)
+        f.seek(0)
+        if kind:
+            yield from _iter_decompressed_batches(f, kind, provider, session_date)
+            return
+    sheet = spreadsheet_kind(content_type, head)
+    if sheet:
+        yield from iter_excel_batches(path, sheet, provider, session_date=session_date)
+        return
+    if use_parallel_parse(path, content_type):
+        yield parse_csv_parallel(path, provider, session_date=session_date)
+        return
+    # parsers read straight out of the page cache; Parquet/Arrow buffers are not copied at all
+    with map_file(path) as view:
+        table = None
+        if not is_arrow_content_type(content_type) and is_small_csv(view):
+            table = parse_small_csv(view, provider, session_date, sniff_dialect(bytes(view[:SNIFF_BYTES]), provider))
+        if table is not None:
+            if len(table):
+                yield table
+            return
+        yield from iter_flow_batches(view, content_type, provider, session_date=session_date)
+
+
+def _iter_decompressed_batches(
+    f: BinaryIO, kind: str, provider: Optional[str], session_date: Optional[str]
+) -> Iterator[ColumnarFlowTable]:
+    max_bytes = int(settings.max_upload_mb) * 1024 * 1024
+    with open_decompressed(f, kind, max_bytes) as stream:
+        head = stream.peek(len(ARROW_FILE_MAGIC))[: len(ARROW_FILE_MAGIC)]
+        if head.startswith(PARQUET_MAGIC) or head == ARROW_FILE_MAGIC:
+            # columnar formats need random access, so they are read (still size-capped) into memory
+            yield from iter_arrow_batches(stream.read(), provider, session_date=session_date)
+        else:
+            yield from iter_csv_batches(stream, provider, session_date=session_date)
+
+
+def parse_flow_file(
+    path: str,
+    content_type: Optional[str] = None,
+    provider: Optional[str] = None,
+    session_date: Optional[str] = None,
+) -> ColumnarFlowTable:
+    batches = iter_flow_file_batches(path, content_type, provider, session_date)
+    return ColumnarFlowTable.concat(list(batches), provider)
+
+
+async def parse_flow_file_async(
+    path: str,
+    content_type: Optional[str] = None,
+    provider: Optional[str] = None,
+    session_date: Optional[str] = None,
+) -> ColumnarFlowTable:
+    if await anyio.to_thread.run_sync(use_parallel_parse, path, content_type):
+        return await parse_csv_parallel_async(path, provider, session_date=session_date)
+    # the serial parse, S3 range reads included, runs on a worker thread
+    return await anyio.to_thread.run_sync(parse_flow_file, path, content_type, provider, session_date)
@@ -0,0 +1,98 @@
+import glob
+import json
+import os
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional
+import zstandard
+from ..schemas import AnalyzeResponse
+
+DICTIONARY_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "dictionaries")
+DICTIONARY_SIZE = 16 * 1024
+LEVEL = 9  # written once per analysis, read back many times
+# the table is reloaded from the stored parse of Analysis.flow_upload_id instead of being stored again
+STRIPPED_FIELDS = {"parsed_flow_table"}
+DICTIONARY_NAME = re.compile(r"analysis_result_v(\d+)\.zdict$")
+
+
+class UnknownDictionary(ValueError):
+    """A stored result names a dictionary this deployment does not ship."""
+
+
+@lru_cache(maxsize=1)
+def dictionaries() -> Dict[int, zstandard.ZstdCompressionDict]:
+    """Trained dictionaries by zstd dict id. Frames name the one they were written with,
+    so older dictionaries stay here for reading after a retrain."""
+    out: Dict[int, zstandard.ZstdCompressionDict] = {}
+    for path in sorted(glob.glob(os.path.join(DICTIONARY_DIR, "*.zdict"))):
+        with open(path, "rb") as f:
+            d = zstandard.ZstdCompressionDict(f.read())
+        out[d.dict_id()] = d
+    return out
+
+
+@lru_cache(maxsize=1)
+def _compressor() -> zstandard.ZstdCompressor:
+    # the newest dictionary (file names sort by version) is used for writing
+    paths = sorted(glob.glob(os.path.join(DICTIONARY_DIR, "*.zdict")))
+    if not paths:
+        return zstandard.ZstdCompressor(level=LEVEL)
+    with open(paths[-1], "rb") as f:
+        return zstandard.ZstdCompressor(level=LEVEL, dict_data=zstandard.ZstdCompressionDict(f.read()))
+
+
+def result_payload(response: AnalyzeResponse) -> bytes:
+    return response.model_dump_json(exclude=STRIPPED_FIELDS).encode("utf-8")
+
+
+def compress_result(response: AnalyzeResponse) -> bytes:
+    return _compressor().compress(result_payload(response))
+
+
+def decompress_result(data: bytes) -> Dict[str, Any]:
+    dict_id = zstandard.get_frame_parameters(data).dict_id
+    if dict_id and dict_id not in dictionaries():
+        raise UnknownDictionary(f"analysis result was compressed with unknown dictionary {dict_id}")
+    dctx = zstandard.ZstdDecompressor(dict_data=dictionaries()[dict_id]) if dict_id else zstandard.ZstdDecompressor()
+    return json.loads(dctx.decompress(data))
+
+
+def load_result(result_zstd: Optional[bytes], result_json: Optional[str]) -> Dict[str, Any]:
+    """Stored analysis payload; rows from before compression keep plain JSON with the table inline."""
+    if result_zstd is not None:
+        return decompress_result(result_zstd)
+    return json.loads(result_json or "{}")
+
+
+def train_dictionary(samples: Iterable[bytes], size: int = DICTIONARY_SIZE) -> zstandard.ZstdCompressionDict:
+    return zstandard.train_dictionary(size, list(samples))
+
+
+def next_dictionary_path() -> str:
+    # numbered past the newest, so a deleted older dictionary never gets its file overwritten
+    versions = [int(m.group(1)) for m in map(DICTIONARY_NAME.search, os.listdir(DICTIONARY_DIR)) if m]
+    version = max(versions, default=0) + 1
+    return os.path.join(DICTIONARY_DIR, f"analysis_result_v{version:03d}.zdict")
+
+
+def stored_samples(limit: int) -> List[bytes]:
+    from sqlmodel import Session, select
+    from ..db import get_engine
+    from ..models import Analysis
+
+    with Session(get_engine()) as session:
+        rows = session.exec(
+            select(Analysis.result_zstd, Analysis.result_json).order_by(Analysis.created_at.desc()).limit(limit)
+        ).all()
+    return [result_payload(AnalyzeResponse.model_validate(load_result(*row))) for row in rows]
+
+
+if __name__ == "__main__":
+    # retrain on the latest stored analyses: python -m app.services.results [limit]
+    import sys
+
+    samples = stored_samples(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
+    path = next_dictionary_path()
+    with open(path, "wb") as f:
+        f.write(train_dictionary(samples).as_bytes())
+    print(f"trained on {len(samples)} analyses -> {path}")
@@ -0,0 +1,215 @@
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+import anyio
+import numpy as np
+from sqlalchemy import update
+from sqlmodel import Session, exists, func, or_, select
+from ..core.config import settings
+from ..db import get_engine
+from ..models import Blob, ParsedUpload, Upload
+from .columnar import DictColumn
+from .sidecar import (
+    PARTITION_PREFIX,
+    SIDECAR_PREFIX,
+    Partition,
+    dump_partition,
+    load_sidecar,
+    partition_key,
+    read_partition,
+)
+from .storage import get_storage, is_s3_path
+
+logger = logging.getLogger(__name__)
+STORAGE_PREFIXES = ("blobs", SIDECAR_PREFIX, PARTITION_PREFIX, "tmp")
+
+
+@dataclass
+class RetentionReport:
+    compacted_tables: int = 0
+    partitions_written: int = 0
+    orphans_deleted: int = 0
+    blobs_evicted: int = 0
+    compaction_bytes: int = 0  # sidecars removed minus what the partitions grew by
+    orphan_bytes: int = 0
+    eviction_bytes: int = 0
+
+    @property
+    def bytes_reclaimed(self) -> int:
+        return self.compaction_bytes + self.orphan_bytes + self.eviction_bytes
+
+    def as_dict(self) -> Dict[str, int]:
+        return {**asdict(self), "bytes_reclaimed": self.bytes_reclaimed}
+
+
+def _norm(path: str) -> str:
+    # stored paths may be relative to whatever LOCAL_STORAGE_PATH was at the time
+    return path if is_s3_path(path) else os.path.abspath(path)
+
+
+def _compact_day(
+    session: Session,
+    storage,
+    day: str,
+    parsed: Sequence[ParsedUpload],
+    existing: Dict[str, int],
+    report: RetentionReport,
+) -> None:
+    parts: Dict[str, List[Partition]] = defaultdict(list)
+    paths: Dict[str, List[str]] = defaultdict(list)
+    done: List[ParsedUpload] = []
+    for p in parsed:
+        try:
+            table = load_sidecar(p.sidecar_path)
+        except Exception:
+            logger.warning("retention: cannot read sidecar %s; leaving it uncompacted", p.sidecar_path)
+            continue
+        done.append(p)
+        codes = table.symbol.codes
+        for code in np.unique(codes).tolist():
+            rows = np.flatnonzero(codes == code)
+            key = partition_key(table.symbol.values[code] if code >= 0 else None, day)
+            tag = DictColumn(np.zeros(len(rows), dtype=np.int32), [p.key])
+            parts[key].append(Partition(table.take(rows), tag, rows.astype(np.int64)))
+            paths[p.key].append(storage.key_path(key))
+
+    compacted = [p.key for p in done]
+    for key, new in parts.items():
+        path = storage.key_path(key)
+        old_size = existing.get(_norm(path))
+        if old_size is not None:
+            # drop rows a crashed earlier run already merged, so a rerun does not duplicate them
+            new = [read_partition(path).without(compacted)] + new
+        data = dump_partition(Partition.concat(new))
+        storage.put(key, data)
+        existing[_norm(path)] = data.size
+        report.partitions_written += 1
+        report.compaction_bytes -= data.size - (old_size or 0)
+
+    sidecars = [p.sidecar_path for p in done]
+    for p in done:
+        summary = json.loads(p.metadata_json)
+        summary.update(sidecar=None, partitions=list(dict.fromkeys(paths[p.key])))
+        p.metadata_json = json.dumps(summary)
+        p.sidecar_path = None
+        session.add(p)
+    session.commit()
+    sizes = {_norm(f.path): f.size for f in storage.list_files(SIDECAR_PREFIX)}
+    for path in sidecars:
+        storage.delete(path)
+        report.compacted_tables += 1
+        report.compaction_bytes += sizes.get(_norm(path), 0)
+
+
+def compact_parsed(session: Session, storage, report: RetentionReport, cutoff: datetime) -> None:
+    """Merge sidecars older than `cutoff` into one file per symbol and ingest day."""
+    old = session.exec(
+        select(ParsedUpload)
+        .where(ParsedUpload.sidecar_path.is_not(None), ParsedUpload.created_at < cutoff)
+        .order_by(ParsedUpload.created_at)
+    ).all()
+    by_day: Dict[str, List[ParsedUpload]] = defaultdict(list)
+    for p in old:
+        by_day[p.created_at.date().isoformat()].append(p)
+    existing = {_norm(f.path): f.size for f in storage.list_files(PARTITION_PREFIX)}
+    for day, parsed in by_day.items():
+        _compact_day(session, storage, day, parsed, existing, report)
+
+
+def collect_orphans(session: Session, storage, report: RetentionReport, grace_seconds: float) -> None:
+    """Delete blobs and sidecars no row points at (e.g. the ingest's commit failed) and
+    abandoned temp files. Anything newer than the grace period may still be in flight."""
+    referenced = {_norm(p) for p in session.exec(select(Blob.storage_path)).all()}
+    sidecars = session.exec(select(ParsedUpload.sidecar_path).where(ParsedUpload.sidecar_path.is_not(None))).all()
+    referenced |= {_norm(p) for p in sidecars}
+    cutoff = time.time() - grace_seconds
+    for prefix in ("blobs", SIDECAR_PREFIX, "tmp"):
+        for f in list(storage.list_files(prefix)):
+            if f.modified > cutoff or _norm(f.path) in referenced:
+                continue
+            storage.delete(f.path)
+            report.orphans_deleted += 1
+            report.orphan_bytes += f.size
+
+
+def evict_raw(session: Session, storage, report: RetentionReport, budget_bytes: int, grace_seconds: int) -> None:
+    """Delete least recently uploaded raw blobs until storage fits `budget_bytes`.
+
+    Only blobs whose every upload has a stored parse are evicted; charts and other
+    unparsed uploads keep their originals, and so do blobs uploaded in the last
+    `grace_seconds`. Each file is deleted inside the transaction that marks its row
+    evicted, so `register_blob` for the same bytes waits for it and then sees the eviction.
+    """
+    used = sum(f.size for prefix in STORAGE_PREFIXES for f in storage.list_files(prefix))
+    if used <= budget_bytes:
+        return
+    unparsed = select(Upload.digest).where(
+        Upload.digest.is_not(None),
+        or_(Upload.parse_key.is_(None), ~exists().where(ParsedUpload.key == Upload.parse_key)),
+    )
+    now = datetime.utcnow()
+    last_used = func.coalesce(Blob.last_used_at, Blob.created_at)
+    idle = last_used < now - timedelta(seconds=grace_seconds)
+    candidates = session.exec(
+        select(Blob.digest, Blob.storage_path, Blob.size)
+        .where(Blob.evicted_at.is_(None), Blob.digest.not_in(unparsed), idle)
+        .order_by(last_used)
+    ).all()
+    for digest, path, size in candidates:
+        if used <= budget_bytes:
+            break
+        # checked again under the row's write lock: the bytes may have been uploaded since
+        marked = session.execute(
+            update(Blob).where(Blob.digest == digest, Blob.evicted_at.is_(None), idle).values(evicted_at=now)
+        ).rowcount
+        if not marked:
+            session.rollback()
+            continue
+        try:
+            storage.delete(path)
+        except Exception:
+            session.rollback()
+            raise
+        session.commit()
+        used -= size
+        report.blobs_evicted += 1
+        report.eviction_bytes += size
+
+
+def run_retention(session: Session, storage, now: Optional[datetime] = None) -> RetentionReport:
+    now = now or datetime.utcnow()
+    report = RetentionReport()
+    compact_parsed(session, storage, report, now - timedelta(days=int(settings.retention_compact_after_days)))
+    collect_orphans(session, storage, report, int(settings.retention_orphan_grace_minutes) * 60)
+    if int(settings.storage_budget_mb) > 0:
+        budget = int(settings.storage_budget_mb) * 1024 * 1024
+        evict_raw(session, storage, report, budget, int(settings.retention_evict_grace_minutes) * 60)
+    return report
+
+
+def run_retention_job() -> Dict[str, int]:
+    with Session(get_engine()) as session:
+        report = run_retention(session, get_storage()).as_dict()
+    logger.info("retention: %s", json.dumps(report))
+    return report
+
+
+async def retention_loop(interval_minutes: int) -> None:
+    while True:
+        await anyio.sleep(interval_minutes * 60)
+        try:
+            await anyio.to_thread.run_sync(run_retention_job)
+        except Exception:
+            logger.exception("retention job failed")
+
+
+if __name__ == "__main__":
+    from ..core.logging import configure_logging
+
+    configure_logging()
+    run_retention_job()
@@ -0,0 +1,167 @@
+from __future__ import annotations
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional, Sequence
+import numpy as np
+from .columnar import CATEGORICAL_FIELDS, FLOW_FIELDS, NAT, NUMERIC_FIELDS, ColumnarFlowTable, DictColumn
+from .storage import is_s3_path, open_s3
+
+SIDECAR_PREFIX = "parsed"
+SIDECAR_SUFFIX = ".arrow"
+PARTITION_PREFIX = "partitions"
+
+
+def sidecar_key(parse_key: str) -> str:
+    return f"{SIDECAR_PREFIX}/{parse_key[:2]}/{parse_key}{SIDECAR_SUFFIX}"
+
+
+def to_arrow(table: ColumnarFlowTable):
+    import pyarrow as pa
+
+    arrays = []
+    for f in FLOW_FIELDS:
+        col = getattr(table, f)
+        if isinstance(col, DictColumn):
+            indices = pa.array(col.codes, type=pa.int32(), mask=col.codes < 0)
+            arrays.append(pa.DictionaryArray.from_arrays(indices, pa.array(col.values, type=pa.string())))
+        else:
+            arrays.append(pa.array(col))  # NaN / NAT stay values, so reads need no null handling
+    metadata = {"provider": json.dumps(table.provider)}
+    return pa.Table.from_arrays(arrays, names=FLOW_FIELDS, metadata=metadata)
+
+
+def _array(column):
+    return column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+
+
+def from_arrow(arrow) -> ColumnarFlowTable:
+    cols: Dict[str, Any] = {}
+    for f in CATEGORICAL_FIELDS:
+        arr = _array(arrow.column(f))
+        indices = arr.indices.fill_null(-1) if arr.null_count else arr.indices
+        cols[f] = DictColumn(indices.to_numpy(), arr.dictionary.to_pylist())
+    for f in NUMERIC_FIELDS + ["timestamp_ns"]:
+        cols[f] = _array(arrow.column(f)).to_numpy()
+    provider = json.loads((arrow.schema.metadata or {}).get(b"provider", b"null"))
+    return ColumnarFlowTable(provider=provider, **cols)
+
+
+def _ipc_file(arrow, compression: Optional[str] = None):
+    import pyarrow as pa
+
+    sink = pa.BufferOutputStream()
+    options = pa.ipc.IpcWriteOptions(compression=compression)
+    with pa.ipc.new_file(sink, arrow.schema, options=options) as writer:
+        writer.write_table(arrow)
+    return sink.getvalue()
+
+
+def read_arrow(path: str):
+    """An Arrow IPC file as a `pyarrow.Table`.
+
+    Sidecars are uncompressed, so locally they are memory-mapped and the numeric
+    columns and dictionary codes come back as views of the mapped file.
+    """
+    import pyarrow as pa
+
+    if is_s3_path(path):
+        with open_s3(path) as f:
+            source = pa.py_buffer(f.read())
+    else:
+        # the returned arrays keep the map alive; it is unmapped once they are freed
+        source = pa.memory_map(path, "r")
+    return pa.ipc.open_file(source).read_all()
+
+
+def dump_sidecar(table: ColumnarFlowTable):
+    """Arrow IPC file bytes (a `pyarrow.Buffer`) for `table`."""
+    return _ipc_file(to_arrow(table))
+
+
+def load_sidecar(path: str) -> ColumnarFlowTable:
+    return from_arrow(read_arrow(path))
+
+
+def partition_key(symbol: Optional[str], day: str) -> str:
+    name = re.sub(r"[^A-Za-z0-9._-]", "_", symbol) if symbol else "_none"
+    return f"{PARTITION_PREFIX}/{name}/{day}{SIDECAR_SUFFIX}"
+
+
+@dataclass
+class Partition:
+    """Rows of several parsed uploads for one symbol and day, tagged with their parse key and
+    original row number so each upload's table can be rebuilt in order."""
+
+    table: ColumnarFlowTable
+    parse_keys: DictColumn
+    rows: np.ndarray  # int64 row number within the upload's table
+
+    @classmethod
+    def concat(cls, parts: Sequence["Partition"]) -> "Partition":
+        return cls(
+            ColumnarFlowTable.concat([p.table for p in parts]),
+            DictColumn.concat([p.parse_keys for p in parts]),
+            np.concatenate([p.rows for p in parts]),
+        )
+
+    def take(self, indices: np.ndarray) -> "Partition":
+        keys = DictColumn(self.parse_keys.codes[indices], self.parse_keys.values)
+        return Partition(self.table.take(indices), keys, self.rows[indices])
+
+    def without(self, keys: Iterable[str]) -> "Partition":
+        drop = np.isin(self.parse_keys.codes, [self.parse_keys.code_of(k) for k in keys])
+        return self.take(np.flatnonzero(~drop))
+
+
+def dump_partition(part: Partition):
+    import pyarrow as pa
+
+    table = part.table.compact()
+    keys = part.parse_keys.compact()
+    arrow = to_arrow(table).append_column(
+        "parse_key", pa.DictionaryArray.from_arrays(pa.array(keys.codes, type=pa.int32()), pa.array(keys.values, type=pa.string()))
+    )
+    # partitions hold cold data, so unlike sidecars they trade zero-copy reads for zstd
+    return _ipc_file(arrow.append_column("row", pa.array(part.rows, type=pa.int64())), compression="zstd")
+
+
+def read_partition(path: str) -> Partition:
+    arrow = read_arrow(path)
+    keys = _array(arrow.column("parse_key"))
+    return Partition(
+        from_arrow(arrow),
+        DictColumn(keys.indices.to_numpy(), keys.dictionary.to_pylist()),
+        _array(arrow.column("row")).to_numpy(),
+    )
+
+
+def load_partitioned(key: str, paths: Sequence[str], provider: Optional[str] = None) -> ColumnarFlowTable:
+    """Rebuild one upload's table from the daily partitions the retention job merged it into."""
+    pieces = [part.take(np.flatnonzero(part.parse_keys.eq(key))) for part in map(read_partition, paths)]
+    if not pieces:
+        return ColumnarFlowTable.empty(provider)
+    merged = Partition.concat(pieces)
+    table = merged.table.take(np.argsort(merged.rows, kind="stable"))
+    table.provider = provider
+    return table
+
+
+def flow_summary(table: ColumnarFlowTable) -> Dict[str, Any]:
+    """The stats kept in the database row; the rows themselves live in the sidecar."""
+    times = table.timestamp_ns[table.timestamp_ns != NAT]
+    is_call = table.is_call()
+    return {
+        "row_count": len(table),
+        "provider": table.provider,
+        "symbols": sorted({table.symbol.values[c] for c in np.unique(table.symbol.codes).tolist() if c >= 0}),
+        "calls": int(is_call.sum()),
+        "puts": int(table.option_type.eq("P").sum()),
+        "premium": float(np.nansum(table.premium)),
+        "first_timestamp_ns": int(times.min()) if len(times) else None,
+        "last_timestamp_ns": int(times.max()) if len(times) else None,
+    }
+
+
+def summary_json(table: ColumnarFlowTable, sidecar_path: Optional[str] = None) -> str:
+    return json.dumps({**flow_summary(table), "sidecar": sidecar_path})
@@ -0,0 +1,183 @@
+from __future__ import annotations
+import csv
+import io
+import re
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+from ..core.config import settings
+from .columnar import NO_DAY, NUMERIC_FIELDS, ColumnarFlowTable, day_number
+from .datetimes import normalize_expiry_values, normalize_timestamp_values
+from .dialects import DEFAULT_DIALECT, CsvDialect
+from .mappings import mapping_registry
+from .normalize import column_names, normalize_option_type, normalize_side, to_float
+
+
+# cells pandas.read_csv turns into NaN by default
+CSV_NA_VALUES = {
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+}
+TRUE_TOKENS = {"True", "TRUE", "true"}
+FALSE_TOKENS = {"False", "FALSE", "false"}
+OCC_RE = re.compile(r"^\s*(?:[Oo]:|\.)?([A-Za-z0-9.][A-Za-z0-9. ]{0,5})([0-9]{6})([CcPp])([0-9]{8})\s*$")
+
+
+def is_small_csv(data: Union[bytes, memoryview]) -> bool:
+    max_bytes = int(settings.small_csv_max_kb) * 1024
+    if len(data) > max_bytes:
+        return False
+    # memoryviews have no count(); at this size the copy is cheap
+    lines = data.count(b"\n") if isinstance(data, (bytes, bytearray)) else bytes(data).count(b"\n")
+    return lines <= int(settings.small_csv_max_rows)
+
+
+def _number(cell: str, cast) -> Optional[object]:
+    s = cell.strip()
+    if "_" in s or "nan" in s.lower() or not s.isascii():
+        return None
+    try:
+        return cast(s)
+    except ValueError:
+        return None
+
+
+def _infer(cells: Sequence[Optional[str]]) -> List[object]:
+    """Type one column the way `pd.read_csv` does: bool, int, float (NaN for gaps) or str/None."""
+    values = [None if c is None or c in CSV_NA_VALUES else c for c in cells]
+    present = [v for v in values if v is not None]
+    if not present:
+        return [float("nan")] * len(values)
+    if all(v in TRUE_TOKENS or v in FALSE_TOKENS for v in present):
+        return [None if v is None else v in TRUE_TOKENS for v in values]
+    for cast in (int, float):
+        numbers = []
+        for v in present:
+            n = _number(v, cast)
+            if n is None:
+                break
+            numbers.append(n)
+        else:
+            if cast is int and len(present) < len(values):
+                numbers = [float(n) for n in numbers]
+            it = iter(numbers)
+            return [float("nan") if v is None else next(it) for v in values]
+    return values
+
+
+def _text(v: object) -> str:
+    # `Series.astype(str).str.strip()`: missing cells read back as "nan"
+    return "nan" if v is None else str(v).strip()
+
+
+def decode_occ_symbol(value: object) -> Optional[Tuple[str, str, str, float]]:
+    """Per-value counterpart of `parser.decode_occ_symbols`: (root, expiry, type, strike)."""
+    text = "nan" if value is None else str(value)
+    m = OCC_RE.match(text)
+    if m is None or len(text.rstrip()) > 32:
+        return None
+    root, yymmdd, cp, strike = m.groups()
+    return (
+        root.rstrip().upper(),
+        f"20{yymmdd[:2]}-{yymmdd[2:4]}-{yymmdd[4:]}",
+        cp.upper(),
+        int(strike) / 1000.0,
+    )
+
+
+def parse_small_csv(
+    data: Union[bytes, memoryview],
+    provider: Optional[str] = None,
+    session_date: Optional[str] = None,
+    dialect: CsvDialect = DEFAULT_DIALECT,
+) -> Optional[ColumnarFlowTable]:
+    """Parse a small CSV with the stdlib `csv` module, without importing pandas.
+
+    Produces the same table as the pandas path. Returns None when the file has to go
+    through `pd.read_csv` instead (undecodable text, an empty file or rows wider than
+    the header), so the caller surfaces pandas' own error for those.
+    """
+    try:
+        stream = io.StringIO(str(data, dialect.encoding).lstrip("\ufeff"))
+        for _ in range(dialect.header_row):
+            stream.readline()
+        lines = [r for r in csv.reader(stream, delimiter=dialect.delimiter, quotechar=dialect.quotechar) if r]
+    except (UnicodeDecodeError, csv.Error):
+        return None
+    if not lines:
+        return None
+    header, body = column_names(lines[0]), lines[1:]
+    if any(len(r) > len(header) for r in body):
+        return None
+    mapping = mapping_registry.resolve(header, provider)
+    index = {name: i for i, name in enumerate(header)}
+    n = len(body)
+
+    def cells(field: str) -> Optional[List[Optional[str]]]:
+        name = mapping.get(field)
+        if not name:
+            return None
+        i = index[name]
+        return [None if i >= len(r) or r[i] in CSV_NA_VALUES else r[i] for r in body]
+
+    def column(field: str) -> Optional[List[object]]:
+        # only columns that come back as text need pandas' dtype inference
+        raw = cells(field)
+        return _infer(raw) if raw is not None else None
+
+    none: List[object] = [None] * n
+    raw_symbol, raw_underlying = column("symbol"), column("underlying")
+    symbol = [_text(v) for v in raw_symbol] if raw_symbol is not None else none
+    underlying = [_text(v) for v in raw_underlying] if raw_underlying is not None else none
+    symbol_ok = [bool(s) for s in symbol]
+    underlying_ok = [bool(u) for u in underlying]
+    cols: Dict[str, List[object]] = {
+        "symbol": [s if ok else (u if u_ok else "") for s, u, ok, u_ok in zip(symbol, underlying, symbol_ok, underlying_ok)],
+        "underlying": [u if u_ok else s for s, u, u_ok in zip(symbol, underlying, underlying_ok)],
+    }
+    expiry = column("expiry")
+    if expiry is not None:
+        cols["expiry"], expiry_day = normalize_expiry_values(expiry, provider)
+    else:
+        cols["expiry"], expiry_day = list(none), [NO_DAY] * n
+    opt = cells("option_type")
+    cols["option_type"] = [normalize_option_type(v) for v in opt] if opt is not None else list(none)
+    side = cells("side")
+    cols["side"] = [normalize_side(v) for v in side] if side is not None else ["UNKNOWN"] * n
+    for field in NUMERIC_FIELDS:
+        values = cells(field)
+        cols[field] = [to_float(v) for v in values] if values is not None else list(none)
+    ts = column("timestamp")
+    cols["timestamp"] = [_text(v) for v in ts] if ts is not None else list(none)
+    cols["timestamp_ns"] = normalize_timestamp_values(ts, provider, session_date) if ts is not None else list(none)
+
+    # broker exports often carry only an OCC symbol; fill whatever it can supply
+    occ_field = "occ_symbol" if mapping.get("occ_symbol") else None
+    if not occ_field and mapping.get("symbol") and not (mapping.get("strike") and mapping.get("option_type")):
+        occ_field = "symbol"
+    if occ_field:
+        occ_col = mapping[occ_field]
+        decoded = [decode_occ_symbol(v) for v in column(occ_field)]
+        replace_symbol = occ_col in (mapping.get("symbol"), mapping.get("underlying")) or not any(symbol_ok)
+        for i, parts in enumerate(decoded):
+            if parts is None:
+                continue
+            root, exp, cp, strike = parts
+            if replace_symbol:
+                cols["symbol"][i] = cols["underlying"][i] = root
+            if cols["expiry"][i] is None:
+                cols["expiry"][i], expiry_day[i] = exp, day_number(exp)
+            if cols["option_type"][i] is None:
+                cols["option_type"][i] = cp
+            if cols["strike"][i] is None:
+                cols["strike"][i] = strike
+
+    for i in range(n):
+        if cols["premium"][i] is None and cols["price"][i] is not None and cols["size"][i] is not None:
+            cols["premium"][i] = cols["price"][i] * cols["size"][i] * 100
+
+    # skip malformed rows
+    keep = [i for i in range(n) if cols["strike"][i] is not None and cols["option_type"][i] is not None]
+    records = [{f: values[i] for f, values in cols.items()} for i in keep]
+    table = ColumnarFlowTable.from_records(records, provider)
+    table.expiry_day = np.array([expiry_day[i] for i in keep], dtype=np.int32)
+    return table
@@ -1,30 +1,369 @@
+import hashlib
+import io
+import mmap
 import os
+import tempfile
+import threading
 import uuid
-from typing import Tuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import AsyncIterator, Iterator, Optional, Tuple
+import anyio
 from ..core.config import settings
 
 
+class UploadTooLarge(Exception):
+    pass
+
+
+@contextmanager
+def map_file(path: str) -> Iterator[memoryview]:
+    """Read-only view of a stored file backed by mmap, so parsing it copies nothing up front."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield memoryview(b"")  # mmap cannot map an empty file
+            return
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mm)
+        try:
+            yield view
+        finally:
+            try:
+                view.release()
+                mm.close()
+            except BufferError:
+                pass  # something still points into the map; it is unmapped once that is freed
+
+
+@dataclass(frozen=True)
+class StoredBlob:
+    digest: str  # sha256 of the contents, which is also the blob's name
+    path: str
+    size: int
+    duplicate: bool  # the same bytes were already stored
+
+
+@dataclass(frozen=True)
+class StoredFile:
+    path: str
+    size: int
+    modified: float  # epoch seconds
+
+
 class LocalStorage:
+    """Content-addressed blobs: identical uploads share one file named by its sha256."""
+
     def __init__(self, base_path: str):
         self.base_path = base_path
         os.makedirs(self.base_path, exist_ok=True)
 
-    def save(self, filename: str, data: bytes) -> Tuple[str, str]:
-        ext = os.path.splitext(filename)[1].lower()
-        file_id = str(uuid.uuid4())
-        safe_name = f"{file_id}{ext}"
-        path = os.path.join(self.base_path, safe_name)
-        with open(path, "wb") as f:
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.base_path, "blobs", digest[:2], digest)
+
+    def _temp_path(self) -> str:
+        tmp_dir = os.path.join(self.base_path, "tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        return os.path.join(tmp_dir, f"{uuid.uuid4()}.part")
+
+    def _commit(self, tmp: str, digest: str, size: int) -> StoredBlob:
+        path = self.blob_path(digest)
+        if os.path.exists(path):
+            os.remove(tmp)
+            os.utime(path)  # fresh mtime: the orphan sweep must not take it before the upload row commits
+            return StoredBlob(digest, path, size, duplicate=True)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp, path)  # atomic, so concurrent identical uploads just overwrite each other
+        return StoredBlob(digest, path, size, duplicate=False)
+
+    def key_path(self, key: str) -> str:
+        return os.path.join(self.base_path, *key.split("/"))
+
+    def put(self, key: str, data) -> str:
+        """Store derived data (e.g. parsed-table sidecars) under `key`; returns its path."""
+        path = self.key_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = self._temp_path()
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        return path
+
+    def save(self, filename: str, data: bytes) -> StoredBlob:
+        tmp = self._temp_path()
+        with open(tmp, "wb") as f:
             f.write(data)
-        return file_id, path
+        return self._commit(tmp, hashlib.sha256(data).hexdigest(), len(data))
+
+    async def save_stream(self, filename: str, chunks: AsyncIterator[bytes], max_bytes: int = 0) -> StoredBlob:
+        """Hash and write `chunks` as they arrive, then file the blob under its digest.
+
+        Hashing and disk writes run in a worker thread. Raises `UploadTooLarge` as soon
+        as more than `max_bytes` (when > 0) have arrived, leaving no partial file behind.
+        """
+        tmp = self._temp_path()
+        digest = hashlib.sha256()
+        size = 0
+        f = await anyio.to_thread.run_sync(open, tmp, "wb")
+
+        def write(chunk: bytes) -> None:
+            digest.update(chunk)
+            f.write(chunk)
+
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                if max_bytes > 0 and size > max_bytes:
+                    raise UploadTooLarge(f"upload exceeds {max_bytes} bytes")
+                await anyio.to_thread.run_sync(write, chunk)
+            await anyio.to_thread.run_sync(f.close)
+        except BaseException:
+            f.close()
+            self.delete(tmp)
+            raise
+        return await anyio.to_thread.run_sync(self._commit, tmp, digest.hexdigest(), size)
+
+    def map(self, path: str):
+        return map_file(path)
+
+    def list_files(self, prefix: str) -> Iterator[StoredFile]:
+        for root, _, names in os.walk(self.key_path(prefix)):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue  # removed while walking
+                yield StoredFile(path, st.st_size, st.st_mtime)
+
+    def delete(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+S3_SCHEME = "s3://"
+# S3 rejects multipart parts under 5 MiB (except the last one)
+MIN_PART_BYTES = 5 * 1024 * 1024
+
+
+def is_s3_path(path: str) -> bool:
+    return path.startswith(S3_SCHEME)
+
+
+def _split_s3_path(path: str) -> Tuple[str, str]:
+    bucket, _, key = path[len(S3_SCHEME):].partition("/")
+    return bucket, key
+
+
+@lru_cache(maxsize=None)
+def _pooled_s3_client(
+    endpoint_url: Optional[str],
+    region: Optional[str],
+    access_key: Optional[str],
+    secret_key: Optional[str],
+    max_connections: int,
+):
+    import boto3
+    from botocore.config import Config
+
+    return boto3.session.Session().client(
+        "s3",
+        endpoint_url=endpoint_url,
+        region_name=region,
+        aws_access_key_id=access_key,
+        aws_secret_access_key=secret_key,
+        config=Config(max_pool_connections=max_connections, retries={"max_attempts": 3, "mode": "standard"}),
+    )
+
+
+def s3_client():
+    """One client per process and configuration: boto3 clients are thread-safe, and
+    reusing one keeps its HTTP connection pool warm across requests."""
+    return _pooled_s3_client(
+        settings.s3_endpoint_url or None,
+        settings.s3_region or None,
+        settings.s3_access_key or None,
+        settings.s3_secret_key or None,
+        max(1, int(settings.s3_max_connections)),
+    )
+
+
+class S3RangeReader(io.RawIOBase):
+    """Seekable read-only file over an S3 object, fetched in `block_size` ranged GETs."""
+
+    def __init__(self, client, bucket: str, key: str, block_size: int):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.block_size = block_size
+        self.size = client.head_object(Bucket=bucket, Key=key)["ContentLength"]
+        self.pos = 0
+        self._block_start = 0
+        self._block = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        if self.pos >= self.size:
+            return 0
+        if not self._block_start <= self.pos < self._block_start + len(self._block):
+            end = min(self.size, self.pos + max(len(b), self.block_size)) - 1
+            resp = self.client.get_object(Bucket=self.bucket, Key=self.key, Range=f"bytes={self.pos}-{end}")
+            self._block = resp["Body"].read()
+            self._block_start = self.pos
+        offset = self.pos - self._block_start
+        chunk = memoryview(self._block)[offset : offset + len(b)]
+        n = len(chunk)
+        b[:n] = chunk
+        self.pos += n
+        return n
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self.pos, io.SEEK_END: self.size}[whence]
+        self.pos = max(0, base + offset)
+        return self.pos
+
+    def tell(self) -> int:
+        return self.pos
+
+
+def open_s3(path: str) -> S3RangeReader:
+    bucket, key = _split_s3_path(path)
+    return S3RangeReader(s3_client(), bucket, key, max(MIN_PART_BYTES, int(settings.s3_part_mb) * 1024 * 1024))
 
 
 class S3Storage:
-    def __init__(self, bucket: str):
+    """Content-addressed blobs in an S3-compatible bucket, laid out like `LocalStorage`.
+
+    Uploads larger than one part go up as a multipart upload to their digest key
+    with up to `S3_UPLOAD_CONCURRENCY` parts in flight.
+    """
+
+    def __init__(self, bucket: str, client=None):
         self.bucket = bucket
+        self.client = client or s3_client()
+        self.part_bytes = max(MIN_PART_BYTES, int(settings.s3_part_mb) * 1024 * 1024)
+        self.concurrency = max(1, int(settings.s3_upload_concurrency))
+
+    def blob_key(self, digest: str) -> str:
+        return f"blobs/{digest[:2]}/{digest}"
+
+    def _path(self, key: str) -> str:
+        return f"{S3_SCHEME}{self.bucket}/{key}"
+
+    def _exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") in {"404", "NoSuchKey", "NotFound"}:
+                return False
+            raise
+        return True
+
+    def _put(self, data: bytes, digest: str) -> StoredBlob:
+        key = self.blob_key(digest)
+        if self._exists(key):
+            return StoredBlob(digest, self._path(key), len(data), duplicate=True)
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data)
+        return StoredBlob(digest, self._path(key), len(data), duplicate=False)
+
+    def key_path(self, key: str) -> str:
+        return self._path(key)
+
+    def put(self, key: str, data) -> str:
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=bytes(data))
+        return self._path(key)
+
+    def list_files(self, prefix: str) -> Iterator[StoredFile]:
+        pages = self.client.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Prefix=f"{prefix}/")
+        for page in pages:
+            for obj in page.get("Contents", []):
+                yield StoredFile(self._path(obj["Key"]), obj["Size"], obj["LastModified"].timestamp())
+
+    def save(self, filename: str, data: bytes) -> StoredBlob:
+        return self._put(data, hashlib.sha256(data).hexdigest())
+
+    async def save_stream(self, filename: str, chunks: AsyncIterator[bytes], max_bytes: int = 0) -> StoredBlob:
+        """Hash `chunks` into a local spool file, then upload it straight to its digest key.
+
+        The key is only known once the last chunk is hashed, so nothing goes to S3
+        before that; a duplicate is never uploaded at all. Raises `UploadTooLarge` as
+        soon as more than `max_bytes` (when > 0) have arrived.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        with tempfile.SpooledTemporaryFile(max_size=self.part_bytes) as spool:
+            async for chunk in chunks:
+                size += len(chunk)
+                if max_bytes > 0 and size > max_bytes:
+                    raise UploadTooLarge(f"upload exceeds {max_bytes} bytes")
+                await anyio.to_thread.run_sync(digest.update, chunk)
+                await anyio.to_thread.run_sync(spool.write, chunk)
+            return await anyio.to_thread.run_sync(self._upload, spool, digest.hexdigest(), size)
+
+    def _upload(self, spool, digest: str, size: int) -> StoredBlob:
+        spool.seek(0)
+        if size <= self.part_bytes:
+            return self._put(spool.read(), digest)
+        key = self.blob_key(digest)
+        if self._exists(key):
+            return StoredBlob(digest, self._path(key), size, duplicate=True)
+        upload_id = self.client.create_multipart_upload(Bucket=self.bucket, Key=key)["UploadId"]
+        lock = threading.Lock()
+
+        def upload_part(number: int) -> dict:
+            with lock:  # the spool is one file handle; only the reads are serialized
+                spool.seek((number - 1) * self.part_bytes)
+                body = spool.read(self.part_bytes)
+            resp = self.client.upload_part(
+                Bucket=self.bucket, Key=key, UploadId=upload_id, PartNumber=number, Body=body
+            )
+            return {"PartNumber": number, "ETag": resp["ETag"]}
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                parts = list(pool.map(upload_part, range(1, -(-size // self.part_bytes) + 1)))
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket, Key=key, UploadId=upload_id, MultipartUpload={"Parts": parts}
+            )
+        except BaseException:
+            self.client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+            raise
+        return StoredBlob(digest, self._path(key), size, duplicate=False)
+
+    @contextmanager
+    def map(self, path: str) -> Iterator[memoryview]:
+        """The whole object in memory, fetched as parallel ranged GETs."""
+        bucket, key = _split_s3_path(path)
+        size = self.client.head_object(Bucket=bucket, Key=key)["ContentLength"]
+        data = bytearray(size)
+
+        def fetch(start: int) -> None:
+            end = min(size, start + self.part_bytes) - 1
+            body = self.client.get_object(Bucket=bucket, Key=key, Range=f"bytes={start}-{end}")["Body"].read()
+            data[start : start + len(body)] = body
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            list(pool.map(fetch, range(0, size, self.part_bytes)))
+        # not released on exit: zero-copy readers (e.g. Arrow) may still point into `data`
+        yield memoryview(data)
+
+    def open(self, path: str) -> S3RangeReader:
+        bucket, key = _split_s3_path(path)
+        return S3RangeReader(self.client, bucket, key, self.part_bytes)
 
-    def save(self, filename: str, data: bytes) -> Tuple[str, str]:
-        raise NotImplementedError("S3 storage not wired in MVP. Use local.")
+    def delete(self, path: str) -> None:
+        bucket, key = _split_s3_path(path)
+        self.client.delete_object(Bucket=bucket, Key=key)
 
 
 def get_storage():
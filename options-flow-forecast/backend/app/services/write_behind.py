@@ -0,0 +1,257 @@
+import asyncio
+import base64
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+import anyio
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from ..core.config import settings
+from .. import models
+from ..db import create_writer_engine
+
+logger = logging.getLogger(__name__)
+RETRY_SECONDS = 1.0
+
+
+class WriteBehindMetrics:
+    """Counters for the write-behind queue, read by `GET /db/write-behind`."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.enqueued = 0
+        self.flushed = 0
+        self.flushes = 0
+        self.failures = 0  # flushes that hit a database error and were retried
+        self.dropped = 0  # rows the database rejected (e.g. a duplicate key); logged and skipped
+        self.max_depth = 0
+        self.flush_seconds = 0.0
+        self.last_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+
+    def record_flush(self, rows: int, seconds: float) -> None:
+        self.flushed += rows
+        self.flushes += 1
+        self.flush_seconds += seconds
+        self.last_flush_seconds = seconds
+        self.max_flush_seconds = max(self.max_flush_seconds, seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "enqueued": self.enqueued,
+            "flushed": self.flushed,
+            "flushes": self.flushes,
+            "failures": self.failures,
+            "dropped": self.dropped,
+            "max_depth": self.max_depth,
+            "avg_batch": self.flushed / self.flushes if self.flushes else 0.0,
+            "avg_flush_seconds": self.flush_seconds / self.flushes if self.flushes else 0.0,
+            "last_flush_seconds": self.last_flush_seconds,
+            "max_flush_seconds": self.max_flush_seconds,
+        }
+
+
+write_behind_metrics = WriteBehindMetrics()
+
+
+def spill(records: List[SQLModel], path: str) -> None:
+    """Append `records` to `path`, one JSON line each with the full row, for `read_spill` to replay."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        for record in records:
+            row = record.model_dump()
+            binary = [name for name, value in row.items() if isinstance(value, bytes)]
+            for name in binary:
+                row[name] = base64.b64encode(row[name]).decode("ascii")
+            f.write(json.dumps({"model": type(record).__name__, "row": row, "base64": binary}, default=str) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def read_spill(path: str) -> List[SQLModel]:
+    if not os.path.exists(path):
+        return []
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            row = entry["row"]
+            for name in entry.get("base64", []):
+                row[name] = base64.b64decode(row[name])
+            records.append(getattr(models, entry["model"]).model_validate(row))
+    return records
+
+
+class WriteBehindQueue:
+    """Collects inserts from request handlers and commits them in groups from one background task.
+
+    A batch is written once `batch_size` rows are waiting or `flush_interval` seconds after
+    the first of them arrived. `put` only waits when `max_depth` rows are already queued.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float, max_depth: int, spill_path: Optional[str] = None):
+        self.engine: Optional[AsyncEngine] = None  # set while `run` is going
+        self.spill_path = spill_path  # where rows still queued at the end of `close` are kept
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_depth = max(self.batch_size, max_depth)
+        self.pending: List[SQLModel] = []
+        self.closed = False
+        self._wakeup = asyncio.Event()
+        self._room = asyncio.Condition()
+        self._done = asyncio.Event()
+
+    async def put(self, record: SQLModel) -> None:
+        if self.closed:
+            raise RuntimeError("write-behind queue is closed")
+        if len(self.pending) >= self.max_depth:
+            async with self._room:
+                await self._room.wait_for(lambda: len(self.pending) < self.max_depth)
+        self.pending.append(record)
+        write_behind_metrics.enqueued += 1
+        write_behind_metrics.max_depth = max(write_behind_metrics.max_depth, len(self.pending))
+        if len(self.pending) == 1 or len(self.pending) >= self.batch_size:
+            self._wakeup.set()
+
+    async def run(self) -> None:
+        # a connection of its own: the request pool may be held by requests waiting in `put`
+        self.engine = create_writer_engine()
+        self.replay()
+        try:
+            while not (self.closed and not self.pending):
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                if len(self.pending) < self.batch_size and not self.closed:
+                    with anyio.move_on_after(self.flush_interval):
+                        await self._wakeup.wait()  # the batch filled up or we are shutting down
+                    self._wakeup.clear()
+                if self.pending and not await self.flush():
+                    await anyio.sleep(RETRY_SECONDS)
+                if self.pending or self.closed:
+                    self._wakeup.set()
+        finally:
+            with anyio.CancelScope(shield=True):
+                await self.engine.dispose()
+            self._done.set()
+
+    async def flush(self) -> bool:
+        batch = self.pending[: self.batch_size]
+        start = time.perf_counter()
+        dropped = 0
+        try:
+            try:
+                await self._commit(batch)
+                del self.pending[: len(batch)]
+            except exc.IntegrityError:
+                # one bad row must not hold back the rest: write them one at a time
+                for record in batch:
+                    try:
+                        await self._commit([record])
+                    except exc.IntegrityError:
+                        dropped += 1
+                        logger.error("write-behind: dropping %s %s", type(record).__name__, record.model_dump_json())
+                    self.pending.remove(record)
+        except Exception:
+            write_behind_metrics.failures += 1
+            logger.exception("write-behind: flush of %s rows failed; retrying", len(batch))
+            return False
+        write_behind_metrics.dropped += dropped
+        write_behind_metrics.record_flush(len(batch) - dropped, time.perf_counter() - start)
+        async with self._room:
+            self._room.notify_all()
+        return True
+
+    async def _commit(self, records: List[SQLModel]) -> None:
+        async with AsyncSession(self.engine, expire_on_commit=False) as session:
+            session.add_all(records)
+            await session.commit()
+
+    def replay(self) -> None:
+        """Queue the rows a previous `close` spilled, ahead of anything new."""
+        if not self.spill_path:
+            return
+        records = read_spill(self.spill_path)
+        if records:
+            logger.warning("write-behind: replaying %s rows spilled at the last shutdown", len(records))
+            self.pending[:0] = records
+            self._wakeup.set()
+        if os.path.exists(self.spill_path):
+            os.remove(self.spill_path)
+
+    async def close(self, timeout: float) -> None:
+        """Stop taking rows and wait up to `timeout` seconds for the queued ones to be written.
+
+        Rows still queued after that are spilled to `spill_path` and written on the next start.
+        A batch that was mid-commit may be spilled too; its replay then fails on the primary key
+        and is dropped like any other duplicate.
+        """
+        self.closed = True
+        self._wakeup.set()
+        with anyio.move_on_after(timeout):
+            await self._done.wait()
+        if not self.pending:
+            return
+        if self.spill_path:
+            spill(self.pending, self.spill_path)
+            logger.error(
+                "write-behind: %s rows not written at shutdown, spilled to %s", len(self.pending), self.spill_path
+            )
+            self.pending = []
+        else:
+            logger.error(
+                "write-behind: %s rows not written at shutdown: %s",
+                len(self.pending),
+                [f"{type(r).__name__}:{getattr(r, 'id', None)}" for r in self.pending],
+            )
+
+
+_queue: Optional[WriteBehindQueue] = None
+
+
+def get_write_behind() -> Optional[WriteBehindQueue]:
+    return _queue
+
+
+def start_write_behind() -> Optional[WriteBehindQueue]:
+    global _queue
+    _queue = None
+    if settings.write_behind:
+        _queue = WriteBehindQueue(
+            int(settings.write_behind_batch),
+            float(settings.write_behind_flush_ms) / 1000,
+            int(settings.write_behind_max_depth),
+            settings.write_behind_spill_path,
+        )
+    return _queue
+
+
+async def stop_write_behind() -> None:
+    global _queue
+    if _queue is not None:
+        await _queue.close(float(settings.write_behind_drain_timeout_s))
+    _queue = None
+
+
+async def persist(session: AsyncSession, record: SQLModel) -> None:
+    """Insert `record`: queued when write-behind is on, else committed on the request's session."""
+    queue = get_write_behind()
+    if queue is not None and not queue.closed:  # once shutdown has begun, write directly
+        # end the request's transaction first, so it holds no connection while `put` waits
+        await session.commit()
+        await queue.put(record)
+        return
+    session.add(record)
+    await session.commit()
+
+
+def write_behind_status() -> Dict[str, Any]:
+    queue = get_write_behind()
+    return {"enabled": queue is not None, "depth": len(queue.pending) if queue else 0, **write_behind_metrics.snapshot()}
@@ -0,0 +1,118 @@
+import argparse
+import functools
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+import uuid
+
+
+def percentile(samples, q: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def slow_commits(delay: float) -> None:
+    """Make every SQLite commit take `delay` longer, in whichever thread runs it (the caller's
+    for pysqlite, aiosqlite's worker for the async engine), like a slow disk or a remote DB."""
+
+    class SlowConnection(sqlite3.Connection):
+        def commit(self):
+            time.sleep(delay)
+            super().commit()
+
+    # SQLAlchemy calls sqlite3.dbapi2.connect, aiosqlite calls sqlite3.connect
+    sqlite3.connect = sqlite3.dbapi2.connect = functools.partial(sqlite3.connect, factory=SlowConnection)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="POST /feedback under concurrent clients: sync vs async sessions")
+    parser.add_argument("--requests", type=int, default=1_000)
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--commit-ms", type=float, default=5.0, help="extra latency per SQLite commit")
+    parser.add_argument("--url", help="database URL (default: a temporary SQLite file)")
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ.update(
+        DATABASE_URL=args.url or f"sqlite:///{os.path.join(tmp.name, 'bench.db')}",
+        LOCAL_STORAGE_PATH=os.path.join(tmp.name, "files"),
+        ALLOW_UNSAFE_DEV_NO_API_KEY="1",
+        RATE_LIMIT_PER_MINUTE=str(10**9),
+        RETENTION_INTERVAL_MINUTES="0",
+    )
+    if args.commit_ms and not args.url:
+        slow_commits(args.commit_ms / 1000)
+    import anyio
+    import httpx
+    from fastapi import Depends
+    from sqlmodel import Session
+    from app.db import dispose_async_engine, get_engine
+    from app.main import app, enforce_rate_limit, require_api_key
+    from app.models import Feedback
+    from app.schemas import FeedbackRequest
+
+    @app.post("/bench/sync-feedback")
+    async def sync_feedback(req: FeedbackRequest, _: None = Depends(require_api_key), __: None = Depends(enforce_rate_limit)):
+        # the endpoint as it was: a blocking Session inside `async def`
+        with Session(get_engine()) as session:
+            session.add(Feedback(id=str(uuid.uuid4()), analysis_id=req.analysis_id, correct=req.correct, notes=req.notes))
+            session.commit()
+        return {"status": "ok"}
+
+    @app.get("/bench/ping")
+    async def ping():
+        return {}
+
+    async def run(path: str) -> dict:
+        latencies, stalls = [], []
+        remaining = iter(range(args.requests))
+        body = {"analysis_id": "a", "correct": True, "notes": "x" * 200}
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+
+            async def worker() -> None:
+                for _ in remaining:
+                    t = time.perf_counter()
+                    r = await client.post(path, json=body)
+                    r.raise_for_status()
+                    latencies.append(time.perf_counter() - t)
+
+            async def probe(done: anyio.Event) -> None:
+                # a 10 ms tick plus a request that needs no database; anything beyond
+                # 10 ms is time the event loop spent blocked
+                while not done.is_set():
+                    t = time.perf_counter()
+                    await anyio.sleep(0.01)
+                    await client.get("/bench/ping")
+                    stalls.append(time.perf_counter() - t - 0.01)
+
+            done = anyio.Event()
+            start = time.perf_counter()
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(probe, done)
+                async with anyio.create_task_group() as workers:
+                    for _ in range(args.clients):
+                        workers.start_soon(worker)
+                done.set()
+            elapsed = time.perf_counter() - start
+        await dispose_async_engine()  # its connections belong to this event loop
+        return {
+            "rps": args.requests / elapsed,
+            "p50": statistics.median(latencies),
+            "p99": percentile(latencies, 0.99),
+            "stall_p99": percentile(stalls, 0.99),
+            "stall_max": max(stalls),
+        }
+
+    print(f"url={os.environ['DATABASE_URL']} requests={args.requests} clients={args.clients} commit +{args.commit_ms} ms")
+    for name, path in [("sync", "/bench/sync-feedback"), ("async", "/feedback")]:
+        r = anyio.run(run, path)
+        print(
+            f"{name:6} {r['rps']:7.0f} req/s  p50 {r['p50'] * 1e3:7.1f} ms  p99 {r['p99'] * 1e3:7.1f} ms"
+            f"  loop stall p99 {r['stall_p99'] * 1e3:6.1f} ms  max {r['stall_max'] * 1e3:6.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
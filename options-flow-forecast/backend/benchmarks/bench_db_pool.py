@@ -0,0 +1,55 @@
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-request DB overhead: an engine per request vs the pooled engine")
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--url", help="database URL (default: a temporary SQLite file)")
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    url = args.url or f"sqlite:///{os.path.join(tmp.name, 'bench.db')}"
+    os.environ["DATABASE_URL"] = url
+    from sqlmodel import Session, create_engine, select
+    from app import models
+    from app.db import get_session, init_db, pool_status
+
+    init_db()
+
+    def query(session: Session) -> None:
+        session.exec(select(models.Upload).where(models.Upload.id == "missing")).first()
+
+    def per_request() -> float:
+        start = time.perf_counter()
+        with Session(create_engine(url, echo=False)) as session:  # what get_session used to do
+            query(session)
+        return time.perf_counter() - start
+
+    def pooled() -> float:
+        start = time.perf_counter()
+        sessions = get_session()
+        query(next(sessions))
+        sessions.close()
+        return time.perf_counter() - start
+
+    print(f"url={url} requests={args.requests} concurrency={args.concurrency}")
+    for name, fn in [("per-request", per_request), ("pooled", pooled)]:
+        with ThreadPoolExecutor(args.concurrency) as pool:
+            start = time.perf_counter()
+            samples = sorted(pool.map(lambda _: fn(), range(args.requests)))
+            elapsed = time.perf_counter() - start
+        print(
+            f"{name:12} {args.requests / elapsed:8.0f} req/s  p50 {statistics.median(samples) * 1e3:6.2f} ms"
+            f"  p99 {samples[int(len(samples) * 0.99)] * 1e3:6.2f} ms"
+        )
+    print(pool_status())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def write_workbook(path: str, rows: int) -> None:
+    import openpyxl
+    from benchmarks.bench_parser import make_flow_frame
+
+    df = make_flow_frame(rows)
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("flow")
+    ws.append(list(df.columns))
+    for row in df.itertuples(index=False):
+        ws.append([None if v != v else (v.item() if hasattr(v, "item") else v) for v in row])
+    wb.save(path)
+
+
+def worker(path: str, mode: str) -> None:
+    import pandas as pd
+    from app.services.columnar import ColumnarFlowTable
+    from app.services.mappings import mapping_registry
+    from app.services.parser import _normalize_frame, parse_flow_file
+
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if mode == "stream":
+        table = parse_flow_file(path, XLSX)
+    else:
+        df = pd.read_excel(path)
+        table = ColumnarFlowTable.from_frame(_normalize_frame(df, mapping_registry.resolve(df.columns)))
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"seconds": elapsed, "rows": len(table), "base_mb": base / 1024, "peak_mb": peak / 1024}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streamed read-only workbook parsing vs pd.read_excel")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--batch-rows", type=int, default=50_000)
+    parser.add_argument("--worker", choices=["write", "stream", "read_excel"], help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker == "write":
+        write_workbook(args.path, args.rows)
+        return
+    if args.worker:
+        worker(args.path, args.worker)
+        return
+
+    with tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False) as f:
+        path = f.name
+    try:
+        # every step runs in its own interpreter: peak RSS survives exec, so a parent
+        # that built the workbook would inflate the workers' numbers
+        start = time.perf_counter()
+        cmd = [sys.executable, "-m", "benchmarks.bench_excel", "--worker", "write", "--path", path, "--rows", str(args.rows)]
+        subprocess.run(cmd, check=True)
+        print(f"rows={args.rows} size={os.path.getsize(path) / 1e6:.1f} MB (written in {time.perf_counter() - start:.1f}s)")
+        env = {**os.environ, "PARSE_BATCH_ROWS": str(args.batch_rows)}
+        for mode in ("stream", "read_excel"):
+            cmd = [sys.executable, "-m", "benchmarks.bench_excel", "--worker", mode, "--path", path]
+            r = json.loads(subprocess.run(cmd, env=env, capture_output=True, text=True, check=True).stdout)
+            print(
+                f"{mode:10} {r['seconds']:8.2f}s  {r['rows'] / r['seconds']:10,.0f} rows/s"
+                f"  peak RSS {r['peak_mb']:7.1f} MB (after imports {r['base_mb']:.1f} MB)"
+            )
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import argparse
+import os
+import tempfile
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Filling FlowRowRecord: bulk insert paths vs per-row ORM adds")
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--orm-rows", type=int, default=50_000, help="rows for the (slow) per-row ORM baseline")
+    parser.add_argument("--url", help="database URL (default: a temporary SQLite file); Postgres URLs use COPY")
+    args = parser.parse_args()
+
+    import anyio
+    from sqlalchemy import delete
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlmodel import Session, SQLModel, create_engine
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    from benchmarks.bench_parser import make_flow_frame
+    from app.db import async_database_url
+    from app.models import FlowRowRecord
+    from app.services.flow_rows import COLUMNS, insert_flow_rows, insert_flow_rows_async, iter_row_batches
+    from app.services.parser import parse_csv_columnar
+
+    table = parse_csv_columnar(make_flow_frame(args.rows).to_csv(index=False).encode(), "uw")
+    tmp = tempfile.TemporaryDirectory()
+    url = args.url or f"sqlite:///{os.path.join(tmp.name, 'bench.db')}"
+    engine = create_engine(url)
+    SQLModel.metadata.create_all(engine, tables=[FlowRowRecord.__table__])
+
+    def clear() -> None:
+        with Session(engine) as session:
+            session.exec(delete(FlowRowRecord))
+            session.commit()
+
+    def report(name: str, rows: int, seconds: float) -> None:
+        print(f"{name:22} {rows:8d} rows {seconds:7.2f}s {rows / seconds:10,.0f} rows/s")
+
+    print(f"url={url}")
+    clear()
+    start = time.perf_counter()
+    with Session(engine) as session:
+        for batch in iter_row_batches("orm", table.take(range(min(args.orm_rows, len(table)))), 10_000):
+            for values in batch:
+                session.add(FlowRowRecord(**dict(zip(COLUMNS, values))))
+        session.commit()
+    report("orm add per row", min(args.orm_rows, len(table)), time.perf_counter() - start)
+
+    clear()
+    start = time.perf_counter()
+    with Session(engine) as session:
+        insert_flow_rows(session, "sync", table)
+        session.commit()
+    report(f"bulk ({engine.dialect.driver})", len(table), time.perf_counter() - start)
+
+    async def run_async() -> float:
+        async_engine = create_async_engine(async_database_url(url))
+        start = time.perf_counter()
+        async with AsyncSession(async_engine) as session:
+            await insert_flow_rows_async(session, "async", table)
+            await session.commit()
+        elapsed = time.perf_counter() - start
+        driver = async_engine.dialect.driver
+        await async_engine.dispose()
+        return driver, elapsed
+
+    clear()
+    driver, elapsed = anyio.run(run_async)
+    report(f"bulk ({driver})", len(table), elapsed)
+    clear()
+
+
+if __name__ == "__main__":
+    main()
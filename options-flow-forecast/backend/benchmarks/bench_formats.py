@@ -0,0 +1,46 @@
+import argparse
+import pyarrow as pa
+import pyarrow.parquet as pq
+from app.services.parser import parse_flow_stream
+from benchmarks.bench_parser import make_flow_frame, timed
+
+
+def typed_frame(n_rows: int):
+    df = make_flow_frame(n_rows)
+    # warehouse exports carry real numeric types, not "$1,234.50" strings
+    df["price"] = df["price"].str.replace("[$,]", "", regex=True).astype(float)
+    df["iv"] = df["iv"].str.rstrip("%").astype(float)
+    return df
+
+
+def encode_all(df):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    parquet = pa.BufferOutputStream()
+    pq.write_table(table, parquet)
+    ipc = pa.BufferOutputStream()
+    with pa.ipc.new_file(ipc, table.schema) as writer:
+        writer.write_table(table)
+    return {
+        "text/csv": df.to_csv(index=False).encode("utf-8"),
+        "application/vnd.apache.parquet": parquet.getvalue().to_pybytes(),
+        "application/vnd.apache.arrow.file": ipc.getvalue().to_pybytes(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare CSV, Parquet and Arrow IPC flow ingest")
+    parser.add_argument("--rows", type=int, default=400_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    payloads = encode_all(typed_frame(args.rows))
+    baseline = None
+    print(f"rows={args.rows}")
+    for content_type, data in payloads.items():
+        elapsed = timed(parse_flow_stream, data, content_type, repeat=args.repeat)
+        baseline = baseline or elapsed
+        print(f"{content_type:36s} {len(data) / 1e6:7.1f} MB  {elapsed:7.3f}s  {baseline / elapsed:5.1f}x vs csv")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+SYMBOLS = ["SPX", "SPY", "QQQ", "IWM", "NDX", "AAPL", "TSLA", "NVDA", "AMZN", "META"]
+
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GET /analyses queries on a large Analysis table: OFFSET vs keyset")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--page", type=int, default=50)
+    parser.add_argument("--depth", type=int, default=2_000, help="page number for the deep-page measurements")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    from sqlalchemy import text
+    from sqlmodel import Session, SQLModel, create_engine, select
+    from app.models import Analysis
+    from app.services.listing import ANALYSIS_COLUMNS, list_analyses
+
+    tmp = tempfile.TemporaryDirectory()
+    engine = create_engine(f"sqlite:///{os.path.join(tmp.name, 'bench.db')}")
+    SQLModel.metadata.create_all(engine, tables=[Analysis.__table__])
+    indexes = [i for i in Analysis.__table__.indexes]
+    for index in indexes:
+        index.drop(engine)
+
+    rng = random.Random(7)
+    start_day = date(2022, 1, 3)
+    result_json = '{"status": "ok", "confidence": 0.55, "forecast": {"scenarios": []}}'
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        batch = []
+        for i in range(args.rows):
+            day = (start_day + timedelta(days=rng.randrange(1000))).isoformat()
+            batch.append((f"{rng.getrandbits(128):032x}", rng.choice(SYMBOLS), day, "u", None, result_json, datetime(2026, 1, 1)))
+            if len(batch) == 50_000 or i == args.rows - 1:
+                conn.exec_driver_sql(
+                    "INSERT INTO analysis (id, symbol, date, flow_upload_id, chart_upload_id, result_json, created_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    batch,
+                )
+                batch = []
+    print(f"rows={args.rows} (loaded in {time.perf_counter() - start:.1f}s) page={args.page} depth={args.depth}")
+
+    filters = dict(symbol="SPX", date_from=date(2022, 6, 1), date_to=date(2024, 6, 1))
+
+    def offset_query(session: Session, page: int) -> None:
+        stmt = (
+            select(*ANALYSIS_COLUMNS)
+            .where(Analysis.symbol == filters["symbol"])
+            .where(Analysis.date >= filters["date_from"].isoformat(), Analysis.date <= filters["date_to"].isoformat())
+            .order_by(Analysis.date.desc(), Analysis.id.desc())
+            .offset(page * args.page)
+            .limit(args.page)
+        )
+        session.exec(stmt).all()
+
+    def deep_cursor(session: Session) -> str:
+        cursor = None
+        for _ in range(args.depth):
+            _, cursor = list_analyses(session, **filters, limit=args.page, cursor=cursor)
+        return cursor
+
+    with Session(engine) as session:
+        results = {
+            "offset, no index": (timed(lambda: offset_query(session, 0), args.repeat),
+                                 timed(lambda: offset_query(session, args.depth), args.repeat)),
+        }
+        for index in indexes:
+            index.create(engine)
+        session.exec(text("ANALYZE"))
+        results["offset, indexed"] = (timed(lambda: offset_query(session, 0), args.repeat),
+                                      timed(lambda: offset_query(session, args.depth), args.repeat))
+        cursor = deep_cursor(session)
+        results["keyset, indexed"] = (
+            timed(lambda: list_analyses(session, **filters, limit=args.page), args.repeat),
+            timed(lambda: list_analyses(session, **filters, limit=args.page, cursor=cursor), args.repeat),
+        )
+    for name, (first, deep) in results.items():
+        print(f"{name:18} first page {first * 1e3:8.2f} ms   page {args.depth} {deep * 1e3:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
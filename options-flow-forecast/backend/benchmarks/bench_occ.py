@@ -0,0 +1,51 @@
+import argparse
+import re
+import numpy as np
+import pandas as pd
+from app.services.parser import decode_occ_symbols
+from benchmarks.bench_parser import timed
+
+OCC_RE = re.compile(r"^([A-Z.]{1,6})\s*(\d{2})(\d{2})(\d{2})([CP])(\d{8})$")
+
+
+def make_occ_symbols(n: int, seed: int = 7) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    roots = rng.choice(["SPXW", "SPX", "SPY", "QQQ", "AAPL", "TSLA"], n)
+    days = rng.choice(["260204", "260205", "260220", "260320"], n)
+    cps = rng.choice(["C", "P"], n)
+    strikes = (rng.integers(100, 7000, n) * 1000).astype(str)
+    return pd.Series([f"{r:<6}{d}{c}{k:>08}" for r, d, c, k in zip(roots, days, cps, strikes)])
+
+
+def decode_regex(col: pd.Series):
+    out = []
+    for v in col:
+        m = OCC_RE.match(v)
+        if m:
+            out.append((m[1], f"20{m[2]}-{m[3]}-{m[4]}", m[5], int(m[6]) / 1000.0))
+        else:
+            out.append((None, None, None, None))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCC symbol decoding throughput")
+    parser.add_argument("--symbols", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    col = make_occ_symbols(args.symbols)
+    decoded = decode_occ_symbols(col)
+    assert decoded["strike"].notna().all()
+    assert list(decoded.iloc[0]) == list(decode_regex(col[:1])[0])
+
+    vectorized = timed(decode_occ_symbols, col, repeat=args.repeat)
+    per_row = timed(decode_regex, col, repeat=args.repeat)
+    print(f"symbols={args.symbols} distinct={col.nunique()}")
+    print(f"per-row regex {per_row:7.3f}s  {args.symbols / per_row:12,.0f} symbols/s")
+    print(f"vectorized    {vectorized:7.3f}s  {args.symbols / vectorized:12,.0f} symbols/s")
+    print(f"speedup       {per_row / vectorized:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import argparse
+import os
+import tempfile
+from app.services.parser import parse_csv_parallel, parse_csv_stream
+from benchmarks.bench_parser import make_flow_csv, timed
+
+
+def parse_serial(path: str):
+    with open(path, "rb") as f:
+        return parse_csv_stream(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare serial and process-pool parsing of one large CSV")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile(suffix=".csv", delete=False) as f:
+        f.write(make_flow_csv(args.rows))
+        path = f.name
+    try:
+        parse_csv_parallel(path, workers=args.workers)  # warm the pool
+        serial = timed(parse_serial, path, repeat=args.repeat)
+        parallel = timed(parse_csv_parallel, path, None, args.workers, repeat=args.repeat)
+        print(f"rows={args.rows} size={os.path.getsize(path) / 1e6:.1f} MB workers={args.workers}")
+        print(f"serial   {serial:8.3f}s")
+        print(f"parallel {parallel:8.3f}s")
+        print(f"speedup  {serial / parallel:8.2f}x")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
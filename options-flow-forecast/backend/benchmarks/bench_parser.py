@@ -0,0 +1,63 @@
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from app.services.parser import parse_csv_bytes, parse_csv_bytes_rowwise, parse_csv_columnar
+
+
+def make_flow_frame(n_rows: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    strikes = 6800 + 5 * rng.integers(0, 60, n_rows)
+    price = rng.uniform(0.5, 40.0, n_rows).round(2)
+    size = rng.integers(1, 500, n_rows)
+    df = pd.DataFrame({
+        "symbol": rng.choice(["SPXW", "SPX", "SPY", "QQQ"], n_rows),
+        "expiry": rng.choice(["2026-02-04", "2026-02-05", "2026-02-06"], n_rows),
+        "strike": strikes,
+        "type": rng.choice(["C", "P", "Call", "Put"], n_rows),
+        "side": rng.choice(["Ask", "Bid", "Mid", "Above Ask", ""], n_rows),
+        "price": [f"${p:,.2f}" for p in price],
+        "size": size,
+        "premium": np.where(rng.random(n_rows) < 0.3, np.nan, price * size * 100),
+        "iv": [f"{v:.1f}%" for v in rng.uniform(8, 40, n_rows)],
+        "delta": rng.uniform(-1, 1, n_rows).round(3),
+        "time": rng.choice(["09:31", "10:15", "12:00", "15:59"], n_rows),
+    })
+    return df
+
+
+def make_flow_csv(n_rows: int, seed: int = 7) -> bytes:
+    return make_flow_frame(n_rows, seed).to_csv(index=False).encode("utf-8")
+
+
+def timed(fn, *args, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare row-wise and vectorized CSV parsing")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    data = make_flow_csv(args.rows)
+    exclude = {"rows": {"__all__": {"timestamp_ns"}}}
+    assert parse_csv_bytes(data).model_dump(exclude=exclude) == parse_csv_bytes_rowwise(data).model_dump(exclude=exclude)
+
+    rowwise = timed(parse_csv_bytes_rowwise, data, repeat=args.repeat)
+    vectorized = timed(parse_csv_bytes, data, repeat=args.repeat)
+    columnar = timed(parse_csv_columnar, data, repeat=args.repeat)
+    print(f"rows={args.rows} bytes={len(data)}")
+    print(f"rowwise    {rowwise:8.3f}s  {args.rows / rowwise:12,.0f} rows/s")
+    print(f"vectorized {vectorized:8.3f}s  {args.rows / vectorized:12,.0f} rows/s")
+    print(f"columnar   {columnar:8.3f}s  {args.rows / columnar:12,.0f} rows/s")
+    print(f"speedup    {rowwise / vectorized:8.1f}x (rows)  {rowwise / columnar:8.1f}x (columnar)")
+
+
+if __name__ == "__main__":
+    main()
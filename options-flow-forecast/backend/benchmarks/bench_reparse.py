@@ -0,0 +1,91 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+
+def rss_anon_mb() -> float:
+    # private memory only; mapped file pages are page cache the kernel can drop
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("RssAnon:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def worker(path: str, mode: str) -> None:
+    from app.services.parser import parse_csv_columnar
+    from app.services.storage import map_file
+
+    import pandas  # noqa: F401  (import cost stays out of the measured peak)
+
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    anon = [rss_anon_mb()]
+    done = threading.Event()
+
+    def sample() -> None:
+        while not done.wait(0.005):
+            anon.append(rss_anon_mb())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    start = time.perf_counter()
+    if mode == "read":
+        with open(path, "rb") as f:
+            rows = len(parse_csv_columnar(f.read()))
+    else:
+        with map_file(path) as view:
+            rows = len(parse_csv_columnar(view))
+    elapsed = time.perf_counter() - start
+    done.set()
+    sampler.join()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        "seconds": elapsed,
+        "rows": rows,
+        "base_mb": base / 1024,
+        "peak_mb": peak / 1024,
+        "anon_base_mb": anon[0],
+        "anon_peak_mb": max(anon),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-parsing a stored CSV: read into bytes vs memory-mapped")
+    parser.add_argument("--rows", type=int, default=400_000)
+    parser.add_argument("--worker", choices=["write", "read", "mmap"], help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker == "write":
+        from benchmarks.bench_parser import make_flow_frame
+
+        make_flow_frame(args.rows).to_csv(args.path, index=False)
+        return
+    if args.worker:
+        worker(args.path, args.worker)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "flow.csv")
+        # written in a child too: peak RSS survives exec, so the parent has to stay small
+        cmd = [sys.executable, "-m", "benchmarks.bench_reparse", "--worker", "write", "--path", path, "--rows", str(args.rows)]
+        subprocess.run(cmd, check=True)
+        print(f"rows={args.rows} size={os.path.getsize(path) / 1e6:.1f} MB")
+        for mode in ("read", "mmap"):
+            cmd = [sys.executable, "-m", "benchmarks.bench_reparse", "--worker", mode, "--path", path]
+            r = json.loads(subprocess.run(cmd, capture_output=True, text=True, check=True).stdout.splitlines()[-1])
+            # mapped pages still show up in RSS once touched, so private memory is reported too
+            print(
+                f"{mode:5} {r['seconds']:6.2f}s  peak RSS {r['peak_mb']:7.1f} MB"
+                f"  (+{r['peak_mb'] - r['base_mb']:.1f} MB over imports)"
+                f"  peak private +{r['anon_peak_mb'] - r['anon_base_mb']:.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
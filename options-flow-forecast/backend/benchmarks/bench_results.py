@@ -0,0 +1,126 @@
+import argparse
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+
+def median_of(repeat: int, fn) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def make_response(table):
+    from app.main import DISCLAIMER
+    from app.schemas import AnalyzeResponse
+    from app.services.analyze import analyze_flow
+
+    features, forecast, key_levels, rationale = analyze_flow(table)
+    return AnalyzeResponse(
+        status="ok",
+        parsed_flow_table=table.to_flow_table(),
+        engineered_features=features,
+        forecast=forecast,
+        key_levels=key_levels,
+        rationale=rationale,
+        confidence=0.55,
+        disclaimer=DISCLAIMER,
+        observed={"rows": len(table)},
+        inferences={"key_levels": [k.model_dump() for k in key_levels]},
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analysis.result_json: plain JSON vs zstd (with and without a dictionary)")
+    parser.add_argument("--analyses", type=int, default=200)
+    parser.add_argument("--rows", type=int, default=5000, help="flow rows per analysis")
+    parser.add_argument("--train", type=int, default=1000, help="synthetic payloads to train a dictionary on")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save-dict", help="write the dictionary trained here to this path")
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ.update(
+        DATABASE_URL=f"sqlite:///{os.path.join(tmp.name, 'bench.db')}",
+        LOCAL_STORAGE_PATH=os.path.join(tmp.name, "files"),
+        ALLOW_UNSAFE_DEV_NO_API_KEY="1",
+        RATE_LIMIT_PER_MINUTE=str(10**9),
+        RETENTION_INTERVAL_MINUTES="0",
+    )
+    import zstandard
+    from fastapi.testclient import TestClient
+    from sqlmodel import Session
+    from app.db import get_engine
+    from app.main import app
+    from app.models import Analysis
+    from app.schemas import AnalyzeResponse
+    from app.services import results
+    from app.services.parser import parse_csv_columnar
+    from benchmarks.bench_parser import make_flow_frame
+
+    def table(seed: int, rows: int):
+        return parse_csv_columnar(make_flow_frame(rows, seed).to_csv(index=False).encode(), "uw")
+
+    # training payloads come from other seeds than the measured ones
+    samples = [results.result_payload(make_response(table(10_000 + i, 200))) for i in range(args.train)]
+    trained = results.train_dictionary(samples)
+    if args.save_dict:
+        with open(args.save_dict, "wb") as f:
+            f.write(trained.as_bytes())
+    codecs = {
+        "zstd": zstandard.ZstdCompressor(level=results.LEVEL),
+        "zstd+trained": zstandard.ZstdCompressor(level=results.LEVEL, dict_data=trained),
+    }
+    if results.dictionaries():
+        codecs["zstd+shipped"] = results._compressor()
+
+    tables = [table(i, args.rows) for i in range(args.analyses)]
+    responses = [make_response(t) for t in tables]
+    plain = [r.model_dump_json().encode() for r in responses]
+    payloads = [results.result_payload(r) for r in responses]
+    sizes = {"plain json": sum(map(len, plain)), "json w/o table": sum(map(len, payloads))}
+    blobs = {}
+    for name, cctx in codecs.items():
+        blobs[name] = [cctx.compress(p) for p in payloads]
+        sizes[name] = sum(map(len, blobs[name]))
+    print(f"analyses={args.analyses} rows={args.rows} dict={len(trained.as_bytes())} bytes trained on {args.train}")
+    for name, size in sizes.items():
+        print(f"{name:15} {size / args.analyses:12,.0f} B/analysis   {sizes['plain json'] / size:8.1f}x smaller")
+    small = {name: sum(map(len, b)) for name, b in blobs.items()}
+    print("result only:   " + "   ".join(f"{n} {sizes['json w/o table'] / s:.1f}x" for n, s in small.items()))
+
+    blob = blobs["zstd+trained"][0]
+    decode = {
+        "plain json": lambda: results.load_result(None, plain[0].decode()),
+        "zstd+trained": lambda: zstandard.ZstdDecompressor(dict_data=trained).decompress(blob),
+    }
+    for name, fn in decode.items():
+        print(f"decode {name:13} {median_of(args.repeat, fn) * 1e3:9.3f} ms")
+
+    # reads through GET /analyses/{id}: a row stored the old way vs one written by /analyze
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    client = TestClient(app)
+    csv = make_flow_frame(args.rows, 0).to_csv(index=False).encode()
+    upload_id = client.post("/ingest/flow", files={"file": ("flow.csv", csv, "text/csv")}, params={"provider": "uw"}).json()["upload_id"]
+    analyzed = client.post("/analyze", json={"symbol": "SPX", "date": "2026-02-04", "flow_upload_id": upload_id}).json()
+    with Session(get_engine()) as session:
+        stored = session.get(Analysis, client.get("/analyses").json()["items"][0]["id"])
+        legacy = Analysis(id="legacy", symbol="SPX", date="2026-02-04", flow_upload_id=upload_id,
+                          result_json=AnalyzeResponse.model_validate(analyzed).model_dump_json())
+        session.add(legacy)
+        session.commit()
+        print(f"stored row: result_json {len(legacy.result_json):,} B  ->  result_zstd {len(stored.result_zstd):,} B")
+        stored_id = stored.id
+    assert client.get(f"/analyses/{stored_id}").json() == client.get("/analyses/legacy").json()
+    for name, analysis_id in [("plain json", "legacy"), ("zstd + sidecar", stored_id)]:
+        elapsed = median_of(args.repeat, lambda: client.get(f"/analyses/{analysis_id}"))
+        print(f"GET /analyses/{{id}} {name:15} {elapsed * 1e3:9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compacting per-upload sidecars into daily per-symbol partitions")
+    parser.add_argument("--uploads", type=int, default=500)
+    parser.add_argument("--rows", type=int, default=2_000, help="rows per upload")
+    parser.add_argument("--days", type=int, default=5)
+    args = parser.parse_args()
+
+    import json
+    from sqlmodel import Session, SQLModel, create_engine, select
+    from benchmarks.bench_parser import make_flow_frame
+    from app.models import ParsedUpload
+    from app.services.parser import parse_csv_columnar
+    from app.services.retention import RetentionReport, compact_parsed
+    from app.services.sidecar import dump_sidecar, load_partitioned, load_sidecar, sidecar_key, summary_json
+    from app.services.storage import LocalStorage
+
+    frame = make_flow_frame(args.rows * 4)
+    symbols = ["SPY", "QQQ", "IWM", "AAPL", "TSLA", "NVDA", "AMZN", "META"]
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    start_day = datetime(2026, 2, 2, 15)
+    with tempfile.TemporaryDirectory() as tmp, Session(engine) as session:
+        storage = LocalStorage(tmp)
+        for i in range(args.uploads):
+            chunk = frame.iloc[(i % 4) * args.rows : (i % 4 + 1) * args.rows].copy()
+            chunk["symbol"] = [symbols[(i + j) % 3 + i % 6] for j in range(len(chunk))]
+            table = parse_csv_columnar(chunk.to_csv(index=False).encode(), "uw")
+            key = f"{i:064x}"
+            path = storage.put(sidecar_key(key), dump_sidecar(table))
+            session.add(ParsedUpload(key=key, digest=key, metadata_json=summary_json(table, path), row_count=len(table),
+                                     sidecar_path=path, created_at=start_day + timedelta(days=i % args.days)))
+        session.commit()
+
+        def disk() -> tuple:
+            files = [os.path.join(r, n) for r, _, names in os.walk(tmp) for n in names]
+            return len(files), sum(os.path.getsize(f) for f in files)
+
+        def load_all() -> float:
+            t = time.perf_counter()
+            for p in session.exec(select(ParsedUpload)).all():
+                if p.sidecar_path:
+                    load_sidecar(p.sidecar_path)
+                else:
+                    load_partitioned(p.key, json.loads(p.metadata_json)["partitions"], "uw")
+            return (time.perf_counter() - t) / args.uploads
+
+        files, size = disk()
+        load_before = load_all()
+        report = RetentionReport()
+        t = time.perf_counter()
+        compact_parsed(session, storage, report, start_day + timedelta(days=args.days))
+        elapsed = time.perf_counter() - t
+        after_files, after_size = disk()
+        load_after = load_all()
+    print(f"uploads={args.uploads} rows/upload={args.rows} days={args.days}")
+    print(f"before   {files:6d} files {size / 1e6:8.1f} MB  load/upload {load_before * 1e3:6.2f} ms")
+    print(f"after    {after_files:6d} files {after_size / 1e6:8.1f} MB  load/upload {load_after * 1e3:6.2f} ms")
+    print(f"compaction {elapsed:.2f}s  {report.as_dict()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+
+def best_of(repeat: int, fn) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reloading a parsed table: metadata_json rows vs an Arrow IPC sidecar")
+    parser.add_argument("--rows", type=int, default=400_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    from benchmarks.bench_parser import make_flow_frame
+    from app.services.columnar import ColumnarFlowTable
+    from app.services.parser import parse_csv_columnar
+    from app.services.sidecar import dump_sidecar, load_sidecar, summary_json
+
+    table = parse_csv_columnar(make_flow_frame(args.rows).to_csv(index=False).encode(), "uw")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "table.arrow")
+
+        def write_json() -> str:
+            return json.dumps({"provider": table.provider, "rows": table.to_records()})
+
+        def write_sidecar() -> None:
+            with open(path, "wb") as f:
+                f.write(dump_sidecar(table))
+
+        text = write_json()
+        write_sidecar()
+        assert load_sidecar(path).to_records()[:100] == table.to_records()[:100]
+        results = {
+            "json": {
+                "write": best_of(args.repeat, write_json),
+                "load": best_of(args.repeat, lambda: ColumnarFlowTable.from_records(json.loads(text)["rows"], "uw")),
+                "bytes": len(text.encode()),
+            },
+            "sidecar": {
+                "write": best_of(args.repeat, write_sidecar),
+                "load": best_of(args.repeat, lambda: load_sidecar(path)),
+                "bytes": os.path.getsize(path),
+            },
+        }
+    print(f"rows={len(table)}  summary row {len(summary_json(table, path))} bytes")
+    for name, r in results.items():
+        print(
+            f"{name:8} write {r['write'] * 1e3:8.1f} ms  load {r['load'] * 1e3:8.1f} ms"
+            f"  size {r['bytes'] / 1e6:7.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+
+def make_small_csv(n_rows: int) -> bytes:
+    lines = ["symbol,expiry,strike,type,side,price,size,premium,iv,delta,time"]
+    for i in range(n_rows):
+        cp = "Call" if i % 2 else "Put"
+        lines.append(f"SPXW,2026-02-04,{6800 + 5 * (i % 40)},{cp},Ask,${1 + i % 30}.25,{1 + i % 90},,{10 + i % 20}%,0.3,09:{30 + i % 30:02d}")
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def worker(rows: int, repeat: int) -> None:
+    data = make_small_csv(rows)
+    start = time.perf_counter()
+    from app.services.parser import parse_csv_bytes
+
+    parse_csv_bytes(data)
+    cold = time.perf_counter() - start
+    samples = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        parse_csv_bytes(data)
+        samples.append(time.perf_counter() - t)
+    print(json.dumps({
+        "cold": cold,
+        "p50": statistics.median(samples),
+        "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "pandas": "pandas" in sys.modules,
+    }))
+
+
+def run(rows: int, repeat: int, env: dict) -> dict:
+    cmd = [sys.executable, "-m", "benchmarks.bench_smallcsv", "--worker", "--rows", str(rows), "--repeat", str(repeat)]
+    out = subprocess.run(cmd, env={**os.environ, **env}, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency and peak RSS of the stdlib and pandas CSV paths")
+    parser.add_argument("--rows", type=int, default=150)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        worker(args.rows, args.repeat)
+        return
+
+    # each path runs in a fresh interpreter so import cost and peak RSS are its own
+    stdlib = run(args.rows, args.repeat, {})
+    pandas = run(args.rows, args.repeat, {"SMALL_CSV_MAX_ROWS": "0"})
+    print(f"rows={args.rows} repeat={args.repeat}")
+    for name, r in [("stdlib", stdlib), ("pandas", pandas)]:
+        print(f"{name:6} cold {r['cold'] * 1e3:8.1f} ms  p50 {r['p50'] * 1e3:7.2f} ms  rss {r['rss_mb']:6.1f} MB  pandas loaded={r['pandas']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import argparse
+import hashlib
+import logging
+import os
+import tempfile
+import time
+import anyio
+from app.core.config import settings
+from app.services.storage import LocalStorage, S3Storage
+
+MB = 1024 * 1024
+
+
+async def _chunks(data: bytes, size: int = MB):
+    for i in range(0, len(data), size):
+        yield data[i : i + size]
+
+
+def measure(storage, data: bytes, rounds: int) -> tuple[float, float]:
+    write = read = 0.0
+    for _ in range(rounds):
+        # fresh bytes every round, otherwise every write after the first is a dedup hit
+        payload = os.urandom(16) + data
+        start = time.perf_counter()
+        stored = anyio.run(storage.save_stream, "flow.bin", _chunks(payload))
+        write += time.perf_counter() - start
+        start = time.perf_counter()
+        with storage.map(stored.path) as view:
+            hashlib.sha256(view)  # touch every byte, or the local mmap reads nothing
+        read += time.perf_counter() - start
+        storage.delete(stored.path)
+    return write / rounds, read / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write/read throughput of LocalStorage vs S3Storage")
+    parser.add_argument("--mb", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--part-mb", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--endpoint", help="S3-compatible endpoint; defaults to an in-process moto server")
+    parser.add_argument("--bucket", default="bench-flows")
+    parser.add_argument("--rtt-ms", type=float, default=0.0, help="simulated network round trip per S3 request")
+    args = parser.parse_args()
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+    server = None
+    if args.endpoint:
+        settings.s3_endpoint_url = args.endpoint
+    else:
+        from moto.server import ThreadedMotoServer
+
+        server = ThreadedMotoServer(ip_address="127.0.0.1", port=0, verbose=False)
+        server.start()
+        host, port = server.get_host_and_port()
+        settings.s3_endpoint_url = f"http://{host}:{port}"
+        settings.s3_region = settings.s3_region or "us-east-1"
+        settings.s3_access_key = settings.s3_access_key or "bench"
+        settings.s3_secret_key = settings.s3_secret_key or "bench"
+    settings.s3_part_mb = args.part_mb
+
+    data = os.urandom(args.mb * MB)
+    print(f"size={args.mb} MB part={args.part_mb} MB endpoint={settings.s3_endpoint_url} rtt={args.rtt_ms} ms")
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            write, read = measure(LocalStorage(tmp), data, args.rounds)
+            print(f"local          write {args.mb / write:8.1f} MB/s  read {args.mb / read:8.1f} MB/s")
+        for concurrency in args.concurrency:
+            settings.s3_upload_concurrency = concurrency
+            storage = S3Storage(args.bucket)
+            if concurrency == args.concurrency[0]:
+                # the client is pooled, so set-up happens once
+                if args.rtt_ms:
+                    # sleeps in the calling thread, like waiting on the wire would
+                    storage.client.meta.events.register("before-send.s3", lambda **_: time.sleep(args.rtt_ms / 1000))
+                if server is not None:
+                    storage.client.create_bucket(Bucket=args.bucket)
+            write, read = measure(storage, data, args.rounds)
+            print(f"s3 parallel={concurrency:<2} write {args.mb / write:8.1f} MB/s  read {args.mb / read:8.1f} MB/s")
+    finally:
+        if server is not None:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
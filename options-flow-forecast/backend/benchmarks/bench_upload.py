@@ -0,0 +1,77 @@
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def worker(path: str, concurrency: int, rounds: int) -> None:
+    import httpx
+    from app.main import app
+
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    async def upload(client: httpx.AsyncClient) -> None:
+        # files are streamed from disk, so the client side stays small too
+        with open(path, "rb") as f:
+            r = await client.post("/ingest/chart", files={"file": ("chart.png", f, "image/png")})
+        r.raise_for_status()
+
+    async def run() -> float:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            start = time.perf_counter()
+            for _ in range(rounds):
+                await asyncio.gather(*(upload(client) for _ in range(concurrency)))
+            return time.perf_counter() - start
+
+    elapsed = asyncio.run(run())
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"seconds": elapsed, "base_mb": base / 1024, "peak_mb": peak / 1024}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak RSS and throughput of concurrent /ingest/chart uploads")
+    parser.add_argument("--mb", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        worker(args.path, args.concurrency, args.rounds)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "upload.png")
+        with open(path, "wb") as f:
+            for _ in range(args.mb):
+                f.write(os.urandom(1024 * 1024))
+        env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{tmp}/bench.db",
+            "LOCAL_STORAGE_PATH": os.path.join(tmp, "files"),
+            "ALLOW_UNSAFE_DEV_NO_API_KEY": "1",
+            "MAX_UPLOAD_MB": str(args.mb + 1),
+            "RATE_LIMIT_PER_MINUTE": str(args.concurrency * args.rounds + 1),
+        }
+        cmd = [
+            sys.executable, "-m", "benchmarks.bench_upload", "--worker", "--path", path,
+            "--concurrency", str(args.concurrency), "--rounds", str(args.rounds),
+        ]
+        out = subprocess.run(cmd, env=env, capture_output=True, text=True, check=True).stdout
+        r = json.loads(out.splitlines()[-1])  # the app logs requests to stdout as well
+    n = args.concurrency * args.rounds
+    print(f"uploads={n} size={args.mb} MB concurrency={args.concurrency}")
+    print(
+        f"{r['seconds']:.2f}s  {n * args.mb / r['seconds']:.0f} MB/s  peak RSS {r['peak_mb']:.1f} MB"
+        f"  (+{r['peak_mb'] - r['base_mb']:.1f} MB over the imported app)"
+    )
+
+
+if __name__ == "__main__":
+    main()
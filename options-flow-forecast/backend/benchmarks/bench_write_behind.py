@@ -0,0 +1,96 @@
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from benchmarks.bench_async_db import percentile, slow_commits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="POST /feedback under bursty clients: commit per request vs write-behind")
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--commit-ms", type=float, default=5.0, help="extra latency per SQLite commit")
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--flush-ms", type=int, default=50)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ.update(
+        DATABASE_URL=f"sqlite:///{os.path.join(tmp.name, 'bench.db')}",
+        LOCAL_STORAGE_PATH=os.path.join(tmp.name, "files"),
+        ALLOW_UNSAFE_DEV_NO_API_KEY="1",
+        RATE_LIMIT_PER_MINUTE=str(10**9),
+        RETENTION_INTERVAL_MINUTES="0",
+        WRITE_BEHIND_BATCH=str(args.batch),
+        WRITE_BEHIND_FLUSH_MS=str(args.flush_ms),
+    )
+    if args.commit_ms:
+        slow_commits(args.commit_ms / 1000)
+    import anyio
+    import httpx
+    from sqlmodel import Session, func, select
+    from app.core.config import settings
+    from app.db import dispose_async_engine, get_engine
+    from app.main import app
+    from app.models import Feedback
+    from app.services.write_behind import start_write_behind, stop_write_behind, write_behind_metrics
+
+    def stored() -> int:
+        with Session(get_engine()) as session:
+            return session.exec(select(func.count()).select_from(Feedback)).one()
+
+    async def run() -> dict:
+        latencies = []
+        remaining = iter(range(args.requests))
+        body = {"analysis_id": "a", "correct": True, "notes": "x" * 200}
+        before = stored()
+        write_behind_metrics.reset()
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+
+            async def worker() -> None:
+                for _ in remaining:
+                    t = time.perf_counter()
+                    r = await client.post("/feedback", json=body)
+                    r.raise_for_status()
+                    latencies.append(time.perf_counter() - t)
+
+            start = time.perf_counter()
+            async with anyio.create_task_group() as tg:
+                queue = start_write_behind()  # the app's lifespan does this; ASGITransport skips it
+                if queue is not None:
+                    tg.start_soon(queue.run)
+                async with anyio.create_task_group() as workers:
+                    for _ in range(args.clients):
+                        workers.start_soon(worker)
+                answered = time.perf_counter() - start
+                await stop_write_behind()
+            drained = time.perf_counter() - start
+        await dispose_async_engine()
+        assert stored() - before == args.requests
+        return {
+            "rps": args.requests / answered,
+            "p50": statistics.median(latencies),
+            "p99": percentile(latencies, 0.99),
+            "drained": drained,
+            **write_behind_metrics.snapshot(),
+        }
+
+    print(f"requests={args.requests} clients={args.clients} commit +{args.commit_ms} ms batch={args.batch} flush={args.flush_ms} ms")
+    for name, enabled in [("direct", False), ("write-behind", True)]:
+        settings.write_behind = enabled
+        r = anyio.run(run)
+        line = (
+            f"{name:12} {r['rps']:7.0f} req/s  p50 {r['p50'] * 1e3:7.2f} ms  p99 {r['p99'] * 1e3:7.2f} ms"
+            f"  all rows stored after {r['drained']:.2f}s"
+        )
+        if enabled:
+            line += (
+                f"\n{'':12} {r['flushes']} flushes, avg batch {r['avg_batch']:.0f}, max depth {r['max_depth']},"
+                f" flush avg {r['avg_flush_seconds'] * 1e3:.1f} ms max {r['max_flush_seconds'] * 1e3:.1f} ms"
+            )
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+from datetime import datetime, timedelta
+import os
+import anyio
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, func, select
+from app.core.config import settings
+from app.db import dispose_async_engine, dispose_engine, get_engine, init_db
+from app.models import Analysis, Blob, FlowRowRecord, ParsedUpload
+from tests.test_compression import bad_archives
+from tests.test_results import foreign_frame
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "database_url", f"sqlite:///{tmp_path}/api.db")
+    monkeypatch.setattr(settings, "local_storage_path", str(tmp_path / "files"))
+    monkeypatch.setattr(settings, "options_flow_api_key", "")
+    monkeypatch.setattr(settings, "allow_unsafe_dev_no_api_key", True)
+    monkeypatch.setattr(settings, "rate_limit_per_minute", 10**6)
+    monkeypatch.setattr(settings, "retention_interval_minutes", 0)
+    dispose_engine()
+    from app.main import app  # the first import also runs init_db
+
+    init_db()
+    with TestClient(app) as c:
+        yield c
+    dispose_engine()
+
+
+def stored_blobs(tmp_path):
+    return [p for p in (tmp_path / "files").rglob("*") if p.is_file()]
+
+
+def ingest(client, name, data, content_type, **params):
+    return client.post("/ingest/flow", files={"file": (name, data, content_type)}, params=params)
+
+
+def test_garbage_parquet_is_a_client_error(client, tmp_path):
+    r = ingest(client, "flow.parquet", b"PAR1 not parquet", "application/vnd.apache.parquet")
+    assert r.status_code == 400 and "Parquet" in r.json()["detail"]
+    assert stored_blobs(tmp_path) == []
+
+
+def test_bad_archives_are_client_errors(client, tmp_path):
+    for name, content_type, payload in bad_archives():
+        r = ingest(client, "flow.bin", payload, content_type)
+        assert r.status_code == 400, name
+        assert stored_blobs(tmp_path) == [], name
+
+
+def test_session_date_must_be_iso(client):
+    csv = b"Ticker,Strike,CP,Side,Price,Size,Time\nSPX,6900,C,ask,1.5,2,09:31\n"
+    assert ingest(client, "flow.csv", csv, "text/csv", date="02/04/2026").status_code == 422
+    r = ingest(client, "flow.csv", csv, "text/csv", date="2026-02-04")
+    assert r.status_code == 200
+    bad = client.post("/analyze", json={"symbol": "SPX", "date": "02/04/2026", "flow_upload_id": r.json()["upload_id"]})
+    assert bad.status_code == 422
+    ok = client.post("/analyze", json={"symbol": "SPX", "date": "20260204", "flow_upload_id": r.json()["upload_id"]})
+    assert ok.status_code == 200 and client.get("/analyses").json()["items"][0]["date"] == "2026-02-04"
+
+
+def test_garbage_xlsx_is_a_client_error(client, tmp_path):
+    xlsx = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    r = ingest(client, "flow.xlsx", b"PK\x03\x04 not really a zip", xlsx)
+    assert r.status_code == 400 and ".xlsx" in r.json()["detail"]
+    assert stored_blobs(tmp_path) == []
+
+
+def test_concurrent_identical_uploads(client, monkeypatch):
+    import app.main
+
+    # both requests miss the parse cache, as when they arrive together
+    monkeypatch.setattr(app.main, "cached_row_count", lambda session, key: None)
+    csv = b"Ticker,Strike,CP,Side,Price,Size,Time\nSPX,6900,C,ask,1.5,2,09:31\nSPX,6950,P,bid,2.5,4,09:32\n"
+    statuses = []
+
+    async def upload(http):
+        r = await http.post("/ingest/flow", files={"file": ("flow.csv", csv, "text/csv")})
+        statuses.append(r.status_code)
+
+    async def main():
+        transport = httpx.ASGITransport(app=client.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            async with anyio.create_task_group() as tg:
+                for _ in range(2):
+                    tg.start_soon(upload, http)
+        await dispose_async_engine()
+
+    anyio.run(main)
+    assert statuses == [200, 200]
+    with Session(get_engine()) as session:
+        assert session.exec(select(func.count()).select_from(ParsedUpload)).one() == 1
+        assert session.exec(select(Blob.ref_count)).all() == [2]
+        assert session.exec(select(func.count()).select_from(FlowRowRecord)).one() == 2
+
+
+def test_evicted_original_with_unreadable_sidecar(client, tmp_path):
+    csv = b"Ticker,Strike,CP,Side,Price,Size,Time\nSPX,6900,C,ask,1.5,2,09:31\n"
+    upload_id = ingest(client, "flow.csv", csv, "text/csv").json()["upload_id"]
+    body = {"symbol": "SPX", "date": "2026-02-04", "flow_upload_id": upload_id}
+    assert client.post("/analyze", json=body).json()["status"] == "ok"
+    analysis_id = client.get("/analyses").json()["items"][0]["id"]
+    for path in stored_blobs(tmp_path):  # the raw file and its sidecar
+        path.unlink()
+    with Session(get_engine()) as session:
+        blob = session.exec(select(Blob)).one()
+        blob.evicted_at = datetime.utcnow()
+        session.add(blob)
+        session.commit()
+
+    r = client.post("/analyze", json=body)
+    assert r.status_code == 200 and r.json()["status"] == "needs_more_data"
+    stored = client.get(f"/analyses/{analysis_id}")
+    assert stored.status_code == 200 and stored.json()["parsed_flow_table"] is None
+
+
+def test_eviction_while_a_duplicate_upload_is_in_flight(client, monkeypatch):
+    import app.main
+    from app.services.retention import RetentionReport, evict_raw
+    from app.services.storage import get_storage
+
+    csv = b"Ticker,Strike,CP,Side,Price,Size,Time\nSPX,6900,C,ask,1.5,2,09:31\n"
+    assert ingest(client, "flow.csv", csv, "text/csv").status_code == 200
+    with Session(get_engine()) as session:
+        blob = session.exec(select(Blob)).one()
+        blob.last_used_at = datetime.utcnow() - timedelta(days=2)
+        session.add(blob)
+        session.commit()
+    count = app.main.cached_row_count
+
+    def evict_then_count(session, key):
+        # runs after save_upload found the bytes already stored, before they are registered
+        with Session(get_engine()) as s:
+            evict_raw(s, get_storage(), RetentionReport(), budget_bytes=0, grace_seconds=3600)
+        return count(session, key)
+
+    monkeypatch.setattr(app.main, "cached_row_count", evict_then_count)
+    assert ingest(client, "flow.csv", csv, "text/csv").status_code == 200
+    with Session(get_engine()) as session:
+        blob = session.exec(select(Blob)).one()
+    assert blob.evicted_at is None and blob.ref_count == 2
+    assert os.path.exists(blob.storage_path)
+
+
+def test_get_analysis_never_reparses(client, monkeypatch):
+    import app.main
+
+    csv = b"Ticker,Strike,CP,Side,Price,Size,Time\nSPX,6900,C,ask,1.5,2,09:31\n"
+    upload_id = ingest(client, "flow.csv", csv, "text/csv").json()["upload_id"]
+    client.post("/analyze", json={"symbol": "SPX", "date": "2026-02-04", "flow_upload_id": upload_id})
+    analysis_id = client.get("/analyses").json()["items"][0]["id"]
+    assert client.get(f"/analyses/{analysis_id}").json()["parsed_flow_table"]["rows"][0]["strike"] == 6900.0
+
+    with Session(get_engine()) as session:
+        os.remove(session.exec(select(ParsedUpload)).one().sidecar_path)
+
+    async def no_parse(*args, **kwargs):
+        raise AssertionError("GET /analyses/{id} re-parsed the upload")
+
+    monkeypatch.setattr(app.main, "parse_flow_file_async", no_parse)
+    stored = client.get(f"/analyses/{analysis_id}")
+    assert stored.status_code == 200 and stored.json()["status"] == "ok"
+    assert stored.json()["parsed_flow_table"] is None
+
+
+def test_unknown_result_dictionary_is_a_clear_error(client):
+    csv = b"Ticker,Strike,CP,Side,Price,Size,Time\nSPX,6900,C,ask,1.5,2,09:31\n"
+    upload_id = ingest(client, "flow.csv", csv, "text/csv").json()["upload_id"]
+    client.post("/analyze", json={"symbol": "SPX", "date": "2026-02-04", "flow_upload_id": upload_id})
+    with Session(get_engine()) as session:
+        analysis = session.exec(select(Analysis)).one()
+        analysis_id, analysis.result_zstd = analysis.id, foreign_frame()
+        session.add(analysis)
+        session.commit()
+    r = client.get(f"/analyses/{analysis_id}")
+    assert r.status_code == 500 and "unknown dictionary" in r.json()["detail"]
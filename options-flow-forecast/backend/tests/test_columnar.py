@@ -0,0 +1,41 @@
+import numpy as np
+from app.schemas import FlowRow, FlowTable
+from app.services.columnar import ColumnarFlowTable
+from app.services.features import compute_features
+
+
+def _table():
+    return FlowTable(
+        provider="uw",
+        rows=[
+            FlowRow(symbol="SPX", underlying="SPX", expiry="2026-02-04", strike=6900, option_type="C", side="ASK", premium=1000, iv=0.2, delta=0.5),
+            FlowRow(symbol="SPX", expiry=None, strike=6850, option_type="P", side="BID", price=2.8, size=5, premium=1400, iv=0.25),
+            FlowRow(symbol="SPY", underlying="SPY", expiry="2026-02-05", strike=690, option_type="C", timestamp="09:31"),
+        ],
+    )
+
+
+def test_columnar_roundtrip_is_lossless():
+    table = _table()
+    columnar = ColumnarFlowTable.from_flow_table(table)
+    assert len(columnar) == 3
+    assert columnar.strike.dtype == np.float64
+    assert columnar.symbol.values == ["SPX", "SPY"]
+    assert columnar.to_flow_table() == table
+
+
+def test_columnar_concat_merges_dictionaries():
+    table = _table()
+    first = ColumnarFlowTable.from_flow_table(FlowTable(rows=table.rows[:1], provider="uw"))
+    rest = ColumnarFlowTable.from_flow_table(FlowTable(rows=table.rows[1:], provider="uw"))
+    assert ColumnarFlowTable.concat([rest, first]).to_flow_table().rows == table.rows[1:] + table.rows[:1]
+
+
+def test_features_match_for_columnar_input():
+    table = _table()
+    assert compute_features(ColumnarFlowTable.from_flow_table(table)) == compute_features(table)
+    feats = compute_features(table)
+    assert feats.net_call_premium == 1000
+    assert feats.net_put_premium == -1400
+    assert feats.delta_notional == 500
+    assert abs(feats.skew_proxy - 0.05) < 1e-12
@@ -0,0 +1,66 @@
+import gzip
+import io
+import zipfile
+import pytest
+from app.core.config import settings
+from app.services.compression import DecompressedTooLarge, UnreadableArchive
+from app.services.parser import parse_csv_bytes, parse_flow_file
+
+CSV = b"Ticker,Strike,CP,Side,Price,Size\nSPX,6900,C,ask,1.5,2\nSPX,6905,P,bid,2.0,3\n"
+
+
+def _zip(data: bytes) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("flow.csv", data)
+    return buf.getvalue()
+
+
+@pytest.mark.parametrize("content_type", ["application/gzip", "application/zstd", "application/zip"])
+def test_compressed_uploads_parse_like_plain_csv(tmp_path, content_type):
+    if content_type == "application/zstd":
+        zstandard = pytest.importorskip("zstandard")
+        payload = zstandard.ZstdCompressor().compress(CSV)
+    elif content_type == "application/zip":
+        payload = _zip(CSV)
+    else:
+        payload = gzip.compress(CSV)
+    path = tmp_path / "upload.bin"
+    path.write_bytes(payload)
+    assert parse_flow_file(str(path), content_type).to_flow_table() == parse_csv_bytes(CSV)
+
+
+def test_decompressed_size_is_capped(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "max_upload_mb", 1)
+    bomb = CSV + b"SPX,6900,C,ask,1.5,2\n" * 100_000
+    for name, payload in [("bomb.gz", gzip.compress(bomb)), ("bomb.zip", _zip(bomb))]:
+        path = tmp_path / name
+        path.write_bytes(payload)
+        assert len(payload) < 1024 * 1024
+        content_type = "application/zip" if name.endswith(".zip") else "application/gzip"
+        with pytest.raises(DecompressedTooLarge):
+            parse_flow_file(str(path), content_type)
+
+
+def bad_archives():
+    zstandard = pytest.importorskip("zstandard")
+    two = io.BytesIO()
+    with zipfile.ZipFile(two, "w") as zf:
+        zf.writestr("a.csv", CSV)
+        zf.writestr("b.csv", CSV)
+    big = CSV + b"SPX,6900,C,ask,1.5,2\n" * 1000
+    return [
+        ("two members", "application/zip", two.getvalue()),
+        ("not a zip", "application/zip", b"just some text"),
+        ("truncated gzip", "application/gzip", gzip.compress(big)[:-8]),
+        ("corrupt zstd", "application/zstd", zstandard.ZstdCompressor().compress(big)[:8] + b"\xff" * 64),
+    ]
+
+
+def test_bad_archives_are_unreadable(tmp_path):
+    for name, content_type, payload in bad_archives():
+        path = tmp_path / "upload.bin"
+        path.write_bytes(payload)
+        with pytest.raises(UnreadableArchive):
+            parse_flow_file(str(path), content_type)
+
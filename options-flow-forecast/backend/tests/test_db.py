@@ -0,0 +1,71 @@
+import anyio
+import pytest
+from sqlalchemy import exc
+from sqlmodel import SQLModel, select
+from app.core.config import settings
+from app.db import (
+    async_database_url,
+    dispose_async_engine,
+    dispose_engine,
+    get_async_session,
+    get_engine,
+    pool_metrics,
+    pool_status,
+)
+
+
+@pytest.fixture
+def db_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "database_url", f"sqlite:///{tmp_path}/pool.db")
+    monkeypatch.setattr(settings, "db_pool_size", 1)
+    monkeypatch.setattr(settings, "db_max_overflow", 0)
+    monkeypatch.setattr(settings, "db_pool_timeout_s", 0.05)
+    dispose_engine()
+    pool_metrics.reset()
+    yield
+    dispose_engine()
+
+
+def test_engine_is_created_once_per_process(db_file):
+    engine = get_engine()
+    assert get_engine() is engine and engine.pool.size() == 1
+    dispose_engine()
+    assert get_engine() is not engine
+
+
+def test_pool_metrics_count_waits_and_exhaustion(db_file):
+    engine = get_engine()
+    with engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+        assert pool_status()["sync"]["checked_out"] == 1
+    with engine.connect():
+        pass
+    status = pool_status()
+    assert (status["checkouts"], status["waits"], status["exhausted"]) == (2, 1, 1)
+    assert status["max_wait_seconds"] >= 0.05 and status["sync"]["checked_out"] == 0
+
+
+def test_async_url_picks_async_driver():
+    assert async_database_url("sqlite:///./storage/x.db") == "sqlite+aiosqlite:///./storage/x.db"
+    assert async_database_url("postgresql+psycopg2://u:p@h/db") == "postgresql+asyncpg://u:p@h/db"
+    assert async_database_url("postgresql+asyncpg://u:p@h/db") == "postgresql+asyncpg://u:p@h/db"
+
+
+def test_async_session_round_trip(db_file):
+    from app.models import Feedback
+
+    SQLModel.metadata.create_all(get_engine())
+
+    async def run():
+        sessions = get_async_session()
+        session = await sessions.__anext__()
+        session.add(Feedback(id="f1", analysis_id="a1", correct=True))
+        await session.commit()
+        row = (await session.exec(select(Feedback).where(Feedback.id == "f1"))).one()
+        await sessions.aclose()
+        await dispose_async_engine()
+        return row
+
+    row = anyio.run(run)
+    assert (row.analysis_id, row.correct) == ("a1", True)
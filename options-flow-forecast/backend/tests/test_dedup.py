@@ -0,0 +1,51 @@
+from sqlmodel import Session, SQLModel, create_engine
+from app.models import ParsedUpload, Upload
+from app.services.dedup import cached_parse, parse_key, register_blob, storage_stats, store_parse
+from app.services.storage import StoredBlob
+
+
+def test_parse_key_covers_parse_inputs():
+    base = parse_key("d" * 64, "text/csv", "uw", "2026-02-04")
+    assert base == parse_key("d" * 64, "TEXT/CSV", "uw", "2026-02-04")
+    assert base != parse_key("d" * 64, "text/csv", "cboe", "2026-02-04")
+    assert base != parse_key("d" * 64, "text/csv", "uw", None)
+    assert base != parse_key("e" * 64, "text/csv", "uw", "2026-02-04")
+
+
+def test_blob_refs_and_dedup_ratio():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        a = StoredBlob("a" * 64, "/blobs/a", 300, duplicate=False)
+        b = StoredBlob("b" * 64, "/blobs/b", 100, duplicate=False)
+        for i, stored in enumerate([a, a, a, b]):
+            register_blob(session, stored)
+            session.add(Upload(id=str(i), upload_type="flow", filename="f.csv", storage_path=stored.path,
+                               content_type="text/csv", digest=stored.digest))
+        key = parse_key(a.digest, "text/csv")
+        session.add(ParsedUpload(key=key, digest=a.digest, metadata_json="{}", row_count=2))
+        session.commit()
+
+        assert cached_parse(session, key).row_count == 2
+        assert cached_parse(session, None) is None
+        stats = storage_stats(session)
+    assert stats["uploads"] == 4 and stats["blobs"] == 2 and stats["parsed_tables"] == 1
+    assert (stats["logical_bytes"], stats["physical_bytes"]) == (1000, 400)
+    assert stats["dedup_ratio"] == 2.5
+
+
+def test_concurrent_stores_of_one_parse_and_blob(tmp_path):
+    # two uploads of the same new bytes that both missed the cache
+    engine = create_engine(f"sqlite:///{tmp_path}/dedup.db")
+    SQLModel.metadata.create_all(engine)
+    stored = StoredBlob("a" * 64, "/blobs/a", 300, duplicate=False)
+    key = parse_key(stored.digest, "text/csv")
+    with Session(engine) as first, Session(engine) as second:
+        assert cached_parse(first, key) is None and cached_parse(second, key) is None
+        stored_first = store_parse(first, ParsedUpload(key=key, digest=stored.digest, metadata_json="{}", row_count=2))
+        register_blob(first, stored)
+        first.commit()
+        stored_second = store_parse(second, ParsedUpload(key=key, digest=stored.digest, metadata_json="{}", row_count=2))
+        assert register_blob(second, stored).ref_count == 2
+        second.commit()
+    assert (stored_first, stored_second) == (True, False)
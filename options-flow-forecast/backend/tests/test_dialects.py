@@ -0,0 +1,35 @@
+import pytest
+from app.core.config import settings
+from app.services.datetimes import FormatCache
+from app.services.dialects import CsvDialect, sniff_csv, sniff_dialect
+from app.services.parser import parse_csv_bytes
+
+CSV = "Ticker,Strike,CP,Side,Price,Size\nSPX,6900,C,ask,1.5,2\nSPX,6905,P,bid,2.0,3\n"
+
+
+@pytest.mark.parametrize(
+    "data, dialect",
+    [
+        (CSV.replace(",", "\t").encode("utf-16"), CsvDialect("utf-16", "\t")),
+        (CSV.replace(",", "\t").encode("utf-16-le"), CsvDialect("utf-16-le", "\t")),
+        (("Export Désk\n\n" + CSV.replace(",", ";")).encode("latin-1"), CsvDialect("cp1252", ";", header_row=2)),
+        (("\ufeff" + CSV.replace(",", "|")).encode("utf-8"), CsvDialect("utf-8-sig", "|")),
+        (CSV.replace("ask", "'ask, lifted'").encode("utf-8"), CsvDialect("utf-8", ",", "'")),
+    ],
+)
+@pytest.mark.parametrize("small_csv_max_rows", [1_000, 0])
+def test_sniffed_files_parse_like_plain_csv(monkeypatch, data, dialect, small_csv_max_rows):
+    monkeypatch.setattr(settings, "small_csv_max_rows", small_csv_max_rows)
+    assert sniff_csv(data) == dialect
+    expected = [(r.symbol, r.strike, r.option_type, r.price) for r in parse_csv_bytes(CSV.encode("utf-8")).rows]
+    assert [(r.symbol, r.strike, r.option_type, r.price) for r in parse_csv_bytes(data).rows] == expected
+
+
+def test_dialect_cached_per_provider():
+    cache = FormatCache()
+    semicolon = CSV.replace(",", ";").encode("utf-8")
+    assert sniff_dialect(semicolon, "eu", cache).delimiter == ";"
+    assert sniff_dialect(semicolon, "eu", cache).delimiter == ";"
+    # a provider switching formats is re-sniffed rather than misread
+    assert sniff_dialect(CSV.encode("utf-8"), "eu", cache).delimiter == ","
+    assert cache.stats() == {"hits": 1, "misses": 2, "size": 1}
@@ -0,0 +1,54 @@
+from datetime import datetime, time
+import pytest
+from app.services.mappings import mapping_registry
+from app.services.parser import UnreadableFile, parse_csv_bytes, parse_flow_file
+
+XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+CSV = (
+    "Ticker,Exp,Strike,CP,Side,Price,Size,Time\n"
+    "SPX,2026-02-04,6900,C,ask,1.5,2,09:31:00\n"
+    "SPX,2026-02-04,6905,P,bid,2,3,10:00:00\n"
+)
+
+
+def test_xlsx_matches_csv(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    wb = openpyxl.Workbook()
+    wb.active.append(["Desk notes"])
+    ws = wb.create_sheet("Flow")
+    ws.append(["Flow export"])
+    ws.append(["Ticker", "Exp", "Strike", "CP", "Side", "Price", "Size", "Time"])
+    ws.append(["SPX", datetime(2026, 2, 4), 6900, "C", "ask", 1.5, 2, time(9, 31)])
+    ws.append(["SPX", datetime(2026, 2, 4), 6905, "P", "bid", 2, 3, time(10, 0)])
+    ws.append([None, None, None, None, None, None, None, None])
+    path = tmp_path / "flow.xlsx"
+    wb.save(path)
+
+    expected = parse_csv_bytes(CSV.encode("utf-8"), session_date="2026-02-04")
+    mapping_registry.clear()
+    table = parse_flow_file(str(path), XLSX, session_date="2026-02-04").to_flow_table()
+    assert table == expected
+    assert mapping_registry.stats()["misses"] == 1 and mapping_registry.stats()["size"] == 1  # no title rows cached
+    assert parse_flow_file(str(path), "application/vnd.ms-excel", session_date="2026-02-04").to_flow_table() == expected
+
+
+def test_ms_excel_content_type_with_csv_bytes(tmp_path):
+    path = tmp_path / "flow.csv"
+    path.write_text(CSV)
+    assert len(parse_flow_file(str(path), "application/vnd.ms-excel")) == 2
+
+
+XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+XLS_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+
+
+def test_garbage_workbooks_are_unreadable(tmp_path):
+    path = tmp_path / "flow.bin"
+    for content_type, payload in [
+        (XLSX, b"PK\x03\x04 not really a zip"),
+        ("application/vnd.ms-excel", XLS_MAGIC + b"x" * 600),
+    ]:
+        path.write_bytes(payload)
+        with pytest.raises(UnreadableFile):
+            parse_flow_file(str(path), content_type)
+
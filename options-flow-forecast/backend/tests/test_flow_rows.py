@@ -0,0 +1,60 @@
+import anyio
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.models import FlowRowRecord
+from app.services.columnar import ColumnarFlowTable
+from app.services.flow_rows import insert_flow_rows, insert_flow_rows_async
+
+RECORDS = [
+    {"symbol": "SPXW", "underlying": "SPXW", "expiry": "2026-02-04", "strike": 6900.0, "option_type": "C",
+     "side": "ASK", "price": 3.2, "size": 10.0, "premium": 3200.0, "timestamp_ns": 1_770_215_460_000_000_000},
+    {"symbol": "SPXW", "underlying": "SPXW", "expiry": None, "strike": 6905.0, "option_type": "P",
+     "side": "BID", "price": None, "size": 5.0, "premium": None, "timestamp_ns": None},
+    {"symbol": "QQQ", "underlying": "QQQ", "expiry": "2026-02-20", "strike": 500.0, "option_type": "C",
+     "side": "MID", "price": 1.0, "size": 1.0, "premium": 100.0, "timestamp_ns": 1_770_215_520_000_000_000},
+]
+
+
+def test_bulk_insert_round_trips_in_batches():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    table = ColumnarFlowTable.from_records(RECORDS, "uw")
+    with Session(engine) as session:
+        assert insert_flow_rows(session, "u1", table, batch_rows=2) == 3
+        session.commit()
+        rows = session.exec(select(FlowRowRecord).order_by(FlowRowRecord.row_index)).all()
+        plan = session.exec(text(
+            "EXPLAIN QUERY PLAN SELECT * FROM flowrowrecord"
+            " WHERE symbol = 'SPXW' AND expiry = '2026-02-04' AND strike = 6900 AND option_type = 'C'"
+        )).all()
+    assert [r.row_index for r in rows] == [0, 1, 2] and {r.upload_id for r in rows} == {"u1"}
+    for row, expected in zip(rows, table.to_records()):
+        assert {f: getattr(row, f) for f in expected if f != "timestamp"} == {f: v for f, v in expected.items() if f != "timestamp"}
+    assert "ix_flowrowrecord_contract" in str(plan)
+
+
+def test_empty_table_inserts_nothing():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        assert insert_flow_rows(session, "u1", ColumnarFlowTable.empty()) == 0
+
+
+def test_async_insert_matches_sync(tmp_path):
+    url = f"sqlite:///{tmp_path}/rows.db"
+    SQLModel.metadata.create_all(create_engine(url))
+    table = ColumnarFlowTable.from_records(RECORDS, "uw")
+
+    async def main():
+        engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://"))
+        async with AsyncSession(engine) as session:
+            assert await insert_flow_rows_async(session, "u1", table, batch_rows=2) == 3
+            await session.commit()
+        await engine.dispose()
+
+    anyio.run(main)
+    with Session(create_engine(url)) as session:
+        rows = session.exec(select(FlowRowRecord).order_by(FlowRowRecord.row_index)).all()
+    assert [(r.row_index, r.symbol, r.price) for r in rows] == [(0, "SPXW", 3.2), (1, "SPXW", None), (2, "QQQ", 1.0)]
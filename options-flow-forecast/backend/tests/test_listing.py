@@ -0,0 +1,53 @@
+from datetime import date, datetime, timedelta
+import pytest
+from sqlmodel import Session, SQLModel, create_engine
+from app.models import Analysis, Upload
+from app.services.listing import InvalidCursor, encode_cursor, list_analyses, list_uploads
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        for i in range(10):
+            session.add(Analysis(id=f"a{i}", symbol="SPX" if i % 2 else "QQQ", date=f"2026-02-{1 + i // 2:02d}",
+                                 flow_upload_id="u", result_json="{}"))
+        start = datetime(2026, 2, 1, 14)
+        for i in range(6):
+            # pairs share a timestamp, so the id has to break ties
+            session.add(Upload(id=f"u{i}", upload_type="chart" if i == 5 else "flow", filename="f", storage_path="p",
+                               content_type="text/csv", symbol="SPX", created_at=start + timedelta(days=i // 2)))
+        session.commit()
+        yield session
+
+
+def _all_pages(fetch, limit):
+    items, cursor = [], None
+    while True:
+        page, cursor = fetch(limit=limit, cursor=cursor)
+        items += page
+        if cursor is None:
+            return items
+
+
+def test_analyses_keyset_pages_cover_everything_in_order(session):
+    ids = [a["id"] for a in _all_pages(lambda **kw: list_analyses(session, **kw), 3)]
+    assert ids == ["a9", "a8", "a7", "a6", "a5", "a4", "a3", "a2", "a1", "a0"]
+    page, _ = list_analyses(session, symbol="SPX", date_from=date(2026, 2, 2), date_to=date(2026, 2, 4))
+    assert [a["id"] for a in page] == ["a7", "a5", "a3"]
+    assert "result_json" not in page[0]
+
+
+def test_uploads_keyset_breaks_timestamp_ties_by_id(session):
+    ids = [u["id"] for u in _all_pages(lambda **kw: list_uploads(session, **kw), 2)]
+    assert ids == ["u5", "u4", "u3", "u2", "u1", "u0"]
+    page, cursor = list_uploads(session, upload_type="flow", date_from=date(2026, 2, 2), limit=1)
+    assert [u["id"] for u in page] == ["u4"] and cursor is not None
+    assert [u["id"] for u in list_uploads(session, upload_type="flow", date_from=date(2026, 2, 2), cursor=cursor)[0]] == ["u3", "u2"]
+
+
+@pytest.mark.parametrize("cursor", ["!!", encode_cursor(["only-one"]), encode_cursor(["not-a-date", "u1"])])
+def test_malformed_cursors_are_rejected(session, cursor):
+    with pytest.raises(InvalidCursor):
+        list_uploads(session, cursor=cursor)
@@ -0,0 +1,47 @@
+import pytest
+from pydantic import ValidationError
+from app.core.config import Settings
+from app.services.mappings import MappingRegistry
+
+
+def test_registry_caches_by_header_and_provider():
+    registry = MappingRegistry(max_entries=2)
+    header = ["Ticker", "Strike", "CP", "Side"]
+    first = registry.resolve(header, "uw")
+    assert first == {"symbol": "Ticker", "underlying": "Ticker", "strike": "Strike", "option_type": "CP", "side": "Side"}
+    assert registry.resolve(header, "uw") == first
+    registry.resolve(header, "cheddar")
+    assert registry.stats()["hits"] == 1
+    assert registry.stats()["misses"] == 2
+
+    registry.resolve(["symbol", "strike", "type"], None)
+    assert registry.stats()["size"] == 2
+    registry.resolve(header, "uw")
+    assert registry.stats()["misses"] == 4
+
+
+def test_registry_provider_override():
+    registry = MappingRegistry(overrides={"uw": {"premium": "Total Cost"}})
+    header = ["Ticker", "Strike", "CP", "Total Cost", "Value"]
+    assert registry.resolve(header, "UW")["premium"] == "Total Cost"
+    assert registry.resolve(header, "other")["premium"] == "Value"
+    registry.set_override("other", {"premium": "total cost"})
+    assert registry.resolve(header, "other")["premium"] == "Total Cost"
+
+
+def test_malformed_overrides_fail_with_a_clear_message(monkeypatch):
+    monkeypatch.setenv("PROVIDER_MAPPING_OVERRIDES", '{"uw": {"premium": "Total Cost"}')
+    with pytest.raises(ValidationError, match="PROVIDER_MAPPING_OVERRIDES is not valid JSON"):
+        Settings()
+    monkeypatch.setenv("PROVIDER_MAPPING_OVERRIDES", '["uw"]')
+    with pytest.raises(ValidationError, match="must look like"):
+        Settings()
+    monkeypatch.setenv("PROVIDER_MAPPING_OVERRIDES", '{"uw": {"premium": "Total Cost"}}')
+    assert Settings().provider_mapping_overrides == '{"uw": {"premium": "Total Cost"}}'
+
+
+def test_recognizes_does_not_touch_the_cache():
+    registry = MappingRegistry(overrides={"desk": {"premium": "Notional USD"}})
+    assert registry.recognizes(["Ticker", "Strike"]) and not registry.recognizes(["Flow export"])
+    assert registry.recognizes(["Notional USD"], "desk") and not registry.recognizes(["Notional USD"])
+    assert registry.stats() == {"hits": 0, "misses": 0, "size": 0, "max_entries": 256}
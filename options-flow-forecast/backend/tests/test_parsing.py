@@ -1,4 +1,28 @@
-from app.services.parser import parse_csv_bytes
+import io
+import subprocess
+import sys
+import threading
+import anyio
+import pandas as pd
+import pytest
+from app.core.config import settings
+from app.services.columnar import NAT, NO_DAY, ColumnarFlowTable
+from app.services.datetimes import expiry_formats
+from app.services.parser import (
+    UnreadableFile,
+    decode_occ_symbols,
+    iter_csv_batches,
+    parse_csv_bytes,
+    parse_csv_bytes_rowwise,
+    parse_csv_columnar,
+    parse_csv_parallel,
+    parse_csv_parallel_async,
+    parse_flow_file_async,
+    parse_csv_path,
+    parse_flow_file,
+    parse_flow_stream,
+    use_parallel_parse,
+)
 
 
 def test_parse_csv_basic():
@@ -7,3 +31,214 @@ def test_parse_csv_basic():
     assert len(table.rows) == 2
     assert table.rows[0].option_type == "C"
     assert table.rows[0].side == "ASK"
+
+
+def test_parse_from_mapped_file_matches_bytes(tmp_path, csv_path):
+    csv = b"symbol,expiry,strike,type,side,price,size\nSPXW,2026-02-04,6900,C,ASK,3.2,10\nSPXW,2026-02-04,6905,P,BID,2.8,5\n"
+    path = tmp_path / "flow.csv"
+    path.write_bytes(csv)
+    expected = parse_csv_bytes(csv)
+    assert parse_csv_bytes(memoryview(csv)) == expected
+    assert parse_csv_path(str(path)) == expected
+    assert parse_flow_file(str(path), "text/csv").to_flow_table() == expected
+
+
+@pytest.fixture(params=["stdlib", "pandas"])
+def csv_path(request, monkeypatch):
+    # small files take the stdlib reader; a zero row limit forces pandas
+    if request.param == "pandas":
+        monkeypatch.setattr(settings, "small_csv_max_rows", 0)
+    return request.param
+
+
+def test_parse_csv_vectorized_matches_rowwise(csv_path):
+    csv = (
+        "Ticker,Exp,Strike,call_put,Aggressor,Trade_Price,Qty,Premium,OI,IV,Delta,Time\n"
+        ' SPY ,2026-02-04,"$1,450",Call,Above Ask,$3.20,"1,000",,12,25%,0.4,09:31\n'
+        "SPY,2026-02-04,bad,put,bid,1,2,$5,,,,\n"
+        ",2026-02-04,450,P,between,1_0,3,none,,,,\n"
+        "QQQ,,400,X,mid,,,,,,,\n"
+        "QQQ,2026-02-05,401,puts,offer,2,,,,,-0.3,10:00\n"
+    )
+    table = parse_csv_bytes(csv.encode("utf-8"), session_date="2026-02-04")
+    # the row-wise reference predates timestamp_ns
+    exclude = {"rows": {"__all__": {"timestamp_ns"}}}
+    rowwise = parse_csv_bytes_rowwise(csv.encode("utf-8"))
+    assert table.model_dump(exclude=exclude) == rowwise.model_dump(exclude=exclude)
+    assert table.rows[0].timestamp_ns == 1770215460000000000
+    assert [r.strike for r in table.rows] == [1450.0, 450.0, 401.0]
+    assert table.rows[0].premium == 320000.0
+    assert table.rows[1].side == "MID"
+
+
+def test_small_csv_parses_without_pandas():
+    code = (
+        "import sys\n"
+        "from app.services.parser import parse_csv_bytes\n"
+        "table = parse_csv_bytes(b'symbol,strike,type,time\\nSPX,6900,C,1770215460\\n')\n"
+        "assert table.rows[0].timestamp_ns == 1770215460000000000\n"
+        "print('pandas' in sys.modules)\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "False"
+
+
+def test_iter_csv_batches_reuses_header_mapping():
+    lines = ["Ticker,Strike,CP,Side,Price,Size"]
+    lines += [f"SPX,{6900 + i},{'C' if i % 2 else 'P'},ask,1.5,2" for i in range(10)]
+    data = ("\n".join(lines) + "\n").encode("utf-8")
+    batches = list(iter_csv_batches(io.BytesIO(data), batch_rows=4))
+    assert [len(b) for b in batches] == [4, 4, 2]
+    assert ColumnarFlowTable.concat(batches).to_flow_table() == parse_csv_bytes(data)
+
+
+def test_parse_parquet_and_arrow_match_csv():
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    csv = "Ticker,Strike,CP,Side,Price,Size,Notes\nSPX,6900,C,ask,1.5,2,x\nSPX,6905,P,bid,2.0,3,y\nSPX,,P,bid,2.0,3,z\n"
+    expected = parse_csv_bytes(csv.encode("utf-8"))
+    table = pa.Table.from_pandas(pd.read_csv(io.StringIO(csv)), preserve_index=False)
+
+    parquet = pa.BufferOutputStream()
+    pq.write_table(table, parquet)
+    ipc_file = pa.BufferOutputStream()
+    with pa.ipc.new_file(ipc_file, table.schema) as writer:
+        writer.write_table(table)
+    ipc_stream = pa.BufferOutputStream()
+    with pa.ipc.new_stream(ipc_stream, table.schema) as writer:
+        writer.write_table(table)
+
+    for content_type, buf in [
+        ("application/vnd.apache.parquet", parquet),
+        ("application/vnd.apache.arrow.file", ipc_file),
+        ("application/vnd.apache.arrow.stream", ipc_stream),
+    ]:
+        data = buf.getvalue().to_pybytes()
+        assert parse_flow_stream(data, content_type).to_flow_table() == expected
+        assert parse_flow_stream(io.BytesIO(data), content_type).to_flow_table() == expected
+
+
+def test_garbage_parquet_and_arrow_are_unreadable(tmp_path):
+    path = tmp_path / "flow.parquet"
+    path.write_bytes(b"PAR1 this is not a parquet file")
+    for content_type in ["application/vnd.apache.parquet", "application/vnd.apache.arrow.stream"]:
+        with pytest.raises(UnreadableFile):
+            parse_flow_file(str(path), content_type)
+        with pytest.raises(UnreadableFile):
+            parse_flow_stream(b"not arrow at all", content_type)
+
+
+def test_parse_csv_parallel_preserves_order(tmp_path):
+    lines = ["Ticker,Strike,CP,Side,Price,Size"]
+    lines += [f"SPX,{6000 + i},{'C' if i % 3 else 'P'},ask,1.5,2" for i in range(200)]
+    path = tmp_path / "flow.csv"
+    path.write_text("\n".join(lines) + "\n")
+    table = parse_csv_parallel(str(path), "uw", workers=4)
+    assert table.to_flow_table() == parse_csv_bytes(path.read_bytes(), "uw")
+    table = anyio.run(lambda: parse_csv_parallel_async(str(path), "uw", workers=4))
+    assert table.to_flow_table() == parse_csv_bytes(path.read_bytes(), "uw")
+
+
+def test_async_parse_runs_off_the_event_loop(tmp_path, monkeypatch):
+    import app.services.parser as parser
+
+    threads = []
+    serial = parser.parse_flow_file
+
+    def recording(*args):
+        threads.append(threading.current_thread())
+        return serial(*args)
+
+    monkeypatch.setattr(parser, "parse_flow_file", recording)
+    path = tmp_path / "flow.csv"
+    path.write_bytes(b"Ticker,Strike,CP,Side,Price,Size\nSPX,6900,C,ask,1.5,2\n")
+    table = anyio.run(lambda: parse_flow_file_async(str(path), "text/csv", "uw"))
+    assert len(table) == 1 and threads and threads[0] is not threading.main_thread()
+
+
+def test_parallel_parse_is_opt_in_and_needs_several_workers(tmp_path, monkeypatch):
+    path = tmp_path / "flow.csv"
+    path.write_bytes(b"Ticker,Strike,CP\n" + b"SPX,6900,C\n" * 100_000)
+    monkeypatch.setattr(settings, "parse_workers", 2)
+    assert not use_parallel_parse(str(path), "text/csv")
+    monkeypatch.setattr(settings, "parallel_parse_threshold_mb", 1)
+    assert use_parallel_parse(str(path), "text/csv")
+    monkeypatch.setattr(settings, "parse_workers", 1)
+    assert not use_parallel_parse(str(path), "text/csv")
+    monkeypatch.setattr(settings, "parse_workers", 2)
+    assert not use_parallel_parse(str(path), "application/vnd.apache.parquet")
+    path.write_bytes(b"Ticker,Strike,CP\nSPX,6900,C\n")
+    assert not use_parallel_parse(str(path), "text/csv")
+
+
+def test_occ_symbol_only_export(csv_path):
+    csv = (
+        "Symbol,Side,Price,Size\n"
+        "SPXW  260204C06900000,ask,1.5,2\n"
+        "O:SPY260220P00450500,bid,1,1\n"
+        "not-an-option,bid,1,1\n"
+    )
+    table = parse_csv_bytes(csv.encode("utf-8"))
+    assert [(r.symbol, r.expiry, r.option_type, r.strike) for r in table.rows] == [
+        ("SPXW", "2026-02-04", "C", 6900.0),
+        ("SPY", "2026-02-20", "P", 450.5),
+    ]
+    assert table.rows[0].premium == 300.0
+
+    decoded = decode_occ_symbols(pd.Series([".aapl260117c00150000", "SPXW  2602X4C06900000", None]))
+    assert decoded["root"].tolist() == ["AAPL", None, None]
+    assert decoded["strike"].tolist()[0] == 150.0
+
+
+def test_timestamps_normalized_to_epoch_ns(csv_path):
+    csv = (
+        "symbol,strike,type,time\n"
+        "SPX,6900,C,2026-02-04T10:00:00-05:00\n"
+        "SPX,6905,P,2026-02-04 09:31:00\n"
+        "SPX,6910,C,\n"
+    )
+    table = parse_csv_columnar(csv.encode("utf-8"), "iso-provider")
+    assert table.timestamp_ns.tolist() == [1770217200000000000, 1770215460000000000, NAT]
+    ordered = table.sort_by_time()
+    assert ordered.strike.tolist() == [6905.0, 6900.0, 6910.0]
+    assert table.time_slice(1770215460000000000, 1770217200000000000).strike.tolist() == [6905.0]
+
+
+def test_expiries_normalized_to_iso_dates(csv_path):
+    csv = (
+        "symbol,expiry,strike,type\n"
+        "SPY,2/4/26,450,C\n"
+        "SPY,2/20/26,450,P\n"
+        "SPY,,451,C\n"
+        "SPY,weekly,452,C\n"
+    )
+    table = parse_csv_columnar(csv.encode("utf-8"), "us-dates")
+    assert table.expiry.decode().tolist() == ["2026-02-04", "2026-02-20", None, "weekly"]
+    assert table.expiry_days().tolist() == [20488, 20504, NO_DAY, NO_DAY]
+    assert expiry_formats.get("us-dates") == "%m/%d/%y"
+    # the days come from the parse itself and match what the labels give once stored and reloaded
+    assert table.expiry_day is not None
+    assert ColumnarFlowTable.from_records(table.to_records()).expiry_days().tolist() == table.expiry_days().tolist()
+
+
+def test_stray_expiry_does_not_force_redetection():
+    lines = ["symbol,expiry,strike,type"] + [f"SPY,2/{d}/26,450,C" for d in range(1, 9)] * 2
+    lines[3] = "SPY,weekly,450,C"
+    expiry_formats.clear()
+    batches = list(iter_csv_batches(("\n".join(lines) + "\n").encode("utf-8"), "stray-dates", batch_rows=8))
+    assert len(batches) == 2 and expiry_formats.stats()["hits"] == 1 and expiry_formats.stats()["misses"] == 1
+    assert ColumnarFlowTable.concat(batches).expiry_days().tolist().count(NO_DAY) == 1
+
+    numeric = parse_csv_columnar(b"symbol,expiry,strike,type\nSPY,20260204,450,C\nSPY,,450,P\n")
+    assert numeric.expiry.decode().tolist() == ["2026-02-04", None]
+
+
+def test_both_parse_paths_reject_non_iso_session_dates():
+    csv = b"Ticker,Strike,CP,Side,Price,Size,Time\nSPX,6900,C,ask,1.5,2,09:31\n"
+    small = parse_flow_stream(csv, "text/csv", session_date="2026-02-04")
+    assert small.timestamp_ns.tolist() == parse_csv_columnar(csv, session_date="2026-02-04").timestamp_ns.tolist()
+    for parse in (lambda d: parse_flow_stream(csv, "text/csv", session_date=d),
+                  lambda d: parse_csv_columnar(csv, session_date=d)):
+        with pytest.raises(ValueError):
+            parse("02/04/2026")
@@ -0,0 +1,55 @@
+import pytest
+import zstandard
+from app.schemas import AnalyzeResponse, FlowRow, FlowTable
+import app.services.results as results
+from app.services.results import (
+    UnknownDictionary,
+    compress_result,
+    decompress_result,
+    dictionaries,
+    load_result,
+    next_dictionary_path,
+)
+
+RESPONSE = AnalyzeResponse(
+    status="ok",
+    parsed_flow_table=FlowTable(rows=[FlowRow(symbol="SPX", strike=6900.0, option_type="C", side="ASK")]),
+    rationale="Net call premium: 1,000",
+    confidence=0.55,
+    disclaimer="Educational use only.",
+    observed={"rows": 1},
+)
+
+
+def test_result_is_stored_without_the_table():
+    data = compress_result(RESPONSE)
+    assert zstandard.get_frame_parameters(data).dict_id in dictionaries()
+    payload = decompress_result(data)
+    assert "parsed_flow_table" not in payload
+    assert AnalyzeResponse.model_validate(payload) == RESPONSE.model_copy(update={"parsed_flow_table": None})
+
+
+def test_legacy_rows_read_as_plain_json():
+    payload = load_result(None, RESPONSE.model_dump_json())
+    assert AnalyzeResponse.model_validate(payload) == RESPONSE
+    assert load_result(zstandard.ZstdCompressor().compress(b'{"status": "ok"}'), "") == {"status": "ok"}
+
+
+def foreign_frame() -> bytes:
+    """A result compressed with a dictionary this tree does not ship."""
+    other = zstandard.train_dictionary(1024, [f'{{"rationale": "sample {i}", "n": {i * 7}}}'.encode() for i in range(200)])
+    return zstandard.ZstdCompressor(dict_data=other).compress(b'{"status": "ok"}')
+
+
+def test_unknown_dictionary_is_an_error():
+    data = foreign_frame()
+    with pytest.raises(UnknownDictionary, match="unknown dictionary"):
+        decompress_result(data)
+
+
+def test_new_dictionary_is_numbered_past_the_newest(tmp_path, monkeypatch):
+    monkeypatch.setattr(results, "DICTIONARY_DIR", str(tmp_path))
+    assert next_dictionary_path().endswith("analysis_result_v001.zdict")
+    for name in ["analysis_result_v001.zdict", "analysis_result_v003.zdict"]:  # v002 was deleted
+        (tmp_path / name).write_bytes(b"")
+    assert next_dictionary_path() == str(tmp_path / "analysis_result_v004.zdict")
@@ -0,0 +1,125 @@
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from sqlmodel import Session, SQLModel, create_engine
+from app.models import Blob, ParsedUpload, Upload
+from app.services.columnar import ColumnarFlowTable
+from app.services.dedup import register_blob, restore_blob
+from app.services.retention import RetentionReport, collect_orphans, compact_parsed, evict_raw
+from app.services.sidecar import dump_sidecar, load_partitioned, sidecar_key, summary_json
+from app.services.storage import LocalStorage
+
+
+def _table(symbols, provider="uw"):
+    return ColumnarFlowTable.from_records(
+        [{"symbol": s, "strike": 100.0 + i, "option_type": "C", "side": "ASK", "premium": 10.0 * i} for i, s in enumerate(symbols)],
+        provider,
+    )
+
+
+def _session():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    return Session(engine)
+
+
+def test_compaction_merges_sidecars_into_symbol_day_partitions(tmp_path):
+    storage = LocalStorage(str(tmp_path))
+    tables = {"a" * 64: _table(["SPY", "QQQ", "SPY", None]), "b" * 64: _table(["QQQ", "IWM"])}
+    day = datetime(2026, 2, 4, 15)
+    with _session() as session:
+        for key, table in tables.items():
+            path = storage.put(sidecar_key(key), dump_sidecar(table))
+            session.add(ParsedUpload(key=key, digest=key, metadata_json=summary_json(table, path), row_count=len(table),
+                                     sidecar_path=path, created_at=day))
+        session.commit()
+
+        report = RetentionReport()
+        compact_parsed(session, storage, report, cutoff=day + timedelta(days=1))
+        assert report.compacted_tables == 2 and report.partitions_written == 4
+        assert sorted(os.listdir(tmp_path / "partitions")) == ["IWM", "QQQ", "SPY", "_none"]
+        assert list((tmp_path / "parsed").rglob("*.arrow")) == []
+        for key, table in tables.items():
+            parsed = session.get(ParsedUpload, key)
+            summary = json.loads(parsed.metadata_json)
+            assert parsed.sidecar_path is None and summary["row_count"] == len(table)
+            assert load_partitioned(key, summary["partitions"], "uw").to_records() == table.to_records()
+
+        again = RetentionReport()
+        compact_parsed(session, storage, again, cutoff=day + timedelta(days=1))
+        assert again.partitions_written == 0
+
+
+def test_orphans_past_the_grace_period_are_deleted(tmp_path):
+    storage = LocalStorage(str(tmp_path))
+    kept = storage.save("kept.csv", b"a,b\n1,2\n")
+    orphan = storage.save("orphan.csv", b"a,b\n3,4\n")
+    fresh = storage.save("fresh.csv", b"a,b\n5,6\n")
+    stale = time.time() - 7200
+    for path in (kept.path, orphan.path):
+        os.utime(path, (stale, stale))
+    with _session() as session:
+        register_blob(session, kept)
+        session.commit()
+        report = RetentionReport()
+        collect_orphans(session, storage, report, grace_seconds=3600)
+    assert os.path.exists(kept.path) and os.path.exists(fresh.path) and not os.path.exists(orphan.path)
+    assert (report.orphans_deleted, report.orphan_bytes) == (1, orphan.size)
+
+
+def test_eviction_removes_least_recently_used_parsed_originals(tmp_path):
+    storage = LocalStorage(str(tmp_path))
+    now = datetime.utcnow()
+    with _session() as session:
+        blobs = []
+        for i, kind in enumerate(["flow", "chart", "flow", "flow"]):
+            stored = storage.save(f"{i}.csv", bytes([i]) * 1000)
+            blobs.append(stored)
+            register_blob(session, stored).last_used_at = now - timedelta(days=10 - i)
+            key = f"key{i}" if kind == "flow" else None
+            session.add(Upload(id=str(i), upload_type=kind, filename=f"{i}.csv", storage_path=stored.path,
+                               content_type="text/csv", digest=stored.digest, parse_key=key))
+            if key:
+                session.add(ParsedUpload(key=key, digest=stored.digest, metadata_json="{}", row_count=1))
+        session.commit()
+
+        report = RetentionReport()
+        evict_raw(session, storage, report, budget_bytes=2000, grace_seconds=3600)
+        # the chart is the oldest survivor: it has no parse to fall back on
+        assert [os.path.exists(b.path) for b in blobs] == [False, True, False, True]
+        assert (report.blobs_evicted, report.eviction_bytes) == (2, 2000)
+        assert session.get(Blob, blobs[0].digest).evicted_at is not None
+
+        again = storage.save("0.csv", bytes([0]) * 1000)
+        assert not again.duplicate
+        assert register_blob(session, again).evicted_at is None
+
+
+def test_eviction_between_a_duplicate_save_and_its_registration(tmp_path):
+    storage = LocalStorage(str(tmp_path))
+    data = b"x" * 1000
+    with _session() as session:
+        first = storage.save("a.csv", data)
+        register_blob(session, first).last_used_at = datetime.utcnow() - timedelta(days=2)
+        session.add(Upload(id="1", upload_type="flow", filename="a.csv", storage_path=first.path,
+                           content_type="text/csv", digest=first.digest, parse_key="k"))
+        session.add(ParsedUpload(key="k", digest=first.digest, metadata_json="{}", row_count=1))
+        session.commit()
+
+        again = storage.save("a.csv", data)
+        assert again.duplicate
+        evict_raw(session, storage, RetentionReport(), budget_bytes=0, grace_seconds=3600)
+        assert not os.path.exists(first.path)
+        blob = register_blob(session, again)
+        # counted, but still marked evicted: the caller has to write the bytes again
+        assert blob.ref_count == 2 and blob.evicted_at is not None
+        restored = storage.save("a.csv", data)
+        restore_blob(session, restored)
+        session.commit()
+
+        # just used, so inside the grace window
+        report = RetentionReport()
+        evict_raw(session, storage, report, budget_bytes=0, grace_seconds=3600)
+        assert report.blobs_evicted == 0 and os.path.exists(restored.path)
+        assert session.get(Blob, first.digest).evicted_at is None
@@ -0,0 +1,91 @@
+import gzip
+import hashlib
+import uuid
+import anyio
+import pytest
+from app.core.config import settings
+from app.services.parser import parse_csv_bytes, parse_flow_file
+from app.services.storage import S3Storage, UploadTooLarge, s3_client
+
+moto_server = pytest.importorskip("moto.server")
+MB = 1024 * 1024
+CSV = b"symbol,expiry,strike,type,side,price,size\nSPXW,2026-02-04,6900,C,ASK,3.2,10\nSPXW,2026-02-04,6905,P,BID,2.8,5\n"
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    server = moto_server.ThreadedMotoServer(ip_address="127.0.0.1", port=0, verbose=False)
+    server.start()
+    host, port = server.get_host_and_port()
+    for name, value in [
+        ("s3_endpoint_url", f"http://{host}:{port}"),
+        ("s3_region", "us-east-1"),
+        ("s3_access_key", "test"),
+        ("s3_secret_key", "test"),
+        ("s3_part_mb", 5),
+        ("s3_upload_concurrency", 3),
+    ]:
+        monkeypatch.setattr(settings, name, value)
+    # moto keeps one backend per process, so every test gets its own bucket
+    storage = S3Storage(f"flows-{uuid.uuid4().hex[:12]}")
+    storage.client.create_bucket(Bucket=storage.bucket)
+    yield storage
+    server.stop()
+
+
+async def _chunks(data: bytes, size: int = MB):
+    for i in range(0, len(data), size):
+        yield data[i : i + size]
+
+
+def _keys(storage: S3Storage):
+    return [o["Key"] for o in storage.client.list_objects_v2(Bucket=storage.bucket).get("Contents", [])]
+
+
+def test_small_upload_is_content_addressed(s3):
+    first = anyio.run(s3.save_stream, "a.csv", _chunks(CSV))
+    second = s3.save("again.csv", CSV)
+    assert first.path == f"s3://{s3.bucket}/blobs/{first.digest[:2]}/{first.digest}"
+    assert not first.duplicate and second.duplicate and second.path == first.path
+    assert _keys(s3) == [f"blobs/{first.digest[:2]}/{first.digest}"]
+
+
+def test_multipart_upload_in_parallel_parts(s3, monkeypatch):
+    data = bytes(range(256)) * (12 * MB // 256)  # 5 + 5 + 2 MB parts
+    monkeypatch.setattr(s3.client, "copy_object", None)  # written once, straight to the digest key
+    stored = anyio.run(s3.save_stream, "big.bin", _chunks(data))
+    assert stored.digest == hashlib.sha256(data).hexdigest() and stored.size == len(data)
+    assert _keys(s3) == [f"blobs/{stored.digest[:2]}/{stored.digest}"]
+    with s3.map(stored.path) as view:
+        assert view == data
+    with s3.open(stored.path) as f:
+        f.seek(7 * MB)
+        assert f.read(10) == data[7 * MB : 7 * MB + 10]
+    monkeypatch.setattr(s3.client, "create_multipart_upload", None)  # a duplicate is never uploaded
+    assert anyio.run(s3.save_stream, "copy.bin", _chunks(data)).duplicate
+
+
+def test_oversized_upload_leaves_nothing_behind(s3):
+    with pytest.raises(UploadTooLarge):
+        anyio.run(s3.save_stream, "big.bin", _chunks(b"x" * 12 * MB), 11 * MB)
+    assert _keys(s3) == []
+    assert s3.client.list_multipart_uploads(Bucket=s3.bucket).get("Uploads", []) == []
+
+
+@pytest.mark.parametrize("content_type", ["text/csv", "application/gzip"])
+def test_parse_flow_file_reads_from_s3(s3, content_type):
+    stored = s3.save("flow", gzip.compress(CSV) if content_type == "application/gzip" else CSV)
+    assert parse_flow_file(stored.path, content_type).to_flow_table() == parse_csv_bytes(CSV)
+
+
+def test_client_is_pooled(s3):
+    assert s3_client() is s3_client() is s3.client
+
+
+def test_put_and_list_files(s3):
+    blob = s3.save("flow.csv", CSV)
+    path = s3.put("parsed/ab/key.arrow", b"sidecar")
+    assert path == s3.key_path("parsed/ab/key.arrow") == f"s3://{s3.bucket}/parsed/ab/key.arrow"
+    assert [(f.path, f.size) for f in s3.list_files("parsed")] == [(path, 7)]
+    assert [f.path for f in s3.list_files("blobs")] == [blob.path]
+    assert list(s3.list_files("tmp")) == []
@@ -0,0 +1,35 @@
+import json
+import math
+from app.services.columnar import ColumnarFlowTable
+from app.services.sidecar import dump_sidecar, load_sidecar, sidecar_key, summary_json
+from app.services.storage import LocalStorage
+
+RECORDS = [
+    {"symbol": "SPY", "underlying": "SPY", "expiry": "2026-02-20", "strike": 600.0, "option_type": "C",
+     "side": "ASK", "price": 1.5, "size": 10.0, "premium": 1500.0, "timestamp": "09:31",
+     "timestamp_ns": 1_770_215_460_000_000_000},
+    {"symbol": "QQQ", "underlying": "QQQ", "expiry": None, "strike": 500.0, "option_type": "P",
+     "side": "BID", "price": None, "size": 5.0, "premium": None, "timestamp": None, "timestamp_ns": None},
+]
+
+
+def test_sidecar_round_trip(tmp_path):
+    table = ColumnarFlowTable.from_records(RECORDS, "uw")
+    storage = LocalStorage(str(tmp_path))
+    path = storage.put(sidecar_key("ab" + "c" * 62), dump_sidecar(table))
+    assert path == str(tmp_path / "parsed" / "ab" / ("ab" + "c" * 62 + ".arrow"))
+
+    loaded = load_sidecar(path)
+    assert loaded.provider == "uw"
+    assert loaded.to_records() == table.to_records()
+    assert math.isnan(loaded.price[1]) and loaded.expiry.codes[1] == -1
+    assert loaded.expiry_days().tolist() == table.expiry_days().tolist()
+
+
+def test_summary_json_keeps_stats_only():
+    table = ColumnarFlowTable.from_records(RECORDS + [dict(RECORDS[0], premium=500.0)], "uw")
+    summary = json.loads(summary_json(table, "/data/parsed/x.arrow"))
+    assert summary["row_count"] == 3 and summary["symbols"] == ["QQQ", "SPY"]
+    assert (summary["calls"], summary["puts"], summary["premium"]) == (2, 1, 2000.0)
+    assert summary["first_timestamp_ns"] == summary["last_timestamp_ns"] == 1_770_215_460_000_000_000
+    assert summary["sidecar"] == "/data/parsed/x.arrow"
@@ -0,0 +1,56 @@
+import hashlib
+import os
+import anyio
+import pytest
+from app.services.storage import LocalStorage, UploadTooLarge, map_file
+
+
+async def _chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+def test_save_stream_writes_chunks(tmp_path):
+    storage = LocalStorage(str(tmp_path))
+    stored = anyio.run(storage.save_stream, "Flow.CSV", _chunks(b"a,b\n", b"1,2\n"))
+    assert stored.digest == hashlib.sha256(b"a,b\n1,2\n").hexdigest()
+    assert stored.path == storage.blob_path(stored.digest)
+    assert stored.size == 8 and not stored.duplicate
+    assert open(stored.path, "rb").read() == b"a,b\n1,2\n"
+
+
+def test_identical_uploads_share_a_blob(tmp_path):
+    storage = LocalStorage(str(tmp_path))
+    first = anyio.run(storage.save_stream, "a.csv", _chunks(b"a,b\n1,2\n"))
+    second = anyio.run(storage.save_stream, "copy.csv", _chunks(b"a,b\n", b"1,2\n"))
+    other = storage.save("b.csv", b"a,b\n3,4\n")
+    assert second.path == first.path and second.duplicate
+    assert other.path != first.path and not other.duplicate
+    assert os.listdir(tmp_path / "tmp") == []
+
+
+def test_save_stream_stops_at_limit(tmp_path):
+    storage = LocalStorage(str(tmp_path))
+    consumed = []
+
+    async def chunks():
+        for i in range(10):
+            consumed.append(i)
+            yield b"x" * 4
+
+    with pytest.raises(UploadTooLarge):
+        anyio.run(storage.save_stream, "big.csv", chunks(), 10)
+    assert consumed == [0, 1, 2]
+    assert os.listdir(tmp_path / "tmp") == []
+    assert not (tmp_path / "blobs").exists()
+
+
+def test_map_file_views_stored_bytes(tmp_path):
+    path = tmp_path / "flow.csv"
+    path.write_bytes(b"a,b\n1,2\n")
+    with map_file(str(path)) as view:
+        assert isinstance(view, memoryview)
+        assert bytes(view) == b"a,b\n1,2\n"
+    (tmp_path / "empty.csv").write_bytes(b"")
+    with map_file(str(tmp_path / "empty.csv")) as view:
+        assert len(view) == 0
@@ -0,0 +1,153 @@
+import anyio
+import pytest
+from sqlmodel import Session, SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.config import settings
+from app.db import dispose_async_engine, dispose_engine, get_async_engine, get_engine
+from app.models import Analysis, Feedback
+from app.services.write_behind import (
+    WriteBehindQueue,
+    get_write_behind,
+    persist,
+    start_write_behind,
+    stop_write_behind,
+    write_behind_metrics,
+)
+
+
+@pytest.fixture
+def db_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "database_url", f"sqlite:///{tmp_path}/wb.db")
+    dispose_engine()
+    SQLModel.metadata.create_all(get_engine())
+    write_behind_metrics.reset()
+    yield
+    dispose_engine()
+
+
+def stored_ids():
+    with Session(get_engine()) as session:
+        return sorted(session.exec(select(Feedback.id)).all())
+
+
+def run_queue(queue: WriteBehindQueue, body):
+    async def main():
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(queue.run)
+            await body()
+            await queue.close(5)
+        await dispose_async_engine()
+
+    anyio.run(main)
+
+
+def test_flushes_full_batches_and_drains_on_close(db_file):
+    queue = WriteBehindQueue(batch_size=10, flush_interval=60, max_depth=10)
+
+    async def body():
+        for i in range(25):
+            await queue.put(Feedback(id=f"f{i:02d}", analysis_id="a"))
+
+    run_queue(queue, body)
+    assert stored_ids() == [f"f{i:02d}" for i in range(25)]
+    status = write_behind_metrics.snapshot()
+    assert (status["enqueued"], status["flushed"], status["flushes"]) == (25, 25, 3)
+    assert status["max_depth"] == 10 and not queue.pending
+
+
+def test_flushes_partial_batch_after_interval(db_file):
+    queue = WriteBehindQueue(batch_size=100, flush_interval=0.05, max_depth=1000)
+    seen = []
+
+    async def body():
+        for i in range(3):
+            await queue.put(Feedback(id=f"f{i}", analysis_id="a"))
+        await anyio.sleep(0.5)
+        seen.extend(stored_ids())
+
+    run_queue(queue, body)
+    assert seen == ["f0", "f1", "f2"] and write_behind_metrics.flushes == 1
+
+
+def test_rejected_rows_do_not_block_the_batch(db_file):
+    queue = WriteBehindQueue(batch_size=10, flush_interval=0.01, max_depth=10)
+
+    async def body():
+        for fid in ["a", "a", "b"]:
+            await queue.put(Feedback(id=fid, analysis_id="x"))
+
+    run_queue(queue, body)
+    assert stored_ids() == ["a", "b"]
+    assert (write_behind_metrics.dropped, write_behind_metrics.flushed) == (1, 2)
+
+
+def test_requests_waiting_on_a_full_queue_do_not_starve_the_flusher(db_file, tmp_path, monkeypatch):
+    # one pooled connection (as on SQLite) and room for one queued row
+    monkeypatch.setattr(settings, "write_behind", True)
+    monkeypatch.setattr(settings, "write_behind_batch", 1)
+    monkeypatch.setattr(settings, "write_behind_max_depth", 1)
+    monkeypatch.setattr(settings, "db_pool_timeout_s", 2)
+    monkeypatch.setattr(settings, "write_behind_spill_path", str(tmp_path / "spill.jsonl"))
+
+    async def request(i):
+        async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+            await session.exec(select(Feedback.id))  # checks out the pool's only connection
+            await persist(session, Feedback(id=f"f{i}", analysis_id="a"))
+
+    async def main():
+        with anyio.fail_after(15):
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(start_write_behind().run)
+                async with anyio.create_task_group() as requests:
+                    for i in range(6):
+                        requests.start_soon(request, i)
+                await stop_write_behind()
+        await dispose_async_engine()
+
+    anyio.run(main)
+    assert stored_ids() == [f"f{i}" for i in range(6)]
+    assert write_behind_metrics.failures == 0
+
+
+def test_rows_left_at_shutdown_are_spilled_and_replayed(db_file, tmp_path):
+    spill_path = str(tmp_path / "spill.jsonl")
+    stuck = WriteBehindQueue(batch_size=10, flush_interval=60, max_depth=10, spill_path=spill_path)
+    analysis = Analysis(id="a1", symbol="SPX", date="2026-02-04", flow_upload_id="u", result_zstd=b"\x00\xff")
+
+    async def shutdown_without_flusher():
+        await stuck.put(analysis)
+        await stuck.put(Feedback(id="f1", analysis_id="a1", notes="kept"))
+        await stuck.close(0.05)
+
+    anyio.run(shutdown_without_flusher)
+    assert stored_ids() == [] and not stuck.pending
+
+    queue = WriteBehindQueue(batch_size=10, flush_interval=0.01, max_depth=10, spill_path=spill_path)
+
+    async def nothing():
+        pass
+
+    run_queue(queue, nothing)
+    assert stored_ids() == ["f1"]
+    with Session(get_engine()) as session:
+        assert session.get(Analysis, "a1").result_zstd == b"\x00\xff"
+        assert session.get(Feedback, "f1").notes == "kept"
+    assert not (tmp_path / "spill.jsonl").exists()
+
+
+def test_persist_after_close_writes_directly(db_file, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "write_behind", True)
+    monkeypatch.setattr(settings, "write_behind_spill_path", str(tmp_path / "spill.jsonl"))
+
+    async def main():
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(start_write_behind().run)
+            queue = get_write_behind()
+            await queue.close(5)
+            async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+                await persist(session, Feedback(id="late", analysis_id="a"))
+            await stop_write_behind()
+        await dispose_async_engine()
+
+    anyio.run(main)
+    assert stored_ids() == ["late"]